@@ -1,79 +1,291 @@
 from fastapi import HTTPException, status
+from sqlalchemy import delete, func, insert, literal, text
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from logging import Logger
 from datetime import datetime, timezone
-from app.schemas import AnswerSchema, AnswerBaseSchema
+import json
+from typing import Any, AsyncIterator
+from app.schemas import (
+    AnswerSchema,
+    AnswerBaseSchema,
+    BulkAnswerSchema,
+    BulkAnswersResultSchema,
+    BulkErrorSchema
+)
 from app.models import Answer, Question
+from app.actions.changes_actions import answer_created, answer_deleted, record_changes
+from app.cache import CacheBackend, question_key
+from app.events import ANSWER_CREATED, ANSWER_DELETED, AnswerBroker, AnswerEvent
+from app.serialization import dump_answer
+from app.bulk import chunked, reject_chunk, validate_items
 
-async def create_answer(question_id: int, answer_data: AnswerBaseSchema, db: AsyncSession, logger: Logger) -> AnswerSchema:
+def _question_does_not_exist(question_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Question with id {question_id} does not exist."
+    )
+
+async def create_answer(
+    question_id: int,
+    answer_data: AnswerBaseSchema,
+    db: AsyncSession,
+    logger: Logger,
+    cache: CacheBackend,
+    broker: AnswerBroker
+) -> AnswerSchema:
     """
-    Создает новый ответ.
+    Создает новый ответ одним запросом INSERT ... SELECT ... RETURNING:
+    строка вставляется, только если вопрос существует.
     """
-    result = await db.execute(select(Question).where(Question.id == question_id))
-    question = result.scalar_one_or_none()
-    if question is None:
-        logger.warning(f"Попытка создать ответ к несуществующему вопросу id={question_id}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Question with id {question_id} does not exist."
-        )
+    created_at = datetime.now(timezone.utc).replace(tzinfo=None)
 
-    db_answer = Answer(
-        question_id=question_id,
-        text=answer_data.text,
-        user_id=answer_data.user_id,
-        created_at=datetime.now(timezone.utc).replace(tzinfo=None)
+    result = await db.execute(
+        insert(Answer)
+        .from_select(
+            ["question_id", "text", "user_id", "created_at"],
+            select(
+                Question.id,
+                literal(answer_data.text, Answer.text.type),
+                literal(answer_data.user_id, Answer.user_id.type),
+                literal(created_at, Answer.created_at.type)
+            ).where(Question.id == question_id, Question.deleted_at.is_(None))
+        )
+        .returning(Answer.id, Answer.question_id, Answer.text, Answer.user_id, Answer.created_at)
     )
+    db_answer = result.one_or_none()
+
+    if db_answer is None:
+        await db.rollback()
+        logger.warning("Попытка создать ответ к несуществующему вопросу id=%s", question_id)
+        raise _question_does_not_exist(question_id)
 
-    db.add(db_answer)
+    await record_changes(db, [answer_created(db_answer._asdict())])
     await db.commit()
-    await db.refresh(db_answer)
+    await cache.delete(question_key(question_id))
+    await broker.publish(AnswerEvent(ANSWER_CREATED, question_id, dump_answer(db_answer._asdict()), db_answer.id))
 
     logger.info(
-        f"Создан новый ответ с id={db_answer.id} к вопросу id={question_id} "
-        f"от пользователя {answer_data.user_id}"
+        "Создан новый ответ с id=%s к вопросу id=%s от пользователя %s",
+        db_answer.id, question_id, answer_data.user_id
     )
 
     return AnswerSchema.model_validate(db_answer)
 
+async def create_answers_bulk(
+    items: AsyncIterator[Any],
+    db: AsyncSession,
+    logger: Logger,
+    cache: CacheBackend,
+    broker: AnswerBroker
+) -> BulkAnswersResultSchema:
+    """
+    Создает ответы пачками: существование вопросов проверяется одним запросом на пачку,
+    вставка выполняется многострочным INSERT ... RETURNING. Ошибочные элементы пропускаются,
+    каждая пачка фиксируется отдельно (см. app.bulk).
+    """
+    result = BulkAnswersResultSchema()
+    index = 0
+
+    async for chunk in chunked(items):
+        valid = validate_items(chunk, BulkAnswerSchema, index, result.errors)
+        index += len(chunk)
+
+        question_ids = {answer.question_id for _, answer in valid}
+        existing = set((await db.scalars(
+            select(Question.id).where(Question.id.in_(question_ids), Question.deleted_at.is_(None))
+        )).all())
+
+        indexes = []
+        rows = []
+        for item_index, answer in valid:
+            if answer.question_id not in existing:
+                result.errors.append(BulkErrorSchema(
+                    index=item_index,
+                    detail=f"Question with id {answer.question_id} does not exist."
+                ))
+                continue
+
+            indexes.append(item_index)
+            rows.append({
+                "question_id": answer.question_id,
+                "text": answer.text,
+                "user_id": answer.user_id,
+                "created_at": datetime.now(timezone.utc).replace(tzinfo=None)
+            })
+
+        if not rows:
+            await db.rollback()
+            continue
+
+        try:
+            created = [
+                AnswerSchema.model_validate(answer)
+                for answer in await db.scalars(insert(Answer).returning(Answer, sort_by_parameter_order=True), rows)
+            ]
+            await record_changes(db, (answer_created(answer.model_dump()) for answer in created))
+            await db.commit()
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.exception("Пачка ответов с элемента %s отклонена БД", indexes[0])
+            reject_chunk(indexes, e, result.errors)
+            continue
+
+        result.created += len(created)
+
+        for question_id in {answer.question_id for answer in created}:
+            await cache.delete(question_key(question_id))
+
+        for answer in created:
+            await broker.publish(AnswerEvent(ANSWER_CREATED, answer.question_id, dump_answer(answer.model_dump()), answer.id))
+
+    result.errors.sort(key=lambda error: error.index)
+
+    logger.info("Массово создано %s ответов, отклонено %s", result.created, len(result.errors))
+
+    return result
+
+async def check_question_accepts_answers(question_id: int, db: AsyncSession, logger: Logger) -> None:
+    """
+    Проверяет, что к вопросу можно добавить ответ: он существует и не удален.
+    """
+    exists = await db.scalar(select(Question.id).where(Question.id == question_id, Question.deleted_at.is_(None)))
+    if exists is None:
+        logger.warning("Попытка создать ответ к несуществующему вопросу id=%s", question_id)
+        raise _question_does_not_exist(question_id)
+
+async def allocate_answer_ids(db: AsyncSession, count: int, after: int = 0) -> list[int]:
+    """
+    Резервирует count id ответов для отложенной записи. В Postgres они берутся из answers_id_seq
+    одним запросом и не пересекаются с id других вставок. В SQLite последовательности нет:
+    id выдаются после max(id) и after, что годится только для одного процесса (тесты, локальный запуск).
+    """
+    if db.bind.dialect.name == "postgresql":
+        result = await db.scalars(
+            text("SELECT nextval('answers_id_seq') FROM generate_series(1, CAST(:count AS integer))"),
+            {"count": count}
+        )
+        return list(result)
+
+    start = max((await db.scalar(select(func.max(Answer.id)))) or 0, after)
+    return list(range(start + 1, start + count + 1))
+
+async def insert_buffered_answers(
+    db: AsyncSession,
+    rows: list[dict],
+    synchronous_commit: bool = True,
+    chunk_size: int = 1000
+) -> list[dict]:
+    """
+    Записывает накопленные ответы многострочными INSERT в одной транзакции и возвращает записанные.
+    Ответы к вопросам, удаленным после подтверждения, отбрасываются; FOR KEY SHARE не дает
+    фоновой очистке удалить строку вопроса до фиксации пакета.
+    """
+    question_ids = {row["question_id"] for row in rows}
+    existing = set((await db.scalars(
+        select(Question.id)
+        .where(Question.id.in_(question_ids), Question.deleted_at.is_(None))
+        .with_for_update(key_share=True)
+    )).all())
+    rows = [row for row in rows if row["question_id"] in existing]
+
+    if not synchronous_commit and db.bind.dialect.name == "postgresql":
+        await db.execute(text("SET LOCAL synchronous_commit TO OFF"))
+
+    for offset in range(0, len(rows), chunk_size):
+        chunk = rows[offset:offset + chunk_size]
+        await db.execute(insert(Answer).values(chunk))
+        await record_changes(db, map(answer_created, chunk))
+
+    await db.commit()
+
+    return rows
+
 async def get_answer_by_id(answer_id: int, db: AsyncSession, logger: Logger) -> AnswerSchema:
     """
-    Получает ответ по его id.
+    Получает ответ по его id. Ответы удаленного вопроса не возвращаются.
+    Границу created_at по одному id вывести нельзя (время ответа и его вопрос известны только
+    из самой строки), поэтому Postgres проверяет все секции answers - по одному поиску
+    в индексе первичного ключа (id, created_at) на секцию.
     """
     result = await db.execute(
-    select(Answer).where(Answer.id == answer_id))
+        select(Answer)
+        .join(Question, Question.id == Answer.question_id)
+        .where(Answer.id == answer_id, Question.deleted_at.is_(None))
+    )
     answer = result.scalar_one_or_none()
 
     if answer is None:
-        logger.warning(f"Попытка получить несуществующий ответ id={answer_id}")
+        logger.warning("Попытка получить несуществующий ответ id=%s", answer_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Answer with id {answer_id} not found."
         )
     
-    logger.info(f"Получен ответ id={answer.id} к вопросу id={answer.question_id} от пользователя {answer.user_id}")
+    logger.info("Получен ответ id=%s к вопросу id=%s от пользователя %s", answer.id, answer.question_id, answer.user_id)
 
     return AnswerSchema.model_validate(answer)
 
-async def delete_answer(answer_id: int, db: AsyncSession, logger: Logger):
+async def delete_answer(answer_id: int, db: AsyncSession, logger: Logger, cache: CacheBackend, broker: AnswerBroker):
     """
-    Удаляет ответ по id.
+    Удаляет ответ по id одним запросом DELETE ... RETURNING.
+    Ответы удаленного вопроса считаются несуществующими, их удаляет фоновая очистка.
+    Как и в get_answer_by_id, секции по одному id не отсекаются: поиск идет по индексу
+    первичного ключа каждой секции.
     """
+    question_is_live = (
+        select(Question.id)
+        .where(Question.id == Answer.question_id, Question.deleted_at.is_(None))
+        .exists()
+    )
     result = await db.execute(
-    select(Answer).where(Answer.id == answer_id))
-    answer = result.scalar_one_or_none()
+        delete(Answer)
+        .where(Answer.id == answer_id, question_is_live)
+        .returning(Answer.id, Answer.question_id, Answer.user_id)
+    )
+    answer = result.one_or_none()
 
     if answer is None:
-        logger.warning(f"Попытка удалить несуществующий ответ id={answer_id}")
+        logger.warning("Попытка удалить несуществующий ответ id=%s", answer_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Answer with id {answer_id} not found."
         )
-    
-    await db.delete(answer)
+
+    await record_changes(db, [answer_deleted(answer.id, answer.question_id)])
     await db.commit()
+    await cache.delete(question_key(answer.question_id))
+    await broker.publish(AnswerEvent(
+        ANSWER_DELETED,
+        answer.question_id,
+        json.dumps({"id": answer.id, "question_id": answer.question_id}).encode(),
+        answer.id
+    ))
 
-    logger.info(f"Удален ответ id={answer.id} к вопросу id={answer.question_id} от пользователя {answer.user_id}")
+    logger.info("Удален ответ id=%s к вопросу id=%s от пользователя %s", answer.id, answer.question_id, answer.user_id)
 
     return {"detail": f"Answer with id {answer_id} deleted successfully."}
+
+async def ensure_answer_partitions(db: AsyncSession, logger: Logger, months_ahead: int) -> int:
+    """
+    Создает недостающие помесячные секции answers до months_ahead месяцев вперед
+    и возвращает их число. Для несекционированной таблицы и SQLite ничего не делает.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return 0
+
+    partitioned = await db.scalar(text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('answers')"))
+    if not partitioned:
+        return 0
+
+    created = await db.scalar(
+        text("SELECT answers_create_partitions(now() AT TIME ZONE 'UTC', :months_ahead)"),
+        {"months_ahead": months_ahead}
+    )
+    await db.commit()
+
+    if created:
+        logger.info("Создано %s секций answers", created)
+
+    return created
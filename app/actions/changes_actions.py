@@ -0,0 +1,125 @@
+from sqlalchemy import insert, literal_column, or_, tuple_
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.engine import Row
+from logging import Logger
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional, Sequence
+from app.metrics import track_serialization
+from app.models import ChangeLog
+from app.pagination import decode_change_cursor, encode_change_cursor
+from app.serialization import answer_data, dump_changes, question_data
+
+QUESTION = "question"
+ANSWER = "answer"
+CREATED = "created"
+DELETED = "deleted"
+
+CHANGE_COLUMNS = (
+    ChangeLog.entity,
+    ChangeLog.action,
+    ChangeLog.entity_id,
+    ChangeLog.question_id,
+    ChangeLog.data,
+    ChangeLog.created_at
+)
+
+# Номер текущей транзакции и граница, ниже которой все транзакции уже завершены
+_CURRENT_TXID = literal_column("pg_current_xact_id()::text::bigint")
+_SNAPSHOT_XMIN = literal_column("pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+def question_created(question: Any) -> dict:
+    return {
+        "entity": QUESTION, "action": CREATED, "entity_id": question.id, "question_id": question.id,
+        "data": question_data({"id": question.id, "text": question.text, "created_at": question.created_at})
+    }
+
+def question_deleted(question_id: int) -> dict:
+    return {"entity": QUESTION, "action": DELETED, "entity_id": question_id, "question_id": question_id, "data": None}
+
+def answer_created(answer: dict) -> dict:
+    return {
+        "entity": ANSWER, "action": CREATED, "entity_id": answer["id"], "question_id": answer["question_id"],
+        "data": answer_data(answer)
+    }
+
+def answer_deleted(answer_id: int, question_id: int) -> dict:
+    return {"entity": ANSWER, "action": DELETED, "entity_id": answer_id, "question_id": question_id, "data": None}
+
+async def record_changes(db: AsyncSession, changes: Iterable[dict]) -> None:
+    """
+    Добавляет записи в журнал изменений в текущей транзакции; фиксирует ее вызывающий.
+    """
+    changes = list(changes)
+    if not changes:
+        return
+
+    txid = _CURRENT_TXID if db.bind.dialect.name == "postgresql" else 0
+    created_at = datetime.now(timezone.utc)
+    await db.execute(insert(ChangeLog).values([
+        {**change, "txid": txid, "created_at": created_at} for change in changes
+    ]))
+
+async def get_changes(db: AsyncSession, logger: Logger, limit: int, after: Optional[str] = None) -> tuple[bytes, str]:
+    """
+    Получает изменения после курсора и курсор для следующего запроса (тот же, если изменений нет).
+
+    id записей выдаются до фиксации, поэтому транзакция с меньшим id может зафиксироваться позже
+    и оказаться позади курсора. В Postgres записи упорядочены по номеру транзакции и отдаются
+    только у транзакций ниже xmin текущего снимка: все они завершены, и новых записей перед
+    курсором уже не появится. Долгая транзакция задерживает ленту до своего завершения.
+    В SQLite записи пишутся по одной транзакции за раз, txid у всех 0, и порядок задает id.
+    """
+    query = select(ChangeLog.txid, ChangeLog.id, *CHANGE_COLUMNS).order_by(ChangeLog.txid, ChangeLog.id)
+
+    if after is not None:
+        txid, change_id = decode_change_cursor(after)
+        query = query.where(tuple_(ChangeLog.txid, ChangeLog.id) > tuple_(txid, change_id))
+
+    if db.bind.dialect.name == "postgresql":
+        query = query.where(ChangeLog.txid < _SNAPSHOT_XMIN)
+
+    changes = (await db.execute(query.limit(limit))).all()
+
+    if changes:
+        next_cursor = encode_change_cursor(changes[-1].txid, changes[-1].id)
+    else:
+        next_cursor = after or encode_change_cursor(0, 0)
+
+    logger.info("Получено %s изменений", len(changes))
+
+    with track_serialization():
+        payload = dump_changes(changes)
+
+    return payload, next_cursor
+
+async def get_answer_changes_since(db: AsyncSession, question_id: int, last_answer_id: int) -> Sequence[Row]:
+    """
+    Создания и удаления ответов вопроса из журнала, зафиксированные после ответа last_answer_id.
+
+    id ответов при отложенной записи выдаются блоками и не совпадают с порядком фиксации,
+    поэтому граница берется из записи журнала об ответе last_answer_id. Запись журнала
+    добавляется прямо перед фиксацией, и ответ, зафиксированный после нее, имеет больший
+    txid или больший id записи. Если ответа в журнале нет, досылаются ответы с большим id.
+    """
+    cursor = (await db.execute(
+        select(ChangeLog.txid, ChangeLog.id).where(
+            ChangeLog.question_id == question_id,
+            ChangeLog.entity == ANSWER,
+            ChangeLog.action == CREATED,
+            ChangeLog.entity_id == last_answer_id
+        )
+    )).one_or_none()
+
+    query = (
+        select(ChangeLog.entity_id, ChangeLog.action, ChangeLog.data)
+        .where(ChangeLog.question_id == question_id, ChangeLog.entity == ANSWER)
+        .order_by(ChangeLog.id)
+    )
+
+    if cursor is not None:
+        query = query.where(or_(ChangeLog.txid > cursor.txid, ChangeLog.id > cursor.id))
+    else:
+        query = query.where(ChangeLog.entity_id > last_answer_id)
+
+    return (await db.execute(query)).all()
@@ -0,0 +1,80 @@
+from sqlalchemy import and_
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from logging import Logger
+from datetime import datetime
+from typing import AsyncIterator, Optional
+from app.actions.questions_actions import ANSWER_CLOCK_SKEW
+from app.conditional import as_utc
+from app.metrics import track_serialization
+from app.models import Answer, Question
+from app.serialization import dump_export_csv, dump_export_ndjson
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+# Порядок колонок совпадает с ExportRowPayload и заголовком CSV
+EXPORT_COLUMNS = (
+    Question.id.label("question_id"),
+    Question.text.label("question_text"),
+    Question.created_at.label("question_created_at"),
+    Answer.id.label("answer_id"),
+    Answer.text.label("answer_text"),
+    Answer.user_id.label("answer_user_id"),
+    Answer.created_at.label("answer_created_at"),
+)
+
+def _export_query(created_from: Optional[datetime], created_to: Optional[datetime]):
+    """
+    Запрос вопросов, созданных в [created_from, created_to), с ответами: строка на ответ,
+    у вопроса без ответов - одна строка с пустыми полями ответа.
+    """
+    join_condition = Answer.question_id == Question.id
+    query = select(*EXPORT_COLUMNS).where(Question.deleted_at.is_(None))
+
+    if created_from is not None:
+        created_from = as_utc(created_from)
+        query = query.where(Question.created_at >= created_from)
+        # Ответ не старше своего вопроса: по этому условию Postgres не читает ранние секции answers
+        join_condition = and_(
+            join_condition,
+            Answer.created_at >= (created_from - ANSWER_CLOCK_SKEW).replace(tzinfo=None)
+        )
+    if created_to is not None:
+        query = query.where(Question.created_at < as_utc(created_to))
+
+    return (
+        query
+        .select_from(Question)
+        .outerjoin(Answer, join_condition)
+        .order_by(Question.created_at, Question.id, Answer.created_at, Answer.id)
+    )
+
+async def export_questions(
+    db: AsyncSession,
+    logger: Logger,
+    export_format: str = "ndjson",
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    chunk_size: int = 1000
+) -> AsyncIterator[bytes]:
+    """
+    Потоково выгружает вопросы с ответами в NDJSON или CSV, читая их серверным курсором
+    пачками по chunk_size строк: память не зависит от объема выгрузки.
+    """
+    result = await db.stream(_export_query(created_from, created_to).execution_options(yield_per=chunk_size))
+
+    count = 0
+    if export_format == "csv":
+        yield dump_export_csv([], header=True)
+
+    async for partition in result.partitions():
+        with track_serialization():
+            if export_format == "csv":
+                chunk = dump_export_csv(partition)
+            else:
+                chunk = dump_export_ndjson(partition)
+
+        yield chunk
+        count += len(partition)
+
+    logger.info("Выгружено %s строк вопросов с ответами", count)
@@ -1,91 +1,676 @@
+import asyncio
+import json
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, insert, tuple_, update
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
 from logging import Logger
-from datetime import datetime, timezone
-from app.models import Question
-from app.schemas import QuestionSchema, QuestionBaseSchema
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Optional
+from app.actions.changes_actions import CREATED, get_answer_changes_since, question_created, question_deleted, record_changes
+from app.cache import CacheBackend, question_key
+from app.conditional import Validators, as_utc, make_etag
+from app.events import ANSWER_CREATED, ANSWER_DELETED, QUESTION_DELETED, RESET, AnswerBroker, AnswerEvent, format_sse
+from app.settings import settings
+from app.metrics import track_serialization
+from app.models import Answer, Question
+from app.pagination import DEFAULT_PAGE_SIZE, decode_cursor, encode_cursor
+from app.serialization import (
+    build_question,
+    dump_answer_data,
+    dump_answers,
+    dump_question,
+    dump_question_summaries,
+    dump_questions
+)
+from app.schemas import (
+    QuestionSchema,
+    QuestionBaseSchema,
+    BulkQuestionsResultSchema,
+    QuestionSearchResultSchema
+)
+from app.search import search
+from app.singleflight import SingleFlight
+from app.bulk import chunked, reject_chunk, validate_items
 
 async def create_question(question_data: QuestionBaseSchema, db: AsyncSession, logger: Logger) -> QuestionSchema:
     """
-    Создает новый вопрос.
+    Создает новый вопрос одним запросом INSERT ... RETURNING.
     """
-    db_question = Question(
-        text=question_data.text,
-        created_at=datetime.now(timezone.utc)
+    result = await db.execute(
+        insert(Question)
+        .values(text=question_data.text, created_at=datetime.now(timezone.utc))
+        .returning(Question.id, Question.text, Question.created_at)
     )
+    db_question = result.one()
+    await record_changes(db, [question_created(db_question)])
 
-    db.add(db_question)
     await db.commit()
-    await db.refresh(db_question, attribute_names=['answers'])
 
     logger.info(
-        f"Создан новый вопрос: id={db_question.id}, "
-        f"text='{db_question.text[:50]}', "
-        f"created_at={db_question.created_at.isoformat()}"
+        "Создан новый вопрос: id=%s, text='%.50s', created_at=%s",
+        db_question.id, db_question.text, db_question.created_at
     )
 
-    return QuestionSchema.model_validate(db_question)
+    return QuestionSchema(id=db_question.id, text=db_question.text, created_at=db_question.created_at)
+
+async def create_questions_bulk(items: AsyncIterator[Any], db: AsyncSession, logger: Logger) -> BulkQuestionsResultSchema:
+    """
+    Создает вопросы пачками многострочным INSERT ... RETURNING. Ошибочные элементы пропускаются,
+    каждая пачка фиксируется отдельно (см. app.bulk).
+    """
+    result = BulkQuestionsResultSchema()
+    index = 0
+
+    async for chunk in chunked(items):
+        valid = validate_items(chunk, QuestionBaseSchema, index, result.errors)
+        index += len(chunk)
+
+        if not valid:
+            continue
+
+        rows = [
+            {"text": question.text, "created_at": datetime.now(timezone.utc)}
+            for _, question in valid
+        ]
+
+        try:
+            created = (await db.scalars(insert(Question).returning(Question, sort_by_parameter_order=True), rows)).all()
+            await record_changes(db, map(question_created, created))
+            await db.commit()
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.exception("Пачка вопросов с элемента %s отклонена БД", valid[0][0])
+            reject_chunk([item_index for item_index, _ in valid], e, result.errors)
+            continue
+
+        result.created += len(created)
+
+    result.errors.sort(key=lambda error: error.index)
+
+    logger.info("Массово создано %s вопросов, отклонено %s", result.created, len(result.errors))
+
+    return result
+
+QUESTION_COLUMNS = (Question.id, Question.text, Question.created_at)
+QUESTION_SUMMARY_COLUMNS = QUESTION_COLUMNS + (Question.answer_count, Question.last_answer_at)
+# Колонки, из которых строятся валидаторы условных запросов без загрузки ответов
+QUESTION_VERSIONED_COLUMNS = QUESTION_SUMMARY_COLUMNS + (Question.updated_at,)
+ANSWER_COLUMNS = (Answer.id, Answer.question_id, Answer.text, Answer.user_id, Answer.created_at)
+
+# Ответ создается после вопроса, но часы воркеров на разных машинах могут расходиться;
+# секции answers помесячные, поэтому запас в сутки почти не мешает их отсечению
+ANSWER_CLOCK_SKEW = timedelta(days=1)
+
+# Одновременные одинаковые чтения делят один запрос к БД и одну сериализацию
+question_flight = SingleFlight("question")
+question_payload_flight = SingleFlight("question_payload")
+questions_page_flight = SingleFlight("questions_page")
+questions_payload_flight = SingleFlight("questions_payload")
+
+def _read_source(db: AsyncSession) -> Optional[str]:
+    """
+    Источник чтения для ключей объединения: строки с реплики не должны достаться запросу
+    с основной БД. Клиент, только что записавший данные, читает без объединения (None).
+    """
+    if db.info.get("read_your_writes"):
+        return None
+    return db.info.get("replica", "primary")
+
+async def _fetch_all(db: AsyncSession, query) -> list[Row]:
+    return (await db.execute(query)).all()
+
+async def _fetch_one_or_none(db: AsyncSession, query) -> Optional[Row]:
+    return (await db.execute(query)).one_or_none()
+
+def _answers_window(questions: list[Row]) -> tuple:
+    """
+    Условие на answers.created_at по времени создания вопросов: ответ не старше своего вопроса
+    (с запасом на расхождение часов). Избыточно для результата, но по нему Postgres не читает
+    секции answers до создания вопросов. Верхняя граница по last_answer_at не ставится:
+    денормализованный счетчик может отставать, и фильтр по нему скрыл бы ответы.
+    """
+    since = min(as_utc(question.created_at) for question in questions).replace(tzinfo=None) - ANSWER_CLOCK_SKEW
+    return (Answer.created_at >= since,)
+
+async def _get_answers_for_questions(questions: list[Row], answers_limit: Optional[int], db: AsyncSession) -> dict[int, list[Row]]:
+    """
+    Получает строки ответов для набора вопросов одним запросом, не более answers_limit на вопрос.
+    """
+    answers: dict[int, list[Row]] = {question.id: [] for question in questions}
+
+    if not questions or answers_limit == 0:
+        return answers
+
+    question_ids = [question.id for question in questions]
+    window = _answers_window(questions)
+    query = select(*ANSWER_COLUMNS).where(Answer.question_id.in_(question_ids), *window)
+
+    if answers_limit is not None:
+        ranked = (
+            select(
+                Answer.id,
+                func.row_number().over(
+                    partition_by=Answer.question_id,
+                    order_by=(Answer.created_at, Answer.id)
+                ).label("rn")
+            )
+            .where(Answer.question_id.in_(question_ids), *window)
+            .subquery()
+        )
+        query = query.join(ranked, ranked.c.id == Answer.id).where(ranked.c.rn <= answers_limit)
+
+    result = await db.execute(query.order_by(Answer.created_at, Answer.id))
+
+    for answer in result:
+        answers[answer.question_id].append(answer)
+
+    return answers
+
+async def _serialize_questions(questions: list[Row], answers_limit: Optional[int], summary: bool, db: AsyncSession) -> bytes:
+    """
+    Сериализует вопросы: краткое представление берет счетчики из строки вопроса,
+    полное догружает ответы одним запросом.
+    """
+    if summary:
+        with track_serialization():
+            return dump_question_summaries(questions)
+
+    answers = await _get_answers_for_questions(questions, answers_limit, db)
+
+    with track_serialization():
+        return dump_questions([build_question(question, answers[question.id]) for question in questions])
+
+def _last_modified(question: Row) -> datetime:
+    """
+    Время последнего изменения вопроса: создание, новый ответ или удаление ответа.
+    """
+    return max(as_utc(value) for value in (question.created_at, question.last_answer_at, question.updated_at) if value)
+
+def _question_version(question: Row) -> str:
+    """
+    Версия вопроса с ответами. Ответы неизменяемы, поэтому достаточно их числа и времени изменения.
+    """
+    return f"{question.id}:{question.answer_count}:{_last_modified(question).isoformat()}"
+
+def _questions_page_query(after: Optional[str]):
+    """
+    Запрос вопросов в порядке (created_at, id), начиная после курсора.
+    """
+    query = (
+        select(*QUESTION_VERSIONED_COLUMNS)
+        .where(Question.deleted_at.is_(None))
+        .order_by(Question.created_at, Question.id)
+    )
+
+    if after is not None:
+        created_at, question_id = decode_cursor(after)
+        query = query.where(tuple_(Question.created_at, Question.id) > tuple_(created_at, question_id))
+
+    return query
+
+async def get_questions_list(
+    db: AsyncSession,
+    logger: Logger,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+    answers_limit: Optional[int] = None,
+    summary: bool = False,
+    not_modified: Optional[Callable[[Validators], bool]] = None
+) -> tuple[Optional[bytes], Optional[str], Validators]:
+    """
+    Получает страницу вопросов в виде сериализованного JSON, курсор следующей страницы и ETag страницы.
+    Если not_modified подтверждает, что у клиента актуальная версия, ответы не загружаются
+    и вместо JSON возвращается None.
+    """
+    source = _read_source(db)
+    questions = await questions_page_flight.do(
+        source and (source, after, limit),
+        lambda: _fetch_all(db, _questions_page_query(after).limit(limit + 1))
+    )
+
+    has_more = len(questions) > limit
+    questions = questions[:limit]
+
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor(questions[-1].created_at, questions[-1].id)
+
+    # Last-Modified у страницы не выставляется: удаление вопроса не сдвигает время вперед
+    validators = Validators(make_etag(
+        "questions", after, limit, answers_limit, summary, next_cursor,
+        *(_question_version(question) for question in questions)
+    ))
+
+    if not_modified is not None and not_modified(validators):
+        logger.info("Страница из %s вопросов не изменилась", len(questions))
+        return None, next_cursor, validators
+
+    # ETag включает все параметры страницы и версии ее вопросов
+    payload = await questions_payload_flight.do(
+        source and (source, validators.etag),
+        lambda: _serialize_questions(questions, answers_limit, summary, db)
+    )
+
+    logger.info("Получено %s вопросов из базы", len(questions))
+
+    return payload, next_cursor, validators
+
+async def stream_questions_list(
+    db: AsyncSession,
+    logger: Logger,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    answers_limit: Optional[int] = None,
+    summary: bool = False,
+    chunk_size: int = 500
+) -> AsyncIterator[bytes]:
+    """
+    Потоково отдает вопросы JSON-массивом, читая их серверным курсором пачками.
+    """
+    query = _questions_page_query(after)
+    if limit is not None:
+        query = query.limit(limit)
+
+    result = await db.stream(query.execution_options(yield_per=chunk_size))
+
+    count = 0
+    yield b"["
+
+    async for partition in result.partitions():
+        # Пачка сериализуется массивом, от которого отрезаются скобки
+        chunk = (await _serialize_questions(partition, answers_limit, summary, db))[1:-1]
+
+        if count:
+            yield b","
+        yield chunk
+        count += len(partition)
+
+    yield b"]"
+
+    logger.info("Потоково отдано %s вопросов из базы", count)
+
+async def search_questions(query: str, db: AsyncSession, logger: Logger, limit: int, offset: int) -> list[QuestionSearchResultSchema]:
+    """
+    Ищет вопросы по тексту вопросов и ответов с ранжированием и подсветкой совпадений.
+    """
+    rows = await search(query, db, limit, offset)
+
+    logger.info("По запросу '%.50s' найдено %s вопросов", query, len(rows))
+
+    return [QuestionSearchResultSchema.model_validate(row) for row in rows]
+
+def _answers_page_query(question: Row, after: Optional[str], order: str):
+    """
+    Запрос ответов на вопрос в порядке (created_at, id) по возрастанию или убыванию, начиная после курсора.
+    Обслуживается индексом answers(question_id, created_at, id) в обе стороны.
+    Сравнение кортежей не отсекает секции, поэтому курсор дублируется условием на created_at.
+    """
+    query = select(*ANSWER_COLUMNS).where(Answer.question_id == question.id, *_answers_window([question]))
+    position = tuple_(Answer.created_at, Answer.id)
+
+    if after is not None:
+        created_at, answer_id = decode_cursor(after)
+        cursor = tuple_(created_at, answer_id)
+        if order == "asc":
+            query = query.where(position > cursor, Answer.created_at >= created_at)
+        else:
+            query = query.where(position < cursor, Answer.created_at <= created_at)
+
+    if order == "asc":
+        return query.order_by(Answer.created_at, Answer.id)
+    return query.order_by(Answer.created_at.desc(), Answer.id.desc())
+
+async def _get_answers_page(question: Row, db: AsyncSession, limit: int, after: Optional[str], order: str) -> tuple[list[Row], Optional[str]]:
+    """
+    Получает страницу ответов на вопрос и курсор следующей страницы.
+    """
+    result = await db.execute(_answers_page_query(question, after, order).limit(limit + 1))
+    answers = result.all()
+
+    next_cursor = None
+    if len(answers) > limit:
+        answers = answers[:limit]
+        if answers:
+            next_cursor = encode_cursor(answers[-1].created_at, answers[-1].id)
+
+    return answers, next_cursor
 
-async def get_questions_list(db: AsyncSession, logger: Logger) -> list[QuestionSchema]:
+def _question_is_live(question_id: int):
     """
-    Получает список всех вопросов.
+    Условие: вопрос существует и не помечен удаленным.
     """
-    result = await db.execute(select(Question).options(selectinload(Question.answers)))
+    return select(Question.id).where(Question.id == question_id, Question.deleted_at.is_(None)).exists()
 
-    questions = result.scalars().all()
+def _question_not_found(question_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Question with id {question_id} not found."
+    )
+
+async def get_answers_by_question_id(
+    question_id: int,
+    db: AsyncSession,
+    logger: Logger,
+    cache: CacheBackend,
+    answers_limit: Optional[int] = None,
+    not_modified: Optional[Callable[[Validators], bool]] = None
+) -> tuple[Optional[bytes], Optional[str], Validators]:
+    """
+    Получает вопрос и ответы на него по его id в виде сериализованного JSON и валидаторы представления.
+    С answers_limit возвращает только первую страницу ответов и курсор продолжения
+    для /questions/{id}/answers. Полный ответ кэшируется вместе с валидаторами до изменения
+    ответов или удаления вопроса. Если not_modified подтверждает, что у клиента актуальная версия,
+    ответы не загружаются и вместо JSON возвращается None.
+    """
+    # Поколение запоминается до чтения из БД: запись, инвалидировавшая кэш после него,
+    # не даст сохранить прочитанную до нее версию
+    generation = await cache.generation(question_key(question_id))
 
-    logger.info(f"Получено {len(questions)} вопросов из базы")
+    if answers_limit is None:
+        cached = await cache.get(question_key(question_id))
+        if cached is not None:
+            validators, payload = cached
+            logger.info("Вопрос id %s получен из кэша", question_id)
+            if not_modified is not None and not_modified(validators):
+                return None, None, validators
+            return payload, None, validators
 
-    if questions is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"No questions found."
+    source = _read_source(db)
+    question = await question_flight.do(
+        source and (source, question_id, generation),
+        lambda: _fetch_one_or_none(
+            db,
+            select(*QUESTION_VERSIONED_COLUMNS).where(Question.id == question_id, Question.deleted_at.is_(None))
         )
+    )
+
+    if question is None:
+        logger.warning("Вопрос с id %s не найден", question_id)
+        raise _question_not_found(question_id)
+
+    validators = Validators(
+        etag=make_etag("question", _question_version(question), answers_limit),
+        last_modified=_last_modified(question)
+    )
+
+    if not_modified is not None and not_modified(validators):
+        logger.info("Вопрос id %s не изменился", question_id)
+        return None, None, validators
+
+    # ETag включает версию вопроса и answers_limit
+    payload, next_cursor = await question_payload_flight.do(
+        source and (source, validators.etag),
+        lambda: _load_question_payload(question, answers_limit, validators, db, logger, cache, generation)
+    )
+
+    return payload, next_cursor, validators
 
-    return [QuestionSchema.model_validate(question) for question in questions]
+async def _load_question_payload(
+    question: Row,
+    answers_limit: Optional[int],
+    validators: Validators,
+    db: AsyncSession,
+    logger: Logger,
+    cache: CacheBackend,
+    generation: int
+) -> tuple[bytes, Optional[str]]:
+    """
+    Загружает ответы на вопрос, сериализует его и кладет полный ответ в кэш,
+    если ключ не инвалидировали после generation.
+    """
+    if answers_limit is None:
+        answers = (await _get_answers_for_questions([question], None, db))[question.id]
+        next_cursor = None
+    else:
+        answers, next_cursor = await _get_answers_page(question, db, answers_limit, None, "asc")
+
+    logger.info("Получен вопрос id %s с %s ответ(ами)", question.id, len(answers))
+
+    with track_serialization():
+        payload = dump_question(build_question(question, answers))
+
+    # Прочитанное с реплики может отставать от инвалидации кэша, поэтому кэш наполняется только из основной БД
+    if answers_limit is None and not db.info.get("replica"):
+        await cache.set(question_key(question.id), (validators, payload), generation)
 
-async def get_answers_by_question_id(question_id: int, db: AsyncSession, logger: Logger) -> QuestionSchema:
+    return payload, next_cursor
+
+async def get_question_answers(
+    question_id: int,
+    db: AsyncSession,
+    logger: Logger,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+    order: str = "asc"
+) -> tuple[bytes, Optional[str]]:
     """
-    Получает вопрос и все ответы на него по его id.
+    Получает страницу ответов на вопрос в виде сериализованного JSON и курсор следующей страницы.
+    Вопрос читается первым: он проверяет существование и дает границу created_at для отсечения секций.
     """
     result = await db.execute(
-        select(Question)
-        .options(selectinload(Question.answers))
-        .where(Question.id == question_id)
+        select(Question.id, Question.created_at)
+        .where(Question.id == question_id, Question.deleted_at.is_(None))
     )
-    question = result.scalar_one_or_none()
+    question = result.one_or_none()
 
     if question is None:
-        logger.warning(f"Вопрос с id {question_id} не найден")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Question with id {question_id} not found."
-        )
-    
-    logger.info(f"Получен вопрос id {question.id} с {len(question.answers)} ответ(ами)")
+        logger.warning("Вопрос с id %s не найден", question_id)
+        raise _question_not_found(question_id)
+
+    answers, next_cursor = await _get_answers_page(question, db, limit, after, order)
+
+    logger.info("Получено %s ответов на вопрос id %s", len(answers), question_id)
+
+    with track_serialization():
+        payload = dump_answers(answers)
 
-    return QuestionSchema.model_validate(question)
+    return payload, next_cursor
 
-async def delete_question(question_id: int, db: AsyncSession, logger: Logger):
+async def open_answer_stream(
+    question_id: int,
+    db: AsyncSession,
+    logger: Logger,
+    broker: AnswerBroker,
+    last_event_id: Optional[int] = None
+) -> AsyncIterator[bytes]:
     """
-    Удаляет вопрос и все ответы на него по id.
+    Проверяет, что вопрос существует, и возвращает поток событий об ответах на него в формате SSE.
+    """
+    question = (await db.execute(
+        select(Question.id, Question.created_at).where(Question.id == question_id, Question.deleted_at.is_(None))
+    )).one_or_none()
+
+    if question is None:
+        logger.warning("Вопрос с id %s не найден", question_id)
+        raise _question_not_found(question_id)
+
+    return _answer_events(question, db, logger, broker, last_event_id)
+
+async def _answer_events(
+    question: Row,
+    db: AsyncSession,
+    logger: Logger,
+    broker: AnswerBroker,
+    last_event_id: Optional[int]
+) -> AsyncIterator[bytes]:
+    """
+    Подписывается на события вопроса, при переподключении досылает из журнала изменений созданные
+    и удаленные ответы, зафиксированные после Last-Event-ID, затем отдает события по мере публикации.
+    У удалений нет id события, поэтому удаление, полученное после последнего нового ответа,
+    после переподключения придет повторно.
+    """
+    question_id = question.id
+    async with broker.subscribe(question_id) as subscription:
+        logger.info("Открыт поток ответов на вопрос id %s", question_id)
+        # Комментарий сразу отправляет заголовки через прокси
+        yield b": connected\n\n"
+
+        # Подписка оформлена до чтения пропущенных, поэтому между ними ничего не теряется;
+        # повторы отсеиваются по событию и id ответа
+        sent = set()
+        if last_event_id is not None:
+            sent.add((ANSWER_CREATED, last_event_id))
+            for change in await get_answer_changes_since(db, question_id, last_event_id):
+                if change.action == CREATED:
+                    event = AnswerEvent(ANSWER_CREATED, question_id, dump_answer_data(change.data), change.entity_id)
+                else:
+                    data = json.dumps({"id": change.entity_id, "question_id": question_id}).encode()
+                    event = AnswerEvent(ANSWER_DELETED, question_id, data, change.entity_id)
+                yield format_sse(event)
+                sent.add((event.event, event.answer_id))
+
+        # Соединение с БД не удерживается на все время подписки
+        await db.close()
+
+        while not subscription.overflowed:
+            try:
+                event = await asyncio.wait_for(subscription.get(), settings.ANSWER_STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+
+            if event.event == RESET:
+                break
+            if (event.event, event.answer_id) in sent:
+                continue
+
+            yield format_sse(event)
+
+            if event.event == QUESTION_DELETED:
+                return
+
+        # Клиент не успевал читать или брокер терял события: он перечитает вопрос и переподключится с Last-Event-ID
+        reason = "переполнен буфер" if subscription.overflowed else "сброс брокера"
+        logger.warning("Поток ответов на вопрос id %s отключен: %s", question_id, reason)
+        yield b"event: reset\ndata: {}\n\n"
+
+async def delete_question(question_id: int, db: AsyncSession, logger: Logger, cache: CacheBackend, broker: AnswerBroker):
+    """
+    Помечает вопрос удаленным одним запросом UPDATE ... RETURNING: вопрос сразу пропадает
+    из чтения, а его ответы и сама строка удаляются в фоне пакетами (см. purge_deleted_questions).
+    """
+    result = await db.execute(
+        update(Question)
+        .where(Question.id == question_id, Question.deleted_at.is_(None))
+        .values(deleted_at=datetime.now(timezone.utc))
+        .returning(Question.id)
+    )
+
+    if result.scalar_one_or_none() is None:
+        logger.warning("Попытка удалить несуществующий вопрос с id %s", question_id)
+        raise _question_not_found(question_id)
+
+    await record_changes(db, [question_deleted(question_id)])
+    await db.commit()
+    await cache.delete(question_key(question_id))
+    await broker.publish(AnswerEvent(QUESTION_DELETED, question_id, json.dumps({"id": question_id}).encode()))
+
+    logger.info("Вопрос с id %s помечен удаленным, ответы будут удалены в фоне", question_id)
+
+    return {"detail": f"Answer with id {question_id} deleted successfully."}
+
+async def get_purge_backlog(db: AsyncSession) -> tuple[int, int, Optional[datetime]]:
+    """
+    Очередь на очистку: число удаленных вопросов, число их ответов и время самого старого удаления.
+    Число ответов берется из счетчиков, поэтому запрос читает только частичный индекс и строки вопросов.
     """
     result = await db.execute(
-    select(Question).where(Question.id == question_id))
-    question = result.scalar_one_or_none()
+        select(func.count(Question.id), func.coalesce(func.sum(Question.answer_count), 0), func.min(Question.deleted_at))
+        .where(Question.deleted_at.is_not(None))
+    )
+    questions, answers, oldest = result.one()
+    return questions, answers, oldest
 
+async def purge_deleted_questions(db: AsyncSession, logger: Logger, batch_size: int) -> int:
+    """
+    Удаляет не более batch_size ответов самого старого удаленного вопроса в отдельной транзакции,
+    а когда ответов не осталось - и саму строку вопроса. Вопрос блокируется с SKIP LOCKED,
+    поэтому несколько процессов очищают разные вопросы. Возвращает число удаленных строк,
+    0 - очищать нечего.
+    """
+    result = await db.execute(
+        select(Question.id, Question.created_at)
+        .where(Question.deleted_at.is_not(None))
+        .order_by(Question.deleted_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    question = result.one_or_none()
     if question is None:
-        logger.warning(f"Попытка удалить несуществующий вопрос с id {question_id}")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Question with id {question_id} not found."
+        return 0
+    question_id = question.id
+
+    # Граница по created_at и во внешнем DELETE, иначе поиск по id идет во всех секциях
+    window = _answers_window([question])
+    batch = (
+        select(Answer.id)
+        .where(Answer.question_id == question_id, *window)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        delete(Answer).where(Answer.id.in_(batch), *window).execution_options(synchronize_session=False)
+    )
+    purged = result.rowcount
+
+    if purged < batch_size:
+        await db.execute(
+            delete(Question).where(Question.id == question_id).execution_options(synchronize_session=False)
         )
-    
-    await db.delete(question)
+        purged += 1
+        logger.info("Удаленный вопрос id %s очищен", question_id)
+
     await db.commit()
 
-    logger.info(f"Вопрос с id {question_id} и все ответы успешно удалены")
+    return purged
+
+async def reconcile_question_counters(db: AsyncSession, logger: Logger, batch_size: int = 10000) -> int:
+    """
+    Пересчитывает answer_count и last_answer_at по таблице ответов пакетами по id вопроса.
+    Обновляет только расходящиеся строки и возвращает их количество.
+
+    Вопросы пакета сначала блокируются FOR UPDATE: пересчет идет по снимку, в котором видны
+    все ответы, уже учтенные триггерами, а вставки, ждущие блокировки, прибавят свои ответы после.
+    Без этого UPDATE мог бы затереть счетчик, увеличенный параллельной вставкой.
+    """
+    max_id = (await db.execute(select(func.max(Question.id)))).scalar() or 0
+    fixed = 0
+
+    for start in range(0, max_id, batch_size):
+        count_query = (
+            select(func.count(Answer.id))
+            .where(Answer.question_id == Question.id)
+            .scalar_subquery()
+        )
+        last_query = (
+            select(func.max(Answer.created_at))
+            .where(Answer.question_id == Question.id)
+            .scalar_subquery()
+        )
+
+        await db.execute(
+            select(Question.id)
+            .where(Question.id > start, Question.id <= start + batch_size)
+            .order_by(Question.id)
+            .with_for_update()
+        )
+        result = await db.execute(
+            update(Question)
+            .where(Question.id > start, Question.id <= start + batch_size)
+            .where(
+                Question.answer_count.is_distinct_from(count_query)
+                | Question.last_answer_at.is_distinct_from(last_query)
+            )
+            .values(answer_count=count_query, last_answer_at=last_query)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+        fixed += result.rowcount
+
+    logger.info("Пересчитаны счетчики ответов: исправлено %s вопросов", fixed)
 
-    return {"detail": f"Answer with id {question_id} deleted successfully."}
\ No newline at end of file
+    return fixed
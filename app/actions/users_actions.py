@@ -0,0 +1,67 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import tuple_
+from sqlalchemy.future import select
+from logging import Logger
+from typing import Optional
+from app.metrics import track_serialization
+from app.models import Answer, Question, UserStats
+from app.pagination import decode_cursor, encode_cursor
+from app.serialization import dump_answers
+
+ANSWER_COLUMNS = (Answer.id, Answer.question_id, Answer.text, Answer.user_id, Answer.created_at)
+
+def _user_answers_page_query(user_id: str, after: Optional[str], order: str):
+    """
+    Запрос ответов пользователя в порядке (created_at, id), начиная после курсора.
+    Обслуживается индексом answers(user_id, created_at, id) в обе стороны;
+    ответы удаленных вопросов отсеиваются соединением по первичному ключу вопроса.
+    """
+    query = (
+        select(*ANSWER_COLUMNS)
+        .join(Question, Question.id == Answer.question_id)
+        .where(Answer.user_id == user_id, Question.deleted_at.is_(None))
+    )
+    position = tuple_(Answer.created_at, Answer.id)
+
+    # Сравнение кортежей не отсекает секции answers, поэтому курсор дублируется условием на created_at
+    if after is not None:
+        created_at, answer_id = decode_cursor(after)
+        cursor = tuple_(created_at, answer_id)
+        if order == "asc":
+            query = query.where(position > cursor, Answer.created_at >= created_at)
+        else:
+            query = query.where(position < cursor, Answer.created_at <= created_at)
+
+    if order == "asc":
+        return query.order_by(Answer.created_at, Answer.id)
+    return query.order_by(Answer.created_at.desc(), Answer.id.desc())
+
+async def get_user_answers(
+    user_id: str,
+    db: AsyncSession,
+    logger: Logger,
+    limit: int,
+    after: Optional[str] = None,
+    order: str = "desc"
+) -> tuple[bytes, Optional[str], int]:
+    """
+    Получает страницу ответов пользователя, курсор следующей страницы и общее число ответов.
+    Число ответов берется из user_stats, которую поддерживают триггеры, а не из count(*);
+    ответы удаленных вопросов перестают учитываться в нем после фоновой очистки.
+    """
+    result = await db.execute(_user_answers_page_query(user_id, after, order).limit(limit + 1))
+    answers = result.all()
+
+    next_cursor = None
+    if len(answers) > limit:
+        answers = answers[:limit]
+        next_cursor = encode_cursor(answers[-1].created_at, answers[-1].id)
+
+    total = await db.scalar(select(UserStats.answer_count).where(UserStats.user_id == user_id))
+
+    logger.info("Получено %s ответ(ов) пользователя %s", len(answers), user_id)
+
+    with track_serialization():
+        payload = dump_answers(answers)
+
+    return payload, next_cursor, total or 0
@@ -0,0 +1,112 @@
+import json
+from typing import Any, AsyncIterator, TypeVar
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel, ValidationError
+from app.schemas import BulkErrorSchema
+
+# Каждая пачка фиксируется своей транзакцией, а в ответе возвращается только число созданных
+# элементов и ошибки, поэтому ни транзакция, ни ответ не растут с размером загрузки.
+# Пачка, отклоненная БД, откатывается целиком, и все ее элементы попадают в ошибки;
+# уже зафиксированные пачки при этом остаются.
+BULK_CHUNK_SIZE = 1000
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+
+T = TypeVar("T")
+S = TypeVar("S", bound=BaseModel)
+
+class InvalidLine:
+    """Строка NDJSON, которую не удалось разобрать"""
+    def __init__(self, error: str):
+        self.error = error
+
+async def iter_bulk_items(request: Request) -> AsyncIterator[Any]:
+    """
+    Перебирает элементы тела запроса: JSON-массив целиком или NDJSON построчно по мере чтения.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+
+    if content_type in NDJSON_MEDIA_TYPES:
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield _parse_line(line)
+        if buffer.strip():
+            yield _parse_line(buffer)
+        return
+
+    try:
+        items = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid JSON payload."
+        )
+
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a JSON array or NDJSON stream."
+        )
+
+    for item in items:
+        yield item
+
+def _parse_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return InvalidLine(f"Invalid JSON: {e}")
+
+async def chunked(items: AsyncIterator[T], size: int = BULK_CHUNK_SIZE) -> AsyncIterator[list[T]]:
+    """
+    Группирует асинхронный поток элементов в пачки фиксированного размера.
+    """
+    chunk = []
+    async for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def validate_items(
+    chunk: list[Any],
+    schema: type[S],
+    start_index: int,
+    errors: list[BulkErrorSchema]
+) -> list[tuple[int, S]]:
+    """
+    Валидирует пачку элементов схемой, складывая ошибки в errors.
+    Возвращает пары (порядковый номер, элемент) для валидных элементов.
+    """
+    valid = []
+
+    for index, item in enumerate(chunk, start=start_index):
+        if isinstance(item, InvalidLine):
+            errors.append(BulkErrorSchema(index=index, detail=item.error))
+            continue
+
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as e:
+            errors.append(BulkErrorSchema(index=index, detail=_format_validation_error(e)))
+
+    return valid
+
+def reject_chunk(indexes: list[int], error: Exception, errors: list[BulkErrorSchema]) -> None:
+    """
+    Добавляет в errors все элементы пачки, которую отклонила БД.
+    """
+    detail = f"Chunk rejected by database: {type(error).__name__}"
+    errors.extend(BulkErrorSchema(index=index, detail=detail) for index in indexes)
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc']) or 'item'}: {err['msg']}"
+        for err in error.errors()
+    )
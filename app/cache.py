@@ -0,0 +1,110 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+from app.settings import settings
+
+@dataclass
+class CacheStats:
+    """Счетчики попаданий, промахов и вытеснений кэша"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+class CacheBackend(ABC):
+    """
+    Интерфейс кэша сериализованных ответов и их валидаторов (ETag, Last-Modified).
+    Методы асинхронные, чтобы его мог реализовать сетевой бэкенд (например, Redis).
+
+    delete увеличивает поколение ключа. Читатель запоминает поколение до чтения из БД
+    и передает его в set: если ключ успели инвалидировать, устаревшее значение не сохраняется.
+    """
+    stats: CacheStats
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def generation(self, key: str) -> int:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, generation: Optional[int] = None) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+class LRUCache(CacheBackend):
+    """
+    Кэш в памяти процесса с вытеснением по LRU и временем жизни записей.
+    Поколения хранятся в фиксированном числе ячеек по хэшу ключа, чтобы память не росла
+    с числом удаленных ключей; совпадение ячеек лишь изредка отменяет запись в кэш.
+    """
+    GENERATION_SLOTS = 4096
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._generations = [0] * self.GENERATION_SLOTS
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+                self.stats.evictions += 1
+            self.stats.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+        return entry[1]
+
+    async def generation(self, key: str) -> int:
+        return self._generations[hash(key) % self.GENERATION_SLOTS]
+
+    async def set(self, key: str, value: Any, generation: Optional[int] = None) -> None:
+        # max_size = 0 отключает кэш
+        if self.max_size <= 0:
+            return
+        if generation is not None and generation != await self.generation(key):
+            return
+
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._generations[hash(key) % self.GENERATION_SLOTS] += 1
+        self._data.pop(key, None)
+
+    async def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+def question_key(question_id: int) -> str:
+    """
+    Ключ кэша для вопроса с ответами.
+    """
+    return f"question:{question_id}"
+
+question_cache: CacheBackend = LRUCache(
+    max_size=settings.QUESTION_CACHE_SIZE,
+    ttl=settings.QUESTION_CACHE_TTL
+)
@@ -0,0 +1,109 @@
+"""
+Служебные команды приложения.
+
+Пример запуска:
+    python -m app.cli reconcile-counters --batch-size 10000
+    python -m app.cli purge-deleted --batch-size 5000
+    python -m app.cli create-partitions --months-ahead 6
+    python -m app.cli export --format csv --gzip --created-from 2026-01-01 --output dump.csv.gz
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from app.compression import gzip_chunks
+from app.deps import AsyncSessionLocal, engine, logger
+from app.partitions import PartitionMaintainer
+from app.purge import QuestionPurger
+from app.logs import setup_logging
+from app.settings import settings
+from app.actions.export_actions import EXPORT_FORMATS, export_questions
+from app.actions.questions_actions import reconcile_question_counters
+
+async def reconcile_counters(args: argparse.Namespace) -> None:
+    """
+    Заполняет или сверяет счетчики ответов у вопросов.
+    """
+    async with AsyncSessionLocal() as db:
+        fixed = await reconcile_question_counters(db=db, logger=logger, batch_size=args.batch_size)
+    print(f"Fixed {fixed} questions")
+
+async def purge_deleted(args: argparse.Namespace) -> None:
+    """
+    Очищает все удаленные вопросы, не дожидаясь фоновой очистки.
+    """
+    purger = QuestionPurger(AsyncSessionLocal, batch_size=args.batch_size, batch_pause=0)
+    purged = await purger.purge()
+    print(f"Purged {purged} rows")
+
+async def create_partitions(args: argparse.Namespace) -> None:
+    """
+    Создает недостающие помесячные секции answers.
+    """
+    maintainer = PartitionMaintainer(AsyncSessionLocal, months_ahead=args.months_ahead)
+    created = await maintainer.ensure()
+    print(f"Created {created} partitions")
+
+async def export(args: argparse.Namespace) -> None:
+    """
+    Выгружает вопросы с ответами в файл или в stdout.
+    """
+    async with AsyncSessionLocal() as db:
+        chunks = export_questions(
+            db=db,
+            logger=logger,
+            export_format=args.format,
+            created_from=args.created_from,
+            created_to=args.created_to,
+            chunk_size=args.chunk_size
+        )
+        if args.gzip:
+            chunks = gzip_chunks(chunks)
+
+        output = open(args.output, "wb") if args.output else sys.stdout.buffer
+        try:
+            async for chunk in chunks:
+                output.write(chunk)
+        finally:
+            if args.output:
+                output.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reconcile = commands.add_parser("reconcile-counters", help="Пересчитать answer_count и last_answer_at")
+    reconcile.add_argument("--batch-size", type=int, default=10000)
+    reconcile.set_defaults(handler=reconcile_counters)
+
+    purge = commands.add_parser("purge-deleted", help="Удалить ответы и строки удаленных вопросов")
+    purge.add_argument("--batch-size", type=int, default=1000)
+    purge.set_defaults(handler=purge_deleted)
+
+    partitions = commands.add_parser("create-partitions", help="Создать секции answers на будущие месяцы")
+    partitions.add_argument("--months-ahead", type=int, default=settings.ANSWERS_PARTITIONS_AHEAD)
+    partitions.set_defaults(handler=create_partitions)
+
+    dump = commands.add_parser("export", help="Выгрузить вопросы с ответами в NDJSON или CSV")
+    dump.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    dump.add_argument("--gzip", action="store_true", help="Сжать вывод в gzip")
+    dump.add_argument("--created-from", type=datetime.fromisoformat, help="Вопросы, созданные не раньше (ISO 8601)")
+    dump.add_argument("--created-to", type=datetime.fromisoformat, help="Вопросы, созданные раньше (ISO 8601)")
+    dump.add_argument("--chunk-size", type=int, default=1000, help="Строк в пачке серверного курсора")
+    dump.add_argument("--output", help="Файл; без него - stdout")
+    dump.set_defaults(handler=export)
+
+    args = parser.parse_args()
+    # Выгрузка в stdout не должна перемешиваться с логами
+    setup_logging(stream=sys.stderr if args.command == "export" and not args.output else sys.stdout)
+
+    async def run():
+        try:
+            await args.handler(args)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import zlib
+from typing import AsyncIterator, Callable, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.representation import parse_quality
+from app.settings import settings
+
+try:
+    import brotli
+except ImportError:  # Кодировки br и zstd необязательны: без пакетов они не предлагаются
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/msgpack", "application/x-ndjson", "text/csv", "text/plain")
+
+class StreamCompressor:
+    """
+    Потоковое сжатие: каждый кусок сбрасывается сразу, чтобы потоковые ответы не задерживались.
+    """
+    def __init__(self, process: Callable[[bytes], bytes], finish: Callable[[], bytes]):
+        self.process = process
+        self.finish = finish
+
+def _gzip_stream() -> StreamCompressor:
+    compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return StreamCompressor(
+        lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush
+    )
+
+def _brotli_stream() -> StreamCompressor:
+    compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return StreamCompressor(lambda chunk: compressor.process(chunk) + compressor.flush(), compressor.finish)
+
+def _zstd_stream() -> StreamCompressor:
+    compressor = zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compressobj()
+    return StreamCompressor(
+        lambda chunk: compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+        compressor.flush
+    )
+
+def _gzip(data: bytes) -> bytes:
+    compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+def _brotli(data: bytes) -> bytes:
+    return brotli.compress(data, quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+def _zstd(data: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compress(data)
+
+# Кодировки в порядке предпочтения сервера при равном q у клиента
+ENCODINGS: dict[str, tuple[Callable[[bytes], bytes], Callable[[], StreamCompressor]]] = {}
+if zstandard is not None:
+    ENCODINGS["zstd"] = (_zstd, _zstd_stream)
+if brotli is not None:
+    ENCODINGS["br"] = (_brotli, _brotli_stream)
+ENCODINGS["gzip"] = (_gzip, _gzip_stream)
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Сжимает поток в файл gzip. Куски не сбрасываются по одному, как в StreamCompressor:
+    для выгрузки в файл важнее степень сжатия, чем задержка.
+    """
+    compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Выбирает кодировку по Accept-Encoding; None - отдавать без сжатия.
+    """
+    qualities = parse_quality(accept_encoding)
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+class CompressionMiddleware:
+    """
+    ASGI-middleware, сжимающее ответы согласованной кодировкой. Тела целиком сжимаются,
+    только если не меньше minimum_size; потоковые ответы сжимаются по кускам.
+    Server-Sent Events и уже сжатые ответы не трогаются.
+    """
+    def __init__(self, app: ASGIApp, minimum_size: int = settings.COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        compress, stream = ENCODINGS[encoding]
+        start: Optional[Message] = None
+        compressor: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                # Заголовки придерживаются до первого куска тела: от него зависит, сжимать ли
+                start = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is not None:
+                chunk = compressor.process(body) if body else b""
+                if not more_body:
+                    chunk += compressor.finish()
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                return
+
+            headers = MutableHeaders(scope=start)
+            content_type = headers.get("content-type", "").split(";")[0].strip()
+
+            if (
+                "content-encoding" in headers
+                or content_type not in COMPRESSIBLE_TYPES
+                or (not more_body and len(body) < self.minimum_size)
+            ):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            headers["Content-Encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body:
+                body = compress(body)
+                headers["Content-Length"] = str(len(body))
+                await send(start)
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            del headers["Content-Length"]
+            compressor = stream()
+            await send(start)
+            await send({"type": "http.response.body", "body": compressor.process(body), "more_body": True})
+
+        await self.app(scope, receive, send_wrapper)
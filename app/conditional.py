@@ -0,0 +1,80 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import NamedTuple, Optional
+from fastapi import Request, Response, status
+from app.settings import settings
+
+class Validators(NamedTuple):
+    """Валидаторы представления для условных запросов"""
+    etag: str
+    last_modified: Optional[datetime] = None
+
+def make_etag(*parts: object) -> str:
+    """
+    Строит слабый ETag из версии данных, не сериализуя само представление.
+    Слабый, потому что тело может отдаваться сжатым с другими байтами.
+    """
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Приводит время к UTC; наивное время в БД хранится в UTC.
+    """
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Слабое сравнение: префикс W/ не учитывается
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+def is_not_modified(request: Request, validators: Validators) -> bool:
+    """
+    Проверяет If-None-Match, а при его отсутствии If-Modified-Since (RFC 9110, 13.2.2).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, validators.etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or validators.last_modified is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+    if since.tzinfo is None:
+        return False
+
+    # Last-Modified передается с точностью до секунды
+    return validators.last_modified.replace(microsecond=0) <= since
+
+def cache_headers(validators: Validators) -> dict[str, str]:
+    """
+    Заголовки валидаторов и Cache-Control для ответа 200 или 304. Представление выбирается
+    по Accept, поэтому кэши должны различать ответы по нему.
+    """
+    max_age = settings.HTTP_CACHE_MAX_AGE
+    headers = {
+        "ETag": validators.etag,
+        "Cache-Control": f"public, max-age={max_age}" if max_age > 0 else "public, no-cache",
+        "Vary": "Accept",
+    }
+    if validators.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(validators.last_modified, usegmt=True)
+    return headers
+
+def not_modified_response(validators: Validators) -> Response:
+    """
+    Ответ 304 без тела с теми же валидаторами.
+    """
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(validators))
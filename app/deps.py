@@ -1,13 +1,111 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 import logging
-from typing import AsyncGenerator
+import time
+from typing import AsyncGenerator, Optional
 from app.settings import settings
+from app.cache import CacheBackend, question_cache
+from app.events import AnswerBroker, answer_broker
+from app.partitions import PartitionMaintainer
+from app.purge import QuestionPurger
+from app.replicas import Replica, ReplicaSet, wrote_recently
+from app.write_behind import AnswerWriteBuffer
+from app.metrics import (
+    DB_POOL_CHECKOUT_SECONDS,
+    DB_POOL_IDLE,
+    DB_POOL_IN_USE,
+    DB_POOL_OVERFLOW,
+    DB_POOL_WAITING,
+    DB_READS,
+    QUESTION_CACHE_EVICTIONS,
+    QUESTION_CACHE_HITS,
+    QUESTION_CACHE_MISSES,
+    record_db_query
+)
 
-engine = create_async_engine(settings.DB_URL, echo=True)
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, замеряющий ожидание соединения и число ожидающих.
+    """
+    def _exhausted(self) -> bool:
+        # Свободных соединений нет, а новое открыть не даст max_overflow: запрос встанет в очередь
+        return self.checkedin() == 0 and -1 < self._max_overflow <= self.overflow()
+
+    def _do_get(self):
+        waiting = self._exhausted()
+        if waiting:
+            DB_POOL_WAITING.inc()
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if waiting:
+                DB_POOL_WAITING.dec()
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+def instrument_engine(sync_engine: Engine) -> None:
+    """
+    Подключает к движку замер времени и числа запросов к БД.
+    """
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        record_db_query(time.perf_counter() - conn.info["query_started"].pop())
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        if exception_context.connection is not None and exception_context.connection.info.get("query_started"):
+            exception_context.connection.info["query_started"].pop()
+
+def make_engine(url: str) -> AsyncEngine:
+    """
+    Создает движок с инструментированным пулом; общие настройки пула для основной БД и реплик.
+    """
+    db_engine = create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=InstrumentedPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    )
+    instrument_engine(db_engine.sync_engine)
+    return db_engine
+
+engine = make_engine(settings.DB_URL)
+
+# Состояние пула считывается только в момент сбора метрик
+DB_POOL_IN_USE.set_function(lambda: engine.pool.checkedout())
+DB_POOL_IDLE.set_function(lambda: engine.pool.checkedin())
+DB_POOL_OVERFLOW.set_function(lambda: max(engine.pool.overflow(), 0))
+QUESTION_CACHE_HITS.set_function(lambda: question_cache.stats.hits)
+QUESTION_CACHE_MISSES.set_function(lambda: question_cache.stats.misses)
+QUESTION_CACHE_EVICTIONS.set_function(lambda: question_cache.stats.evictions)
 
 AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
+question_purger = QuestionPurger(AsyncSessionLocal)
+partition_maintainer = PartitionMaintainer(AsyncSessionLocal)
+answer_buffer = (
+    AnswerWriteBuffer(AsyncSessionLocal, question_cache, answer_broker) if settings.ANSWER_WRITE_BEHIND else None
+)
+
+read_replicas = ReplicaSet([
+    Replica(f"replica-{i}", make_engine(url)) for i, url in enumerate(settings.READ_REPLICA_URLS)
+])
+
+logger = logging.getLogger("app")
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Возвращает сессию БД.
@@ -15,15 +113,49 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         yield session
 
-def get_logger():
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """
-    Логгирование.
+    Возвращает сессию БД для чтения: с реплики, если есть исправная и клиент недавно
+    ничего не записывал, иначе с основной БД.
     """
-    logger = logging.getLogger(__name__)
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s | %(levelname)s | %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
+    recent_writer = wrote_recently(request)
+    replica = None if recent_writer else read_replicas.acquire()
+    if replica is None:
+        DB_READS.inc(target="primary")
+        async with AsyncSessionLocal() as session:
+            if recent_writer:
+                # Такому клиенту нельзя отдать результат чтения, начатого до его записи
+                session.info["read_your_writes"] = True
+            yield session
+        return
+
+    DB_READS.inc(target=replica.name)
+    try:
+        async with replica.session_factory() as session:
+            yield session
+    finally:
+        read_replicas.release(replica)
 
+def get_cache() -> CacheBackend:
+    """
+    Возвращает кэш вопросов.
+    """
+    return question_cache
+
+def get_broker() -> AnswerBroker:
+    """
+    Возвращает брокер событий об ответах.
+    """
+    return answer_broker
+
+def get_answer_buffer() -> Optional[AnswerWriteBuffer]:
+    """
+    Возвращает буфер отложенной записи ответов или None, если режим выключен.
+    """
+    return answer_buffer
+
+def get_logger() -> logging.Logger:
+    """
+    Возвращает логгер приложения. Обработчики настраиваются один раз при старте в app.logs.
+    """
     return logger
@@ -0,0 +1,233 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+from app.metrics import ANSWER_STREAM_EVENTS, ANSWER_STREAM_OVERFLOWS, ANSWER_STREAM_SUBSCRIBERS
+from app.serialization import dump_answer
+from app.settings import settings
+
+logger = logging.getLogger("app.events")
+
+ANSWER_CREATED = "answer_created"
+ANSWER_DELETED = "answer_deleted"
+QUESTION_DELETED = "question_deleted"
+# Подписка отключена, события могли потеряться: клиент перечитывает вопрос и переподключается
+RESET = "reset"
+
+@dataclass(frozen=True)
+class AnswerEvent:
+    """Изменение ответов вопроса; data - готовый JSON для клиента"""
+    event: str
+    question_id: int
+    data: bytes
+    answer_id: Optional[int] = None
+
+class Subscription:
+    """
+    Подписка на события одного вопроса с ограниченным буфером.
+    Медленный подписчик не тормозит публикацию: при переполнении буфера
+    подписка помечается переполненной и отключается, клиент переподключается
+    с Last-Event-ID и догружает пропущенное.
+    """
+    def __init__(self, question_id: int, buffer_size: int):
+        self.question_id = question_id
+        self.overflowed = False
+        self._queue: asyncio.Queue[AnswerEvent] = asyncio.Queue(maxsize=buffer_size)
+
+    def push(self, event: AnswerEvent) -> bool:
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.overflowed = True
+            return False
+
+    async def get(self) -> AnswerEvent:
+        return await self._queue.get()
+
+    def reset(self) -> None:
+        """
+        Будит поток событием reset; если буфер полон, поток отключится как переполненный.
+        """
+        if not self.push(AnswerEvent(RESET, self.question_id, b"{}")):
+            self.overflowed = True
+
+class AnswerBroker:
+    """
+    Рассылка событий подписчикам внутри процесса.
+    """
+    def __init__(self, buffer_size: int = settings.ANSWER_STREAM_BUFFER):
+        self.buffer_size = buffer_size
+        self._subscribers: dict[int, set[Subscription]] = {}
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    @asynccontextmanager
+    async def subscribe(self, question_id: int) -> AsyncIterator[Subscription]:
+        subscription = Subscription(question_id, self.buffer_size)
+        self._subscribers.setdefault(question_id, set()).add(subscription)
+        ANSWER_STREAM_SUBSCRIBERS.inc()
+        try:
+            yield subscription
+        finally:
+            self._unsubscribe(subscription)
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.question_id)
+        if subscribers is None or subscription not in subscribers:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.question_id]
+        ANSWER_STREAM_SUBSCRIBERS.dec()
+
+    def dispatch(self, event: AnswerEvent) -> None:
+        """
+        Раздает событие локальным подписчикам вопроса без ожидания.
+        """
+        ANSWER_STREAM_EVENTS.inc(event=event.event)
+        for subscription in list(self._subscribers.get(event.question_id, ())):
+            if not subscription.push(event):
+                ANSWER_STREAM_OVERFLOWS.inc()
+                self._unsubscribe(subscription)
+
+    def reset_all(self) -> None:
+        """
+        Отключает всех подписчиков событием reset, например после потери событий брокером.
+        """
+        for subscribers in list(self._subscribers.values()):
+            for subscription in list(subscribers):
+                subscription.reset()
+                self._unsubscribe(subscription)
+
+    async def publish(self, event: AnswerEvent) -> None:
+        """
+        Публикует событие после фиксации транзакции.
+        """
+        self.dispatch(event)
+
+class PostgresAnswerBroker(AnswerBroker):
+    """
+    Рассылка событий между воркерами через LISTEN/NOTIFY. Каждый процесс держит одно
+    отдельное от пула соединение: публикует через NOTIFY и раздает полученные
+    уведомления (в том числе свои) локальным подписчикам.
+    """
+    CHANNEL = "answer_events"
+    # NOTIFY ограничивает полезную нагрузку 8000 байт; длинные ответы догружаются по id
+    MAX_PAYLOAD = 7999
+
+    def __init__(self, buffer_size: int = settings.ANSWER_STREAM_BUFFER):
+        super().__init__(buffer_size)
+        self._connection = None
+        self._lock = asyncio.Lock()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        self._connection = await self._connect()
+
+    async def stop(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            await connection.close()
+
+    async def _connect(self):
+        import asyncpg
+
+        connection = await asyncpg.connect(
+            user=settings.POSTGRES_USER,
+            password=settings.POSTGRES_PASSWORD,
+            host=settings.POSTGRES_HOST,
+            port=settings.POSTGRES_PORT,
+            database=settings.POSTGRES_DB
+        )
+        await connection.add_listener(self.CHANNEL, self._on_notification)
+        connection.add_termination_listener(self._on_termination)
+        return connection
+
+    def _on_termination(self, connection) -> None:
+        # Закрытие в stop() уже обнулило соединение, переподключаться не нужно
+        if connection is not self._connection:
+            return
+        logger.error("Соединение LISTEN/NOTIFY потеряно, переподключение")
+        self._spawn(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        while self._connection is not None:
+            await asyncio.sleep(1)
+            try:
+                self._connection = await self._connect()
+            except Exception as exc:
+                logger.warning("Не удалось переподключиться для LISTEN/NOTIFY: %s", exc)
+                continue
+
+            # Уведомления, отправленные без LISTEN, потеряны: подписчики получают reset
+            # и догружают пропущенное по Last-Event-ID
+            logger.warning(
+                "Соединение LISTEN/NOTIFY восстановлено, сброс %s подписок",
+                sum(len(subscribers) for subscribers in self._subscribers.values())
+            )
+            self.reset_all()
+            return
+
+    def _spawn(self, coroutine) -> None:
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def publish(self, event: AnswerEvent) -> None:
+        message = {"event": event.event, "question_id": event.question_id, "answer_id": event.answer_id}
+        payload = json.dumps({**message, "data": event.data.decode()}, ensure_ascii=False)
+        if len(payload.encode()) > self.MAX_PAYLOAD:
+            payload = json.dumps(message)
+
+        # Запись уже зафиксирована, поэтому сбой рассылки не должен превращаться в ошибку запроса
+        try:
+            async with self._lock:
+                await self._connection.execute("SELECT pg_notify($1, $2)", self.CHANNEL, payload)
+        except Exception:
+            logger.exception("Не удалось опубликовать событие %s для вопроса id %s", event.event, event.question_id)
+
+    def _on_notification(self, connection, pid, channel, payload: str) -> None:
+        message = json.loads(payload)
+        if "data" in message:
+            self.dispatch(AnswerEvent(message["event"], message["question_id"], message["data"].encode(), message["answer_id"]))
+            return
+
+        self._spawn(self._dispatch_loaded(message))
+
+    async def _dispatch_loaded(self, message: dict) -> None:
+        async with self._lock:
+            row = await self._connection.fetchrow(
+                "SELECT id, question_id, text, user_id, created_at FROM answers WHERE id = $1",
+                message["answer_id"]
+            )
+
+        if row is None:
+            logger.warning("Ответ id %s из уведомления уже удален", message["answer_id"])
+            return
+
+        self.dispatch(AnswerEvent(message["event"], message["question_id"], dump_answer(dict(row)), message["answer_id"]))
+
+def create_broker() -> AnswerBroker:
+    """
+    Брокер событий по настройке ANSWER_STREAM_BACKEND: memory или postgres.
+    """
+    if settings.ANSWER_STREAM_BACKEND == "postgres":
+        return PostgresAnswerBroker()
+    return AnswerBroker()
+
+def format_sse(event: AnswerEvent) -> bytes:
+    """
+    Кодирует событие в формат Server-Sent Events. id есть только у новых ответов,
+    поэтому Last-Event-ID всегда указывает на последний полученный ответ.
+    """
+    event_id = f"id: {event.answer_id}\n" if event.event == ANSWER_CREATED else ""
+    return f"{event_id}event: {event.event}\ndata: ".encode() + event.data + b"\n\n"
+
+answer_broker: AnswerBroker = create_broker()
@@ -1,10 +1,68 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from app.compression import CompressionMiddleware
+from app.deps import answer_buffer, engine, partition_maintainer, question_purger, read_replicas
+from app.events import answer_broker
+from app.logs import setup_logging
+from app.metrics import render_metrics
+from app.middleware import MetricsMiddleware, ReadYourWritesMiddleware, RequestContextMiddleware
+from app.settings import settings
 from app.routers import (
     questions_router, 
-    answers_router
+    answers_router,
+    users_router,
+    changes_router,
+    export_router
 )
 
-app = FastAPI()
+setup_logging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Запуск и остановка процесса: запускаются фоновая очистка удаленных вопросов,
+    создание секций answers и, если включена, отложенная запись ответов;
+    при остановке (после завершения открытых запросов) принятые ответы записываются в БД,
+    очистка прерывается между пакетами и закрываются соединение брокера событий
+    и пулы соединений с БД и репликами.
+    """
+    await answer_broker.start()
+    await read_replicas.start()
+    await question_purger.start()
+    await partition_maintainer.start()
+    if answer_buffer is not None:
+        await answer_buffer.start()
+    yield
+    # Буфер ответов сбрасывается до остановки брокера, чтобы события о них были отправлены
+    if answer_buffer is not None:
+        await answer_buffer.stop()
+    await partition_maintainer.stop()
+    await question_purger.stop()
+    await read_replicas.stop()
+    await answer_broker.stop()
+    await engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
+
+# Сжатие добавляется первым (ближе всех к приложению), чтобы его время попадало в метрики запроса
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
+# Cookie последней записи нужна только при чтении с реплик
+if settings.READ_REPLICA_URLS:
+    app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(RequestContextMiddleware)
 
 app.include_router(questions_router.router, prefix="/api")
 app.include_router(answers_router.router, prefix="/api")
+app.include_router(users_router.router, prefix="/api")
+app.include_router(changes_router.router, prefix="/api")
+app.include_router(export_router.router, prefix="/api")
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics_endpoint():
+    """
+    Эндпоинт метрик в текстовом формате Prometheus. Значения относятся к воркеру,
+    который обработал запрос (см. app.server).
+    """
+    return render_metrics()
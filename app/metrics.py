@@ -0,0 +1,286 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class Metric(ABC):
+    """
+    Базовая метрика в стиле Prometheus: значения хранятся по кортежу значений меток.
+    """
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _format_labels(self, key: tuple[str, ...], extra: Optional[dict[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, key)) + list((extra or {}).items())
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    @abstractmethod
+    def samples(self) -> list[str]:
+        ...
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(Metric):
+    """
+    Монотонно растущий счетчик. Если передана функция, значение вычисляется только в момент сбора метрик.
+    """
+    type_name = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        function: Optional[Callable[[], float]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._function = function
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def inc(self, value: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def value(self, **labels: str) -> float:
+        if self._function is not None:
+            return self._function()
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> list[str]:
+        if self._function is not None:
+            return [f"{self.name} {self._function()}"]
+        return [f"{self.name}{self._format_labels(key)} {value}" for key, value in self._values.items()]
+
+class Gauge(Metric):
+    """
+    Текущее значение. Если передана функция, значение вычисляется только в момент сбора метрик.
+    """
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        function: Optional[Callable[[], float]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._function = function
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, value: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def dec(self, value: float = 1, **labels: str) -> None:
+        self.inc(-value, **labels)
+
+    def value(self, **labels: str) -> float:
+        if self._function is not None:
+            return self._function()
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> list[str]:
+        if self._function is not None:
+            return [f"{self.name} {self._function()}"]
+        return [f"{self.name}{self._format_labels(key)} {value}" for key, value in self._values.items()]
+
+class Histogram(Metric):
+    """Распределение наблюдений по корзинам"""
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> list[str]:
+        lines = []
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else str(bound)
+                lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': le})} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {total[0]}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+REGISTRY: list[Metric] = []
+
+def render_metrics() -> str:
+    """
+    Возвращает все метрики в текстовом формате Prometheus.
+    """
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+# Пул соединений с БД
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a connection from the pool"
+)
+DB_POOL_WAITING = Gauge("db_pool_waiting", "Requests currently waiting for a pool connection")
+DB_POOL_IN_USE = Gauge("db_pool_connections_in_use", "Connections checked out from the pool")
+DB_POOL_IDLE = Gauge("db_pool_connections_idle", "Idle connections kept in the pool")
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections opened above pool_size")
+DB_REPLICA_HEALTHY = Gauge("db_replica_healthy", "Whether a read replica is in rotation", ("replica",))
+DB_REPLICA_LAG_SECONDS = Gauge("db_replica_lag_seconds", "Replication lag of a read replica", ("replica",))
+DB_READS = Counter("db_reads_total", "Read sessions by target database", ("target",))
+
+# Объединение одинаковых чтений
+SINGLE_FLIGHT_REQUESTS = Counter(
+    "single_flight_requests_total",
+    "Reads that ran the query (leader) or waited for an identical in-flight one (follower)",
+    ("flight", "role")
+)
+SINGLE_FLIGHT_IN_FLIGHT = Gauge("single_flight_in_flight", "Shared reads currently in flight", ("flight",))
+
+# Кэш вопросов
+QUESTION_CACHE_HITS = Counter("question_cache_hits_total", "Question cache lookups served from the cache")
+QUESTION_CACHE_MISSES = Counter("question_cache_misses_total", "Question cache lookups that went to the database")
+QUESTION_CACHE_EVICTIONS = Counter("question_cache_evictions_total", "Question cache entries evicted by size or TTL")
+
+# HTTP-запросы
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency",
+    ("method", "route", "status")
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being processed")
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database queries executed per HTTP request",
+    ("method", "route"),
+    buckets=COUNT_BUCKETS
+)
+HTTP_REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent in database queries per HTTP request",
+    ("method", "route")
+)
+HTTP_REQUEST_SERIALIZATION_SECONDS = Histogram(
+    "http_request_serialization_seconds",
+    "Time spent serializing the response per HTTP request",
+    ("method", "route")
+)
+DB_QUERY_SECONDS = Histogram("db_query_seconds", "Database query execution time")
+
+# Поток ответов
+ANSWER_STREAM_SUBSCRIBERS = Gauge("answer_stream_subscribers", "Open answer stream subscriptions")
+ANSWER_STREAM_EVENTS = Counter("answer_stream_events_total", "Answer events dispatched to subscribers", ("event",))
+ANSWER_STREAM_OVERFLOWS = Counter(
+    "answer_stream_overflows_total",
+    "Subscriptions dropped because their buffer was full"
+)
+
+# Фоновая очистка удаленных вопросов
+PURGE_BACKLOG_QUESTIONS = Gauge("purge_backlog_questions", "Deleted questions waiting to be purged")
+PURGE_BACKLOG_ANSWERS = Gauge("purge_backlog_answers", "Answers of deleted questions waiting to be purged")
+PURGE_OLDEST_SECONDS = Gauge("purge_backlog_oldest_seconds", "Age of the oldest deleted question waiting to be purged")
+PURGE_ROWS = Counter("purge_rows_deleted_total", "Rows removed by the purge worker")
+PURGE_BATCH_SECONDS = Histogram("purge_batch_seconds", "Duration of one purge batch")
+
+# Отложенная запись ответов
+ANSWER_BUFFER_PENDING = Gauge("answer_buffer_pending", "Answers accepted but not yet written")
+ANSWER_BUFFER_FLUSH_ROWS = Histogram(
+    "answer_buffer_flush_rows",
+    "Answers written per flush",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000)
+)
+ANSWER_BUFFER_FLUSH_SECONDS = Histogram("answer_buffer_flush_seconds", "Duration of one answer buffer flush")
+ANSWER_BUFFER_DROPPED = Counter(
+    "answer_buffer_dropped_total",
+    "Buffered answers dropped at flush: question deleted, row rejected by the database or retries exhausted",
+    ("reason",)
+)
+
+# Секции answers
+ANSWER_PARTITIONS_CREATED = Counter("answer_partitions_created_total", "Monthly answers partitions created")
+
+@dataclass
+class RequestStats:
+    """Накопленные за время HTTP-запроса затраты на БД и сериализацию"""
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    serialization_seconds: float = 0.0
+
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+def record_db_query(seconds: float) -> None:
+    """
+    Учитывает выполненный запрос к БД в общей метрике и в статистике текущего HTTP-запроса.
+    """
+    DB_QUERY_SECONDS.observe(seconds)
+
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_seconds += seconds
+
+@contextmanager
+def track_serialization() -> Iterator[None]:
+    """
+    Замеряет время сериализации ответа в рамках текущего HTTP-запроса.
+    """
+    stats = current_request_stats.get()
+    if stats is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serialization_seconds += time.perf_counter() - started
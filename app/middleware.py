@@ -0,0 +1,136 @@
+import logging
+import math
+import time
+import uuid
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.logs import request_id_var
+from app.replicas import LAST_WRITE_COOKIE
+from app.settings import settings
+from app.metrics import (
+    HTTP_REQUEST_DB_QUERIES,
+    HTTP_REQUEST_DB_SECONDS,
+    HTTP_REQUEST_SECONDS,
+    HTTP_REQUEST_SERIALIZATION_SECONDS,
+    HTTP_REQUESTS_IN_FLIGHT,
+    RequestStats,
+    current_request_stats
+)
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware, замеряющее время запроса (включая потоковую отдачу тела),
+    число и время запросов к БД и время сериализации по шаблону маршрута.
+    """
+    def __init__(self, app: ASGIApp, exclude_paths: tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            current_request_stats.reset(token)
+
+            # Шаблон пути вместо фактического, чтобы число серий не зависело от id
+            route = scope.get("route")
+            method = scope["method"]
+            route_path = route.path if route is not None else "unmatched"
+
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=method, route=route_path, status=status_code)
+            HTTP_REQUEST_DB_QUERIES.observe(stats.db_queries, method=method, route=route_path)
+            HTTP_REQUEST_DB_SECONDS.observe(stats.db_seconds, method=method, route=route_path)
+            HTTP_REQUEST_SERIALIZATION_SECONDS.observe(stats.serialization_seconds, method=method, route=route_path)
+
+access_logger = logging.getLogger("app.access")
+
+class RequestContextMiddleware:
+    """
+    ASGI-middleware, присваивающее запросу id (из заголовка X-Request-ID или новый),
+    возвращающее его в ответе и пишущее строку access-лога с длительностью запроса.
+    """
+    def __init__(self, app: ASGIApp, header_name: str = "x-request-id"):
+        self.app = app
+        self.header_name = header_name
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name.decode("latin-1") == self.header_name:
+                request_id = value.decode("latin-1")
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        token = request_id_var.set(request_id)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)[self.header_name] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            access_logger.info(
+                "%s %s %s",
+                scope["method"], scope["path"], status_code,
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3)
+                }
+            )
+            request_id_var.reset(token)
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI-middleware, отмечающее в cookie время успешной записи клиента, чтобы его
+    последующие чтения в течение окна шли в основную БД, а не в отстающую реплику.
+    """
+    write_methods = ("POST", "PUT", "PATCH", "DELETE")
+
+    def __init__(self, app: ASGIApp, window: float = settings.DB_READ_YOUR_WRITES_WINDOW):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in self.write_methods:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{LAST_WRITE_COOKIE}={time.time():.3f}; Max-Age={math.ceil(self.window)}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,3 +1,4 @@
+import re
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
@@ -14,10 +15,23 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-config.set_main_option("sqlalchemy.url", settings.DB_URL + "?async_fallback=True")
+# Другую БД (например, для бенчмарков) можно указать через alembic -x db_url=...
+db_url = context.get_x_argument(as_dictionary=True).get("db_url", settings.DB_URL)
+config.set_main_option("sqlalchemy.url", db_url + "?async_fallback=True")
 
 target_metadata = Base.metadata
 
+# Колонки и индексы полнотекстового поиска есть только в Postgres и не описаны в моделях
+SEARCH_OBJECTS = {"search_vector", "ix_questions_search_vector", "ix_answers_search_vector"}
+
+# Помесячные секции answers создаются функцией answers_create_partitions, а не моделями
+ANSWER_PARTITION = re.compile(r"answers_(default|\d{4}_\d{2})")
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table" and ANSWER_PARTITION.fullmatch(name):
+        return False
+    return name not in SEARCH_OBJECTS
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -36,6 +50,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -57,7 +72,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,40 @@
+"""Add indexes for hot questions/answers queries
+
+Revision ID: 5d1c8a2f7e34
+Revises: 43eca5f0b60c
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d1c8a2f7e34'
+down_revision: Union[str, Sequence[str], None] = '43eca5f0b60c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не блокирует запись в таблицы, но не может выполняться в транзакции
+    with op.get_context().autocommit_block():
+        op.create_index('ix_answers_question_id_created_at_id', 'answers', ['question_id', 'created_at', 'id'],
+                        unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_answers_user_id_created_at', 'answers', ['user_id', 'created_at'],
+                        unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_questions_created_at_id', 'questions', ['created_at', 'id'],
+                        unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_questions_created_at_id', table_name='questions',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_answers_user_id_created_at', table_name='answers',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_answers_question_id_created_at_id', table_name='answers',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,84 @@
+"""Add full-text search vectors for questions and answers
+
+Revision ID: 7a3e91c4d2b8
+Revises: 5d1c8a2f7e34
+Create Date: 2026-10-17 14:03:27.561920
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3e91c4d2b8'
+down_revision: Union[str, Sequence[str], None] = '5d1c8a2f7e34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Должна совпадать с app.search.SEARCH_CONFIG
+SEARCH_CONFIG = 'russian'
+TABLES = ('questions', 'answers')
+BACKFILL_BATCH_SIZE = 10000
+
+
+def _backfill_batches(table: str) -> list[str]:
+    """Условия пакетов по id; в offline-режиме (--sql) размер таблицы неизвестен - один пакет."""
+    if context.is_offline_mode():
+        return ['true']
+    max_id = op.get_bind().scalar(sa.text(f"SELECT coalesce(max(id), 0) FROM {table}"))
+    return [
+        f"id > {start} AND id <= {start + BACKFILL_BATCH_SIZE}"
+        for start in range(0, max_id, BACKFILL_BATCH_SIZE)
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Генерируемая STORED-колонка переписала бы таблицы под ACCESS EXCLUSIVE, поэтому колонка
+    # обычная и nullable (добавляется без перезаписи), новые строки заполняет триггер,
+    # а существующие - пакеты в отдельных транзакциях
+    op.execute(f"""
+        CREATE FUNCTION search_vector_update() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.search_vector := to_tsvector('{SEARCH_CONFIG}', NEW.text);
+            RETURN NEW;
+        END
+        $$
+    """)
+    for table in TABLES:
+        op.add_column(table, sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+        op.execute(f"""
+            CREATE TRIGGER {table}_search_vector BEFORE INSERT OR UPDATE OF text ON {table}
+            FOR EACH ROW EXECUTE FUNCTION search_vector_update()
+        """)
+
+    # CONCURRENTLY не блокирует запись в таблицы, но не может выполняться в транзакции
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            for condition in _backfill_batches(table):
+                op.execute(f"""
+                    UPDATE {table} SET search_vector = to_tsvector('{SEARCH_CONFIG}', text)
+                    WHERE {condition} AND search_vector IS NULL
+                """)
+
+        op.create_index('ix_questions_search_vector', 'questions', ['search_vector'],
+                        postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_answers_search_vector', 'answers', ['search_vector'],
+                        postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_answers_search_vector', table_name='answers',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_questions_search_vector', table_name='questions',
+                      postgresql_concurrently=True, if_exists=True)
+
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_search_vector ON {table}")
+        op.drop_column(table, 'search_vector')
+    op.execute("DROP FUNCTION IF EXISTS search_vector_update()")
@@ -0,0 +1,113 @@
+"""Add answer_count and last_answer_at to questions
+
+Revision ID: 9c4f2e6b1a07
+Revises: 7a3e91c4d2b8
+Create Date: 2026-10-17 16:41:08.220371
+
+Счетчики существующих вопросов заполняются в миграции пакетами по id вопроса уже при
+работающих триггерах, каждый пакет в своей транзакции, так что запись в answers не
+останавливается; расхождения после сбоев исправляет python -m app.cli reconcile-counters.
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4f2e6b1a07'
+down_revision: Union[str, Sequence[str], None] = '7a3e91c4d2b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def _backfill_batches() -> list[str]:
+    """Условия пакетов по id вопроса; в offline-режиме (--sql) размер таблицы неизвестен - один пакет."""
+    if context.is_offline_mode():
+        return ['true']
+    max_id = op.get_bind().scalar(sa.text("SELECT coalesce(max(id), 0) FROM questions"))
+    return [
+        f"q.id > {start} AND q.id <= {start + BACKFILL_BATCH_SIZE}"
+        for start in range(0, max_id, BACKFILL_BATCH_SIZE)
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('questions', sa.Column('answer_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('questions', sa.Column('last_answer_at', sa.DateTime(), nullable=True))
+
+    # Триггеры уровня оператора: пакетная вставка или каскадное удаление
+    # обновляют каждый затронутый вопрос один раз, а не на каждую строку
+    op.execute("""
+        CREATE FUNCTION answers_counters_insert() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE questions q
+            SET answer_count = q.answer_count + n.cnt,
+                last_answer_at = GREATEST(q.last_answer_at, n.last_at)
+            FROM (
+                SELECT question_id, count(*) AS cnt, max(created_at) AS last_at
+                FROM new_rows GROUP BY question_id
+            ) n
+            WHERE q.id = n.question_id;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE FUNCTION answers_counters_delete() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE questions q
+            SET answer_count = q.answer_count - o.cnt,
+                last_answer_at = (SELECT max(a.created_at) FROM answers a WHERE a.question_id = q.id)
+            FROM (
+                SELECT question_id, count(*) AS cnt
+                FROM old_rows GROUP BY question_id
+            ) o
+            WHERE q.id = o.question_id;
+            RETURN NULL;
+        END
+        $$
+    """)
+
+    op.execute("""
+        CREATE TRIGGER answers_counters_insert AFTER INSERT ON answers
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION answers_counters_insert()
+    """)
+    op.execute("""
+        CREATE TRIGGER answers_counters_delete AFTER DELETE ON answers
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION answers_counters_delete()
+    """)
+
+    # Заполнение после создания триггеров, пакетами в отдельных транзакциях: answers не блокируется.
+    # Вопросы пакета сначала блокируются FOR UPDATE, как в reconcile_question_counters: следующий
+    # оператор блока получает новый снимок и видит все ответы, уже учтенные триггерами,
+    # а вставки и удаления, ждущие блокировки, поправят записанные значения после нас
+    with op.get_context().autocommit_block():
+        for condition in _backfill_batches():
+            op.execute(f"""
+                DO $$
+                BEGIN
+                    PERFORM 1 FROM questions q WHERE {condition} ORDER BY q.id FOR UPDATE;
+                    UPDATE questions q
+                    SET answer_count = (SELECT count(*) FROM answers a WHERE a.question_id = q.id),
+                        last_answer_at = (SELECT max(a.created_at) FROM answers a WHERE a.question_id = q.id)
+                    WHERE {condition};
+                END
+                $$
+            """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS answers_counters_delete ON answers")
+    op.execute("DROP TRIGGER IF EXISTS answers_counters_insert ON answers")
+    op.execute("DROP FUNCTION IF EXISTS answers_counters_delete()")
+    op.execute("DROP FUNCTION IF EXISTS answers_counters_insert()")
+    op.drop_column('questions', 'last_answer_at')
+    op.drop_column('questions', 'answer_count')
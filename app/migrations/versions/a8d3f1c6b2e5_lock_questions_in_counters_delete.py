@@ -0,0 +1,54 @@
+"""Lock question rows before recomputing last_answer_at on answer delete
+
+Revision ID: a8d3f1c6b2e5
+Revises: f5b8d2c7e9a3
+Create Date: 2026-10-18 10:12:44.381906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d3f1c6b2e5'
+down_revision: Union[str, Sequence[str], None] = 'f5b8d2c7e9a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _counters_delete_function(lock: str) -> str:
+    return f"""
+        CREATE OR REPLACE FUNCTION answers_counters_delete() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN{lock}
+            UPDATE questions q
+            SET answer_count = q.answer_count - o.cnt,
+                last_answer_at = (SELECT max(a.created_at) FROM answers a WHERE a.question_id = q.id),
+                updated_at = now() AT TIME ZONE 'UTC'
+            FROM (
+                SELECT question_id, count(*) AS cnt
+                FROM old_rows GROUP BY question_id
+            ) o
+            WHERE q.id = o.question_id;
+            RETURN NULL;
+        END
+        $$
+    """
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Без блокировки UPDATE, дождавшись параллельной вставки ответа, перепроверяет строку вопроса,
+    # но max(created_at) остается посчитанным по старому снимку и затирает новый last_answer_at.
+    # После FOR UPDATE следующий оператор функции получает новый снимок и видит все
+    # зафиксированные ответы, а незафиксированные вставки сами обновят вопрос после нас
+    op.execute(_counters_delete_function("""
+            PERFORM 1 FROM questions
+            WHERE id IN (SELECT question_id FROM old_rows)
+            ORDER BY id
+            FOR UPDATE;"""))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(_counters_delete_function(""))
@@ -0,0 +1,90 @@
+"""Add user_stats with per-user answer counter and user feed index
+
+Revision ID: b2d7e0f13c56
+Revises: 9c4f2e6b1a07
+Create Date: 2026-10-17 18:22:51.904713
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d7e0f13c56'
+down_revision: Union[str, Sequence[str], None] = '9c4f2e6b1a07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # id в индексе нужен для keyset-пагинации ленты ответов пользователя по (created_at, id)
+    with op.get_context().autocommit_block():
+        op.create_index('ix_answers_user_id_created_at_id', 'answers', ['user_id', 'created_at', 'id'],
+                        unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_answers_user_id_created_at', table_name='answers',
+                      postgresql_concurrently=True, if_exists=True)
+
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('answer_count', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    op.execute("""
+        CREATE FUNCTION answers_user_stats_insert() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO user_stats (user_id, answer_count)
+            SELECT user_id, count(*) FROM new_rows GROUP BY user_id ORDER BY user_id
+            ON CONFLICT (user_id) DO UPDATE SET answer_count = user_stats.answer_count + EXCLUDED.answer_count;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE FUNCTION answers_user_stats_delete() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE user_stats s
+            SET answer_count = s.answer_count - o.cnt
+            FROM (SELECT user_id, count(*) AS cnt FROM old_rows GROUP BY user_id) o
+            WHERE s.user_id = o.user_id;
+            RETURN NULL;
+        END
+        $$
+    """)
+
+    # Заполнение до создания триггеров; миграция выполняется в одной транзакции,
+    # а блокировка answers не дает потерять вставки между заполнением и триггерами
+    op.execute("LOCK TABLE answers IN SHARE ROW EXCLUSIVE MODE")
+    op.execute("""
+        INSERT INTO user_stats (user_id, answer_count)
+        SELECT user_id, count(*) FROM answers GROUP BY user_id
+    """)
+
+    op.execute("""
+        CREATE TRIGGER answers_user_stats_insert AFTER INSERT ON answers
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION answers_user_stats_insert()
+    """)
+    op.execute("""
+        CREATE TRIGGER answers_user_stats_delete AFTER DELETE ON answers
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION answers_user_stats_delete()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS answers_user_stats_delete ON answers")
+    op.execute("DROP TRIGGER IF EXISTS answers_user_stats_insert ON answers")
+    op.execute("DROP FUNCTION IF EXISTS answers_user_stats_delete()")
+    op.execute("DROP FUNCTION IF EXISTS answers_user_stats_insert()")
+    op.drop_table('user_stats')
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_answers_user_id_created_at', 'answers', ['user_id', 'created_at'],
+                        unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_answers_user_id_created_at_id', table_name='answers',
+                      postgresql_concurrently=True, if_exists=True)
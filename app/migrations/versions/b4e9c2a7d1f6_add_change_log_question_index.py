@@ -0,0 +1,32 @@
+"""Add change_log index for answer stream replay
+
+Revision ID: b4e9c2a7d1f6
+Revises: a8d3f1c6b2e5
+Create Date: 2026-10-18 11:03:27.154092
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e9c2a7d1f6'
+down_revision: Union[str, Sequence[str], None] = 'a8d3f1c6b2e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не блокирует запись в журнал, но не может выполняться в транзакции
+    with op.get_context().autocommit_block():
+        op.create_index('ix_change_log_question_id_id', 'change_log', ['question_id', 'id'],
+                        unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_change_log_question_id_id', table_name='change_log',
+                      postgresql_concurrently=True, if_exists=True)
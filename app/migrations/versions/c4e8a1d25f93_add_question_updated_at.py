@@ -0,0 +1,68 @@
+"""Add updated_at to questions for conditional requests
+
+Revision ID: c4e8a1d25f93
+Revises: b2d7e0f13c56
+Create Date: 2026-10-17 19:05:37.614820
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a1d25f93'
+down_revision: Union[str, Sequence[str], None] = 'b2d7e0f13c56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _counters_functions(updated_at: str) -> list[str]:
+    return [f"""
+        CREATE OR REPLACE FUNCTION answers_counters_insert() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE questions q
+            SET answer_count = q.answer_count + n.cnt,
+                last_answer_at = GREATEST(q.last_answer_at, n.last_at){updated_at}
+            FROM (
+                SELECT question_id, count(*) AS cnt, max(created_at) AS last_at
+                FROM new_rows GROUP BY question_id
+            ) n
+            WHERE q.id = n.question_id;
+            RETURN NULL;
+        END
+        $$
+    """, f"""
+        CREATE OR REPLACE FUNCTION answers_counters_delete() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE questions q
+            SET answer_count = q.answer_count - o.cnt,
+                last_answer_at = (SELECT max(a.created_at) FROM answers a WHERE a.question_id = q.id){updated_at}
+            FROM (
+                SELECT question_id, count(*) AS cnt
+                FROM old_rows GROUP BY question_id
+            ) o
+            WHERE q.id = o.question_id;
+            RETURN NULL;
+        END
+        $$
+    """]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Колонка без значения по умолчанию не переписывает таблицу; для старых вопросов
+    # Last-Modified вычисляется из created_at и last_answer_at
+    op.add_column('questions', sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    for statement in _counters_functions(",\n                updated_at = now() AT TIME ZONE 'UTC'"):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for statement in _counters_functions(""):
+        op.execute(statement)
+
+    op.drop_column('questions', 'updated_at')
@@ -0,0 +1,37 @@
+"""Add deleted_at tombstone to questions
+
+Revision ID: d7a2c9e4f016
+Revises: c4e8a1d25f93
+Create Date: 2026-10-17 20:41:12.305518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a2c9e4f016'
+down_revision: Union[str, Sequence[str], None] = 'c4e8a1d25f93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('questions', sa.Column('deleted_at', sa.TIMESTAMP(timezone=True), nullable=True))
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_questions_deleted_at', 'questions', ['deleted_at'], unique=False,
+                        postgresql_where=sa.text('deleted_at IS NOT NULL'),
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_questions_deleted_at', table_name='questions',
+                      postgresql_concurrently=True, if_exists=True)
+
+    op.drop_column('questions', 'deleted_at')
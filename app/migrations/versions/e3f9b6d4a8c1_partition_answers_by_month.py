@@ -0,0 +1,177 @@
+"""Partition answers by created_at month
+
+Revision ID: e3f9b6d4a8c1
+Revises: d7a2c9e4f016
+Create Date: 2026-10-17 22:14:51.902443
+
+Таблица answers пересоздается секционированной по месяцам created_at и заполняется
+из старой в той же транзакции, поэтому миграция на большой таблице выполняется долго
+и держит answers заблокированной. На непустой answers она выполняется только
+с MIGRATIONS_ALLOW_OFFLINE=true при остановленном приложении (см. readme), иначе
+alembic upgrade при старте контейнера останавливается на ней с ошибкой.
+Секции на будущие месяцы создает функция answers_create_partitions, ее периодически
+вызывает приложение (app.partitions) или python -m app.cli create-partitions.
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from app.settings import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f9b6d4a8c1'
+down_revision: Union[str, Sequence[str], None] = 'd7a2c9e4f016'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Должна совпадать с app.search.SEARCH_CONFIG
+SEARCH_CONFIG = 'russian'
+# Секции, создаваемые заранее; дальше их поддерживает приложение
+MONTHS_AHEAD = 3
+
+ANSWER_COLUMNS = 'id, question_id, user_id, text, created_at'
+INDEXES = ('ix_answers_question_id_created_at_id', 'ix_answers_user_id_created_at_id', 'ix_answers_search_vector')
+TRIGGERS = (
+    ('answers_counters_insert', 'INSERT', 'NEW TABLE AS new_rows'),
+    ('answers_counters_delete', 'DELETE', 'OLD TABLE AS old_rows'),
+    ('answers_user_stats_insert', 'INSERT', 'NEW TABLE AS new_rows'),
+    ('answers_user_stats_delete', 'DELETE', 'OLD TABLE AS old_rows'),
+)
+
+
+def _require_offline_window() -> None:
+    """Не дает перестроить непустую answers автоматически при старте приложения."""
+    if context.is_offline_mode() or settings.MIGRATIONS_ALLOW_OFFLINE:
+        return
+    if op.get_bind().scalar(sa.text("SELECT EXISTS (SELECT 1 FROM answers)")):
+        raise RuntimeError(
+            "Migration e3f9b6d4a8c1 rewrites the answers table under an exclusive lock. "
+            "Stop the application and run it with MIGRATIONS_ALLOW_OFFLINE=true."
+        )
+
+
+def _create_answers_table(name: str, partition_by: str = '') -> None:
+    op.execute(f"""
+        CREATE TABLE {name} (
+            id integer NOT NULL DEFAULT nextval('answers_id_seq'),
+            question_id integer NOT NULL,
+            user_id varchar NOT NULL,
+            text varchar NOT NULL,
+            created_at timestamp without time zone NOT NULL,
+            search_vector tsvector GENERATED ALWAYS AS (to_tsvector('{SEARCH_CONFIG}', text)) STORED
+        ) {partition_by}
+    """)
+
+
+def _finish_answers_table(primary_key: list[str]) -> None:
+    """Ключи, индексы и триггеры создаются после заполнения таблицы - так быстрее."""
+    op.execute("ALTER SEQUENCE answers_id_seq OWNED BY answers.id")
+    op.create_primary_key('answers_pkey', 'answers', primary_key)
+    op.create_foreign_key('answers_question_id_fkey', 'answers', 'questions',
+                          ['question_id'], ['id'], ondelete='CASCADE')
+    op.create_index('ix_answers_question_id_created_at_id', 'answers', ['question_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_answers_user_id_created_at_id', 'answers', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_answers_search_vector', 'answers', ['search_vector'], postgresql_using='gin')
+
+    for name, event, transition in TRIGGERS:
+        op.execute(f"""
+            CREATE TRIGGER {name} AFTER {event} ON answers
+            REFERENCING {transition}
+            FOR EACH STATEMENT EXECUTE FUNCTION {name}()
+        """)
+
+    op.execute("ANALYZE answers")
+
+
+def _detach_answers_table(new_name: str) -> None:
+    """Освобождает имена таблицы, ее индексов и последовательности для новой answers."""
+    op.execute("LOCK TABLE answers IN ACCESS EXCLUSIVE MODE")
+    for name, _, _ in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON answers")
+    for index in INDEXES:
+        op.drop_index(index, table_name='answers', if_exists=True)
+    op.drop_constraint('answers_pkey', 'answers', type_='primary')
+    op.execute(f"ALTER TABLE answers RENAME TO {new_name}")
+    op.execute("ALTER SEQUENCE answers_id_seq OWNED BY NONE")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _require_offline_window()
+
+    # Секции по месяцам: старые месяцы больше не меняются и не требуют vacuum, индексы
+    # горячего месяца малы, а запросы с условием на created_at читают только нужные секции.
+    # Строки вне созданных секций попадают в DEFAULT и переносятся при создании их месяца.
+    op.execute("""
+        CREATE FUNCTION answers_create_partitions(from_time timestamp, months_ahead integer)
+        RETURNS integer LANGUAGE plpgsql AS $$
+        DECLARE
+            month_start timestamp := date_trunc('month', from_time);
+            last_month timestamp := date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => months_ahead);
+            month_end timestamp;
+            partition_name text;
+            created integer := 0;
+        BEGIN
+            -- Воркеры и CLI могут вызвать функцию одновременно
+            PERFORM pg_advisory_xact_lock(hashtext('answers_create_partitions'));
+
+            WHILE month_start <= last_month LOOP
+                month_end := month_start + interval '1 month';
+                partition_name := 'answers_' || to_char(month_start, 'YYYY_MM');
+
+                IF to_regclass(partition_name) IS NULL THEN
+                    EXECUTE format('CREATE TABLE %I (LIKE answers INCLUDING DEFAULTS INCLUDING GENERATED)', partition_name);
+                    -- Прямое удаление из секции не вызывает триггеры счетчиков на answers
+                    EXECUTE format(
+                        'WITH moved AS (DELETE FROM answers_default WHERE created_at >= %L AND created_at < %L '
+                        'RETURNING id, question_id, user_id, text, created_at) '
+                        'INSERT INTO %I (id, question_id, user_id, text, created_at) SELECT * FROM moved',
+                        month_start, month_end, partition_name
+                    );
+                    EXECUTE format(
+                        'ALTER TABLE answers ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                        partition_name, month_start, month_end
+                    );
+                    created := created + 1;
+                END IF;
+
+                month_start := month_end;
+            END LOOP;
+
+            RETURN created;
+        END
+        $$
+    """)
+
+    _detach_answers_table('answers_unpartitioned')
+    _create_answers_table('answers', 'PARTITION BY RANGE (created_at)')
+    op.execute("CREATE TABLE answers_default PARTITION OF answers DEFAULT")
+
+    # Секции создаются до копирования, чтобы строки сразу попали в свои месяцы
+    op.execute(f"""
+        SELECT answers_create_partitions(
+            coalesce((SELECT min(created_at) FROM answers_unpartitioned), now() AT TIME ZONE 'UTC'),
+            {MONTHS_AHEAD}
+        )
+    """)
+    op.execute(f"INSERT INTO answers ({ANSWER_COLUMNS}) SELECT {ANSWER_COLUMNS} FROM answers_unpartitioned")
+    op.execute("DROP TABLE answers_unpartitioned")
+
+    # Первичный ключ секционированной таблицы должен включать ключ секционирования
+    _finish_answers_table(['id', 'created_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _require_offline_window()
+    _detach_answers_table('answers_partitioned')
+    _create_answers_table('answers')
+
+    op.execute(f"INSERT INTO answers ({ANSWER_COLUMNS}) SELECT {ANSWER_COLUMNS} FROM answers_partitioned")
+    op.execute("DROP TABLE answers_partitioned")
+    op.execute("DROP FUNCTION IF EXISTS answers_create_partitions(timestamp, integer)")
+
+    _finish_answers_table(['id'])
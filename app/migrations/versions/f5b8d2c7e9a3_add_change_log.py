@@ -0,0 +1,66 @@
+"""Add change_log for incremental sync
+
+Revision ID: f5b8d2c7e9a3
+Revises: e3f9b6d4a8c1
+Create Date: 2026-10-17 23:36:08.517240
+
+Журнал заполняется записями created для всех существующих вопросов и ответов, чтобы лента
+с начала давала полную копию данных; на большой таблице answers это долгая вставка.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5b8d2c7e9a3'
+down_revision: Union[str, Sequence[str], None] = 'e3f9b6d4a8c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('change_log',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('txid', sa.BigInteger(), nullable=False),
+    sa.Column('entity', sa.String(), nullable=False),
+    sa.Column('action', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('data', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_change_log_txid_id', 'change_log', ['txid', 'id'], unique=False)
+
+    # Новые вопросы и ответы не должны попасть в журнал дважды или пропасть между заполнением
+    # и запуском новой версии приложения
+    op.execute("LOCK TABLE questions, answers IN SHARE MODE")
+    op.execute("""
+        INSERT INTO change_log (txid, entity, action, entity_id, question_id, data, created_at)
+        SELECT pg_current_xact_id()::text::bigint, 'question', 'created', id, id,
+               json_build_object('id', id, 'text', text, 'created_at', created_at), now()
+        FROM questions
+        WHERE deleted_at IS NULL
+        ORDER BY created_at, id
+    """)
+    op.execute("""
+        INSERT INTO change_log (txid, entity, action, entity_id, question_id, data, created_at)
+        SELECT pg_current_xact_id()::text::bigint, 'answer', 'created', a.id, a.question_id,
+               json_build_object('id', a.id, 'question_id', a.question_id, 'text', a.text,
+                                 'user_id', a.user_id, 'created_at', a.created_at),
+               now()
+        FROM answers a
+        JOIN questions q ON q.id = a.question_id
+        WHERE q.deleted_at IS NULL
+        ORDER BY a.created_at, a.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_change_log_txid_id', table_name='change_log')
+    op.drop_table('change_log')
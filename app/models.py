@@ -1,5 +1,6 @@
 from datetime import datetime, timezone
-from sqlalchemy import ForeignKey, TIMESTAMP
+from typing import Optional
+from sqlalchemy import BigInteger, DDL, ForeignKey, Index, Integer, JSON, TIMESTAMP, event, text
 from sqlalchemy.orm import declarative_base, Mapped, mapped_column, relationship
 
 Base = declarative_base()
@@ -7,6 +8,16 @@ Base = declarative_base()
 class Question(Base):
     """Модель вопроса"""
     __tablename__ = "questions"
+    __table_args__ = (
+        Index("ix_questions_created_at_id", "created_at", "id"),
+        # Очередь на очистку: в индекс попадают только удаленные вопросы
+        Index(
+            "ix_questions_deleted_at",
+            "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+            sqlite_where=text("deleted_at IS NOT NULL")
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     text: Mapped[str] = mapped_column(nullable=False)
@@ -22,9 +33,23 @@ class Question(Base):
         nullable=False
     )
 
+    # Поддерживаются триггерами на answers (см. миграцию и _SQLITE_COUNTERS_DDL ниже)
+    answer_count: Mapped[int] = mapped_column(default=0, server_default="0", nullable=False)
+    last_answer_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    # Время последнего изменения ответов (в том числе удаления), для Last-Modified
+    updated_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    # Метка удаления: вопрос сразу пропадает из чтения, ответы и сама строка удаляются в фоне
+    deleted_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+
 class Answer(Base):
     """Модель ответа"""
+    # В Postgres таблица секционирована по месяцам created_at с первичным ключом (id, created_at),
+    # см. миграцию e3f9b6d4a8c1; id по-прежнему уникален, так как выдается одной последовательностью
     __tablename__ = "answers"
+    __table_args__ = (
+        Index("ix_answers_question_id_created_at_id", "question_id", "created_at", "id"),
+        Index("ix_answers_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     question_id: Mapped[int] = mapped_column(
@@ -39,4 +64,101 @@ class Answer(Base):
         nullable=False
     )
 
-    question: Mapped["Question"] = relationship(back_populates="answers")
\ No newline at end of file
+    question: Mapped["Question"] = relationship(back_populates="answers")
+
+class UserStats(Base):
+    """Модель статистики пользователя, поддерживается триггерами на answers"""
+    __tablename__ = "user_stats"
+
+    user_id: Mapped[str] = mapped_column(primary_key=True)
+    answer_count: Mapped[int] = mapped_column(default=0, server_default="0", nullable=False)
+
+class ChangeLog(Base):
+    """
+    Модель журнала изменений для инкрементальной синхронизации: записи только добавляются,
+    в той же транзакции, что и само изменение (см. app.actions.changes_actions)
+    """
+    __tablename__ = "change_log"
+    __table_args__ = (
+        Index("ix_change_log_txid_id", "txid", "id"),
+        # Досылка пропущенных событий потока ответов одного вопроса
+        Index("ix_change_log_question_id_id", "question_id", "id"),
+    )
+
+    # В SQLite автоинкремент работает только у INTEGER PRIMARY KEY
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    # Транзакция Postgres, записавшая изменение (pg_current_xact_id), в SQLite - 0
+    txid: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    entity: Mapped[str] = mapped_column(nullable=False)
+    action: Mapped[str] = mapped_column(nullable=False)
+    entity_id: Mapped[int] = mapped_column(nullable=False)
+    question_id: Mapped[int] = mapped_column(nullable=False)
+    # Созданный вопрос или ответ; у удалений пусто
+    data: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
+
+# Полнотекстовый поиск. В Postgres колонки search_vector и GIN-индексы создаются миграцией,
+# в SQLite (тесты, локальные бенчмарки) вместо них используются таблицы FTS5 с триггерами.
+_SQLITE_FTS_DDL = {
+    Question.__table__: [
+        "CREATE VIRTUAL TABLE questions_fts USING fts5(text, content='questions', content_rowid='id')",
+        "CREATE TRIGGER questions_fts_ai AFTER INSERT ON questions BEGIN "
+        "INSERT INTO questions_fts(rowid, text) VALUES (new.id, new.text); END",
+        "CREATE TRIGGER questions_fts_ad AFTER DELETE ON questions BEGIN "
+        "INSERT INTO questions_fts(questions_fts, rowid, text) VALUES ('delete', old.id, old.text); END",
+        "CREATE TRIGGER questions_fts_au AFTER UPDATE OF text ON questions BEGIN "
+        "INSERT INTO questions_fts(questions_fts, rowid, text) VALUES ('delete', old.id, old.text); "
+        "INSERT INTO questions_fts(rowid, text) VALUES (new.id, new.text); END",
+    ],
+    Answer.__table__: [
+        "CREATE VIRTUAL TABLE answers_fts USING fts5(text, question_id UNINDEXED, content='answers', content_rowid='id')",
+        "CREATE TRIGGER answers_fts_ai AFTER INSERT ON answers BEGIN "
+        "INSERT INTO answers_fts(rowid, text, question_id) VALUES (new.id, new.text, new.question_id); END",
+        "CREATE TRIGGER answers_fts_ad AFTER DELETE ON answers BEGIN "
+        "INSERT INTO answers_fts(answers_fts, rowid, text, question_id) VALUES ('delete', old.id, old.text, old.question_id); END",
+        "CREATE TRIGGER answers_fts_au AFTER UPDATE OF text ON answers BEGIN "
+        "INSERT INTO answers_fts(answers_fts, rowid, text, question_id) VALUES ('delete', old.id, old.text, old.question_id); "
+        "INSERT INTO answers_fts(rowid, text, question_id) VALUES (new.id, new.text, new.question_id); END",
+    ],
+}
+
+# Счетчик ответов, время последнего ответа и изменения у вопроса, счетчик ответов пользователя.
+# В Postgres - триггеры уровня оператора из миграций, в SQLite - построчные с той же логикой.
+# _SQLITE_NOW - текущее время UTC в формате, который SQLAlchemy читает как datetime с микросекундами.
+# Знаки % удвоены, так как DDL() подставляет параметры через %-форматирование.
+_SQLITE_NOW = "strftime('%%Y-%%m-%%d %%H:%%M:%%f', 'now') || '000'"
+
+_SQLITE_COUNTERS_DDL = [
+    "CREATE TRIGGER answers_counters_ai AFTER INSERT ON answers BEGIN "
+    f"UPDATE questions SET answer_count = answer_count + 1, updated_at = {_SQLITE_NOW}, "
+    "last_answer_at = CASE WHEN last_answer_at IS NULL OR new.created_at > last_answer_at "
+    "THEN new.created_at ELSE last_answer_at END "
+    "WHERE id = new.question_id; END",
+    "CREATE TRIGGER answers_counters_ad AFTER DELETE ON answers BEGIN "
+    f"UPDATE questions SET answer_count = answer_count - 1, updated_at = {_SQLITE_NOW}, "
+    "last_answer_at = (SELECT max(created_at) FROM answers WHERE question_id = old.question_id) "
+    "WHERE id = old.question_id; END",
+    "CREATE TRIGGER answers_user_stats_ai AFTER INSERT ON answers BEGIN "
+    "INSERT INTO user_stats(user_id, answer_count) VALUES (new.user_id, 1) "
+    "ON CONFLICT(user_id) DO UPDATE SET answer_count = answer_count + 1; END",
+    "CREATE TRIGGER answers_user_stats_ad AFTER DELETE ON answers BEGIN "
+    "UPDATE user_stats SET answer_count = answer_count - 1 WHERE user_id = old.user_id; END",
+]
+
+for _table, _statements in _SQLITE_FTS_DDL.items():
+    for _statement in _statements:
+        event.listen(_table, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+    event.listen(
+        _table,
+        "before_drop",
+        DDL(f"DROP TABLE IF EXISTS {_table.name}_fts").execute_if(dialect="sqlite")
+    )
+
+# Триггеры на answers обновляют user_stats, поэтому создаются после всех таблиц
+for _statement in _SQLITE_COUNTERS_DDL:
+    event.listen(Base.metadata, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
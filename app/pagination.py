@@ -0,0 +1,47 @@
+import base64
+from datetime import datetime
+from fastapi import HTTPException, status
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Кодирует позицию (created_at, id) в непрозрачный курсор.
+    """
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Декодирует курсор обратно в позицию (created_at, id).
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor."
+        )
+
+def encode_change_cursor(txid: int, change_id: int) -> str:
+    """
+    Кодирует позицию (txid, id) журнала изменений в непрозрачный курсор.
+    """
+    return base64.urlsafe_b64encode(f"{txid}|{change_id}".encode()).decode().rstrip("=")
+
+def decode_change_cursor(cursor: str) -> tuple[int, int]:
+    """
+    Декодирует курсор журнала изменений обратно в позицию (txid, id).
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        txid, change_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return int(txid), int(change_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor."
+        )
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from typing import Optional
+from sqlalchemy.orm import sessionmaker
+from app.actions.answers_actions import ensure_answer_partitions
+from app.metrics import ANSWER_PARTITIONS_CREATED
+from app.settings import settings
+
+logger = logging.getLogger("app.partitions")
+
+class PartitionMaintainer:
+    """
+    Периодически создает секции answers на months_ahead месяцев вперед, чтобы вставки
+    не попадали в DEFAULT-секцию.
+    """
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        months_ahead: int = settings.ANSWERS_PARTITIONS_AHEAD,
+        interval: float = settings.PARTITION_CHECK_INTERVAL,
+        stop_timeout: float = settings.BACKGROUND_STOP_TIMEOUT
+    ):
+        self.session_factory = session_factory
+        self.months_ahead = months_ahead
+        self.interval = interval
+        self.stop_timeout = stop_timeout
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure(self) -> int:
+        async with self.session_factory() as db:
+            created = await ensure_answer_partitions(db, logger, self.months_ahead)
+        ANSWER_PARTITIONS_CREATED.inc(created)
+        return created
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await self.ensure()
+            except Exception:
+                logger.exception("Ошибка создания секций answers")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self) -> None:
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Дожидается завершения текущей проверки секций; если она не уложилась в stop_timeout, отменяет задачу.
+        """
+        task, self._task = self._task, None
+        if task is None:
+            return
+
+        self._stopping.set()
+        try:
+            await asyncio.wait_for(task, self.stop_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Создание секций answers не завершилось за %s с и отменено", self.stop_timeout)
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy.orm import sessionmaker
+from app.actions.questions_actions import get_purge_backlog, purge_deleted_questions
+from app.conditional import as_utc
+from app.metrics import (
+    PURGE_BACKLOG_ANSWERS,
+    PURGE_BACKLOG_QUESTIONS,
+    PURGE_BATCH_SECONDS,
+    PURGE_OLDEST_SECONDS,
+    PURGE_ROWS
+)
+from app.settings import settings
+
+logger = logging.getLogger("app.purge")
+
+class QuestionPurger:
+    """
+    Фоновая очистка удаленных вопросов: ответы удаляются пакетами по batch_size в отдельных
+    транзакциях с паузой между ними, чтобы не держать блокировки и не нагружать реплики.
+    """
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        batch_size: int = settings.PURGE_BATCH_SIZE,
+        batch_pause: float = settings.PURGE_BATCH_PAUSE,
+        interval: float = settings.PURGE_INTERVAL,
+        stop_timeout: float = settings.BACKGROUND_STOP_TIMEOUT
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.interval = interval
+        self.stop_timeout = stop_timeout
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def update_backlog(self) -> int:
+        """
+        Обновляет метрики очереди на очистку и возвращает число ожидающих вопросов.
+        """
+        async with self.session_factory() as db:
+            questions, answers, oldest = await get_purge_backlog(db)
+
+        PURGE_BACKLOG_QUESTIONS.set(questions)
+        PURGE_BACKLOG_ANSWERS.set(answers)
+        PURGE_OLDEST_SECONDS.set((datetime.now(timezone.utc) - as_utc(oldest)).total_seconds() if oldest else 0)
+        return questions
+
+    async def purge(self) -> int:
+        """
+        Очищает все удаленные вопросы, пакет за пакетом, пока не запрошена остановка.
+        Возвращает число удаленных строк.
+        """
+        total = 0
+        while not self._stopping.is_set():
+            started = time.perf_counter()
+            async with self.session_factory() as db:
+                purged = await purge_deleted_questions(db, logger, self.batch_size)
+            if not purged:
+                break
+
+            PURGE_BATCH_SECONDS.observe(time.perf_counter() - started)
+            PURGE_ROWS.inc(purged)
+            total += purged
+
+            await self.update_backlog()
+            await self._wait(self.batch_pause)
+
+        return total
+
+    async def _wait(self, timeout: float) -> None:
+        """Пауза, которую прерывает остановка."""
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await self.update_backlog()
+                await self.purge()
+            except Exception:
+                logger.exception("Ошибка очистки удаленных вопросов")
+            await self._wait(self.interval)
+
+    async def start(self) -> None:
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Дожидается завершения текущего пакета; если он не уложился в stop_timeout, отменяет задачу.
+        """
+        task, self._task = self._task, None
+        if task is None:
+            return
+
+        self._stopping.set()
+        try:
+            await asyncio.wait_for(task, self.stop_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Очистка не завершила пакет за %s с и отменена", self.stop_timeout)
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.metrics import DB_REPLICA_HEALTHY, DB_REPLICA_LAG_SECONDS
+from app.settings import settings
+
+logger = logging.getLogger("app.replicas")
+
+# Время последней записи клиента; пока не истекло окно, его чтения идут в основную БД
+LAST_WRITE_COOKIE = "last_write"
+
+# Отставание реплики: 0, если все полученные WAL уже применены, иначе время с последней
+# примененной транзакции
+_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+@dataclass(eq=False)
+class Replica:
+    """Реплика для чтения: движок, фабрика сессий и состояние по последней проверке"""
+    name: str
+    engine: AsyncEngine
+    session_factory: sessionmaker = field(init=False)
+    healthy: bool = True
+    lag: float = 0.0
+    in_use: int = 0
+
+    def __post_init__(self):
+        # Сессии помечаются, чтобы не наполнять кэш данными с отставанием
+        self.session_factory = sessionmaker(
+            bind=self.engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            info={"replica": self.name}
+        )
+
+        # Обрыв соединения выводит реплику из ротации сразу, не дожидаясь проверки
+        @event.listens_for(self.engine.sync_engine, "handle_error")
+        def _handle_error(exception_context):
+            if exception_context.is_disconnect:
+                self.mark(healthy=False)
+
+    def mark(self, healthy: bool, lag: float = 0.0) -> None:
+        if healthy != self.healthy:
+            logger.warning("Реплика %s %s", self.name, "вернулась в ротацию" if healthy else "выведена из ротации")
+        self.healthy = healthy
+        self.lag = lag
+        DB_REPLICA_HEALTHY.set(1 if healthy else 0, replica=self.name)
+        DB_REPLICA_LAG_SECONDS.set(lag, replica=self.name)
+
+class ReplicaSet:
+    """
+    Набор реплик для чтения. Выбирается исправная реплика с наименьшим числом открытых
+    сессий, при равной загрузке - по кругу. Исправность и отставание проверяются в фоне.
+    """
+    def __init__(
+        self,
+        replicas: list[Replica],
+        max_lag: float = settings.DB_REPLICA_MAX_LAG,
+        check_interval: float = settings.DB_REPLICA_CHECK_INTERVAL
+    ):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._next = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def acquire(self) -> Optional[Replica]:
+        """
+        Выбирает реплику для сессии; None - исправных реплик нет, читать из основной БД.
+        """
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+
+        start = self._next % len(healthy)
+        self._next += 1
+        replica = min(healthy[start:] + healthy[:start], key=lambda replica: replica.in_use)
+        replica.in_use += 1
+        return replica
+
+    def release(self, replica: Replica) -> None:
+        replica.in_use -= 1
+
+    async def check(self, replica: Replica) -> None:
+        try:
+            async with replica.engine.connect() as conn:
+                if conn.dialect.name == "postgresql":
+                    lag = float(await conn.scalar(_LAG_QUERY))
+                else:
+                    await conn.execute(text("SELECT 1"))
+                    lag = 0.0
+        except Exception as exc:
+            logger.warning("Реплика %s недоступна: %s", replica.name, exc)
+            replica.mark(healthy=False)
+            return
+
+        replica.mark(healthy=lag <= self.max_lag, lag=lag)
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+
+    async def _run_checks(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check_all()
+
+    async def start(self) -> None:
+        if not self.replicas:
+            return
+        await self.check_all()
+        self._task = asyncio.create_task(self._run_checks())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+def wrote_recently(request: Request) -> bool:
+    """
+    Писал ли клиент в течение окна read-your-writes.
+    """
+    last_write = request.cookies.get(LAST_WRITE_COOKIE)
+    if last_write is None:
+        return False
+    try:
+        return time.time() - float(last_write) < settings.DB_READ_YOUR_WRITES_WINDOW
+    except ValueError:
+        return False
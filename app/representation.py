@@ -0,0 +1,67 @@
+from typing import Optional
+from fastapi import Request, Response
+from pydantic_core import from_json
+from app.conditional import Validators
+
+try:
+    import msgpack
+except ImportError:  # MessagePack необязателен: без пакета отдается только JSON
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_ALIASES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+def parse_quality(header: Optional[str]) -> dict[str, float]:
+    """
+    Разбирает заголовок Accept или Accept-Encoding в словарь значение -> q.
+    """
+    qualities: dict[str, float] = {}
+    for item in (header or "").split(","):
+        value, *params = (part.strip() for part in item.split(";"))
+        if not value:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, raw = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(raw)
+                except ValueError:
+                    quality = 0.0
+        qualities[value.lower()] = quality
+    return qualities
+
+def negotiate_media_type(request: Request) -> str:
+    """
+    Выбирает представление по Accept: MessagePack, только если он запрошен явно,
+    установлен и предпочтительнее JSON; иначе JSON.
+    """
+    if msgpack is None:
+        return JSON_MEDIA_TYPE
+
+    accept = parse_quality(request.headers.get("accept"))
+    msgpack_quality = max(accept.get(alias, 0.0) for alias in _MSGPACK_ALIASES)
+    json_quality = accept.get(JSON_MEDIA_TYPE, accept.get("application/*", accept.get("*/*", 0.0)))
+
+    if msgpack_quality > 0 and msgpack_quality >= json_quality:
+        return MSGPACK_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+def representation_validators(validators: Validators, media_type: str) -> Validators:
+    """
+    У каждого представления свой ETag, чтобы 304 не подтверждал копию в другом формате.
+    """
+    if media_type == JSON_MEDIA_TYPE:
+        return validators
+    return validators._replace(etag=validators.etag[:-1] + '.msgpack"')
+
+def payload_response(payload: bytes, media_type: str, headers: Optional[dict[str, str]] = None) -> Response:
+    """
+    Ответ с уже сериализованным JSON, при необходимости перекодированным в MessagePack.
+    JSON разбирается парсером pydantic-core, поэтому сериализация и кэш остаются общими.
+    """
+    if media_type == MSGPACK_MEDIA_TYPE:
+        payload = msgpack.packb(from_json(payload))
+
+    return Response(content=payload, media_type=media_type, headers={**(headers or {}), "Vary": "Accept"})
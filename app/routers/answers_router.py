@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from logging import Logger
-from app.deps import get_db, get_logger
-from app.schemas import AnswerSchema, AnswerBaseSchema
+from typing import Optional
+from app.cache import CacheBackend
+from app.deps import get_answer_buffer, get_broker, get_cache, get_db, get_logger, get_read_db
+from app.events import AnswerBroker
+from app.bulk import iter_bulk_items
+from app.write_behind import AnswerWriteBuffer
+from app.schemas import AnswerSchema, AnswerBaseSchema, BulkAnswersResultSchema
 from app.actions.answers_actions import (
     create_answer,
+    create_answers_bulk,
     get_answer_by_id,
     delete_answer
 )
@@ -14,22 +20,53 @@ router = APIRouter(
     tags=["Answers"],
 )
 
+@router.post("/bulk", response_model=BulkAnswersResultSchema, status_code=status.HTTP_200_OK)
+async def create_answers_bulk_endpoint(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    logger: Logger = Depends(get_logger),
+    cache: CacheBackend = Depends(get_cache),
+    broker: AnswerBroker = Depends(get_broker)
+):
+    """
+    Эндпоинт для массового создания ответов из JSON-массива или NDJSON-потока.
+    """
+    return await create_answers_bulk(items=iter_bulk_items(request), db=db, logger=logger, cache=cache, broker=broker)
+
 @router.post("/{question_id}", response_model=AnswerSchema, status_code=status.HTTP_201_CREATED)
 async def create_answer_endpoint(
     question_id: int,
     answer_data: AnswerBaseSchema,
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    logger: Logger = Depends(get_logger)
+    logger: Logger = Depends(get_logger),
+    cache: CacheBackend = Depends(get_cache),
+    broker: AnswerBroker = Depends(get_broker),
+    buffer: Optional[AnswerWriteBuffer] = Depends(get_answer_buffer)
 ):
     """
-    Эндпоинт для создания нового ответа.
+    Эндпоинт для создания нового ответа. При включенной отложенной записи ответ, еще не
+    записанный в БД (режим buffered), возвращается со статусом 202.
     """
-    return await create_answer(question_id=question_id, answer_data=answer_data, db=db, logger=logger)
+    if buffer is not None:
+        answer, committed = await buffer.submit(question_id, answer_data, db, logger)
+        if not committed:
+            response.status_code = status.HTTP_202_ACCEPTED
+        return answer
+
+    return await create_answer(
+        question_id=question_id,
+        answer_data=answer_data,
+        db=db,
+        logger=logger,
+        cache=cache,
+        broker=broker
+    )
 
 @router.get("/{answer_id}", response_model=AnswerSchema, status_code=status.HTTP_200_OK)
 async def get_answer_by_id_endpoint(
     answer_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     logger: Logger = Depends(get_logger)
 ):
     """
@@ -41,9 +78,11 @@ async def get_answer_by_id_endpoint(
 async def delete_answer_endpoint(
     answer_id: int,
     db: AsyncSession = Depends(get_db),
-    logger: Logger = Depends(get_logger)
+    logger: Logger = Depends(get_logger),
+    cache: CacheBackend = Depends(get_cache),
+    broker: AnswerBroker = Depends(get_broker)
 ):
     """
     Эндпоинт для удаления ответа по id.
     """
-    return await delete_answer(answer_id=answer_id, db=db, logger=logger)
\ No newline at end of file
+    return await delete_answer(answer_id=answer_id, db=db, logger=logger, cache=cache, broker=broker)
\ No newline at end of file
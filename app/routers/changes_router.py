@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from logging import Logger
+from typing import List, Optional
+from app.deps import get_logger, get_read_db
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.schemas import ChangeSchema
+from app.actions.changes_actions import get_changes
+
+router = APIRouter(
+    prefix="/changes",
+    tags=["Changes"],
+)
+
+@router.get("/", response_model=List[ChangeSchema], status_code=status.HTTP_200_OK)
+async def get_changes_endpoint(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы"),
+    after: Optional[str] = Query(None, description="Курсор из X-Next-Cursor предыдущего запроса, без него - с начала"),
+    db: AsyncSession = Depends(get_read_db),
+    logger: Logger = Depends(get_logger)
+):
+    """
+    Эндпоинт ленты изменений для инкрементальной синхронизации: созданные и удаленные вопросы
+    и ответы в порядке фиксации. Курсор для следующего запроса возвращается в X-Next-Cursor
+    всегда, в том числе для пустой страницы; его нужно сохранять после обработки страницы.
+    """
+    payload, next_cursor = await get_changes(db=db, logger=logger, limit=limit, after=after)
+
+    return Response(content=payload, media_type="application/json", headers={"X-Next-Cursor": next_cursor})
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from logging import Logger
+from datetime import datetime
+from typing import Literal, Optional
+from app.compression import gzip_chunks
+from app.deps import get_logger, get_read_db
+from app.actions.export_actions import export_questions
+
+router = APIRouter(
+    prefix="/export",
+    tags=["Export"],
+)
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+@router.get("/", response_class=StreamingResponse, status_code=status.HTTP_200_OK)
+async def export_endpoint(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format", description="Формат выгрузки"),
+    gzip: bool = Query(False, description="Отдать файл .gz"),
+    created_from: Optional[datetime] = Query(None, description="Вопросы, созданные не раньше (наивное время - UTC)"),
+    created_to: Optional[datetime] = Query(None, description="Вопросы, созданные раньше (наивное время - UTC)"),
+    db: AsyncSession = Depends(get_read_db),
+    logger: Logger = Depends(get_logger)
+):
+    """
+    Эндпоинт потоковой выгрузки вопросов с ответами: строка на ответ, в порядке создания.
+    """
+    chunks = export_questions(
+        db=db,
+        logger=logger,
+        export_format=export_format,
+        created_from=created_from,
+        created_to=created_to
+    )
+    filename = f"export.{export_format}"
+    media_type = MEDIA_TYPES[export_format]
+
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -1,13 +1,32 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Literal, Optional, Union
 from logging import Logger
-from app.schemas import QuestionSchema, QuestionBaseSchema
-from app.deps import get_db, get_logger
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.bulk import iter_bulk_items
+from app.schemas import (
+    AnswerSchema,
+    QuestionSchema,
+    QuestionBaseSchema,
+    BulkQuestionsResultSchema,
+    QuestionSearchResultSchema,
+    QuestionSummarySchema
+)
+from app.cache import CacheBackend
+from app.conditional import cache_headers, is_not_modified, not_modified_response
+from app.representation import negotiate_media_type, payload_response, representation_validators
+from app.deps import get_broker, get_cache, get_db, get_logger, get_read_db
+from app.events import AnswerBroker
 from app.actions.questions_actions import (
     create_question,
+    create_questions_bulk,
     get_questions_list,
+    stream_questions_list,
+    search_questions,
     get_answers_by_question_id,
+    get_question_answers,
+    open_answer_stream,
     delete_question
 )
 
@@ -27,34 +46,175 @@ async def create_question_endpoint(
     """
     return await create_question(question_data=question_data, db=db, logger=logger)
 
-@router.get("/", response_model=List[QuestionSchema], status_code=status.HTTP_200_OK)
-async def get_questions_list_endpoint(
+@router.post("/bulk", response_model=BulkQuestionsResultSchema, status_code=status.HTTP_200_OK)
+async def create_questions_bulk_endpoint(
+    request: Request,
     db: AsyncSession = Depends(get_db),
     logger: Logger = Depends(get_logger)
 ):
     """
-    Эндпоинт для получения всех вопросов.
+    Эндпоинт для массового создания вопросов из JSON-массива или NDJSON-потока.
+    """
+    return await create_questions_bulk(items=iter_bulk_items(request), db=db, logger=logger)
+
+@router.get("/", response_model=List[Union[QuestionSchema, QuestionSummarySchema]], status_code=status.HTTP_200_OK)
+async def get_questions_list_endpoint(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы"),
+    after: Optional[str] = Query(None, description="Курсор, после которого начинается страница"),
+    answers_limit: Optional[int] = Query(None, ge=0, description="Максимум ответов на вопрос, 0 - без ответов"),
+    summary: bool = Query(False, description="Краткое представление: счетчик и время последнего ответа вместо ответов"),
+    stream: bool = Query(False, description="Потоковая отдача без загрузки всей выборки в память"),
+    db: AsyncSession = Depends(get_read_db),
+    logger: Logger = Depends(get_logger)
+):
+    """
+    Эндпоинт для получения вопросов с пагинацией по курсору.
+    Поддерживает If-None-Match: неизменившаяся страница возвращается ответом 304.
+    С Accept: application/msgpack отдает MessagePack вместо JSON (кроме потоковой отдачи).
+    """
+    if stream:
+        return StreamingResponse(
+            stream_questions_list(
+                db=db,
+                logger=logger,
+                limit=limit,
+                after=after,
+                answers_limit=answers_limit,
+                summary=summary
+            ),
+            media_type="application/json"
+        )
+
+    media_type = negotiate_media_type(request)
+    payload, next_cursor, validators = await get_questions_list(
+        db=db,
+        logger=logger,
+        limit=limit or DEFAULT_PAGE_SIZE,
+        after=after,
+        answers_limit=answers_limit,
+        summary=summary,
+        not_modified=lambda validators: is_not_modified(request, representation_validators(validators, media_type))
+    )
+    validators = representation_validators(validators, media_type)
+
+    if payload is None:
+        return not_modified_response(validators)
+
+    headers = cache_headers(validators)
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = next_cursor
+
+    return payload_response(payload, media_type, headers)
+
+@router.get("/search", response_model=List[QuestionSearchResultSchema], status_code=status.HTTP_200_OK)
+async def search_questions_endpoint(
+    q: str = Query(..., min_length=1, max_length=200, description="Поисковый запрос"),
+    limit: int = Query(20, ge=1, le=100, description="Размер страницы"),
+    offset: int = Query(0, ge=0, le=10000, description="Смещение от начала выдачи"),
+    db: AsyncSession = Depends(get_read_db),
+    logger: Logger = Depends(get_logger)
+):
+    """
+    Эндпоинт для полнотекстового поиска вопросов по тексту вопросов и ответов.
     """
-    return await get_questions_list(db=db, logger=logger)
+    return await search_questions(query=q, db=db, logger=logger, limit=limit, offset=offset)
 
 @router.get("/{question_id}", response_model=QuestionSchema, status_code=status.HTTP_200_OK)
 async def get_answers_by_question_id_endpoint(
+    request: Request,
     question_id: int,
-    db: AsyncSession = Depends(get_db),
+    answers_limit: Optional[int] = Query(None, ge=0, le=MAX_PAGE_SIZE, description="Только первые N ответов, продолжение - в /answers"),
+    db: AsyncSession = Depends(get_read_db),
+    logger: Logger = Depends(get_logger),
+    cache: CacheBackend = Depends(get_cache)
+):
+    """
+    Эндпоинт для получения вопроса и ответов на него.
+    Поддерживает If-None-Match и If-Modified-Since: неизменившийся вопрос возвращается ответом 304.
+    С Accept: application/msgpack отдает MessagePack вместо JSON.
+    """
+    media_type = negotiate_media_type(request)
+    payload, next_cursor, validators = await get_answers_by_question_id(
+        question_id=question_id,
+        db=db,
+        logger=logger,
+        cache=cache,
+        answers_limit=answers_limit,
+        not_modified=lambda validators: is_not_modified(request, representation_validators(validators, media_type))
+    )
+    validators = representation_validators(validators, media_type)
+
+    if payload is None:
+        return not_modified_response(validators)
+
+    headers = cache_headers(validators)
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = next_cursor
+
+    return payload_response(payload, media_type, headers)
+
+@router.get("/{question_id}/answers", response_model=List[AnswerSchema], status_code=status.HTTP_200_OK)
+async def get_question_answers_endpoint(
+    request: Request,
+    question_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы"),
+    after: Optional[str] = Query(None, description="Курсор, после которого начинается страница"),
+    order: Literal["asc", "desc"] = Query("asc", description="Порядок по времени создания"),
+    db: AsyncSession = Depends(get_read_db),
     logger: Logger = Depends(get_logger)
 ):
     """
-    Эндпоинт для получения вопроса и всех ответов на него.
+    Эндпоинт для постраничного получения ответов на вопрос.
+    """
+    payload, next_cursor = await get_question_answers(
+        question_id=question_id,
+        db=db,
+        logger=logger,
+        limit=limit,
+        after=after,
+        order=order
+    )
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor is not None else None
+
+    return payload_response(payload, negotiate_media_type(request), headers)
+
+@router.get("/{question_id}/stream", response_class=StreamingResponse, status_code=status.HTTP_200_OK)
+async def stream_question_answers_endpoint(
+    question_id: int,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID", description="id последнего полученного ответа"),
+    db: AsyncSession = Depends(get_db),
+    logger: Logger = Depends(get_logger),
+    broker: AnswerBroker = Depends(get_broker)
+):
+    """
+    Эндпоинт потока Server-Sent Events о новых и удаленных ответах на вопрос.
+    События: answer_created, answer_deleted, question_deleted и reset (клиенту нужно перечитать вопрос).
     """
-    return await get_answers_by_question_id(question_id=question_id, db=db, logger=logger)
+    events = await open_answer_stream(
+        question_id=question_id,
+        db=db,
+        logger=logger,
+        broker=broker,
+        last_event_id=last_event_id
+    )
+
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.delete("/{question_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_question_endpoint(
     question_id: int,
     db: AsyncSession = Depends(get_db),
-    logger: Logger = Depends(get_logger)
+    logger: Logger = Depends(get_logger),
+    cache: CacheBackend = Depends(get_cache),
+    broker: AnswerBroker = Depends(get_broker)
 ):
     """
     Эндпоинт для удаления вопроса и ответов на него по id.
     """
-    return await delete_question(question_id=question_id, db=db, logger=logger)
+    return await delete_question(question_id=question_id, db=db, logger=logger, cache=cache, broker=broker)
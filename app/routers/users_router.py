@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from logging import Logger
+from typing import List, Literal, Optional
+from app.deps import get_logger, get_read_db
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.schemas import AnswerSchema
+from app.actions.users_actions import get_user_answers
+
+router = APIRouter(
+    prefix="/users",
+    tags=["Users"],
+)
+
+@router.get("/{user_id}/answers", response_model=List[AnswerSchema], status_code=status.HTTP_200_OK)
+async def get_user_answers_endpoint(
+    user_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы"),
+    after: Optional[str] = Query(None, description="Курсор, после которого начинается страница"),
+    order: Literal["asc", "desc"] = Query("desc", description="Порядок по времени создания"),
+    db: AsyncSession = Depends(get_read_db),
+    logger: Logger = Depends(get_logger)
+):
+    """
+    Эндпоинт для постраничного получения ответов пользователя, по умолчанию сначала новые.
+    Общее число ответов пользователя возвращается в заголовке X-Total-Count.
+    """
+    payload, next_cursor, total = await get_user_answers(
+        user_id=user_id,
+        db=db,
+        logger=logger,
+        limit=limit,
+        after=after,
+        order=order
+    )
+
+    headers = {"X-Total-Count": str(total)}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = next_cursor
+
+    return Response(content=payload, media_type="application/json", headers=headers)
@@ -2,7 +2,7 @@ from __future__ import annotations
 from datetime import datetime
 from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
-from typing import List
+from typing import List, Literal, Optional
 
 class QuestionBaseSchema(BaseModel):
     text: str = Field(description="Текст вопроса")
@@ -14,6 +14,12 @@ class QuestionSchema(QuestionBaseSchema):
     created_at: datetime = Field(description="Время создания вопроса")
     answers: List[AnswerSchema] = Field(description="Ответы на вопрос", default_factory=list)
 
+class QuestionSummarySchema(QuestionBaseSchema):
+    id: int = Field(description="Идентификатор вопроса")
+    created_at: datetime = Field(description="Время создания вопроса")
+    answer_count: int = Field(description="Количество ответов")
+    last_answer_at: Optional[datetime] = Field(description="Время последнего ответа")
+
 class AnswerBaseSchema(BaseModel):
     text: str = Field(description="Текст ответа")
     user_id: str = Field(description="Пользователь")
@@ -23,4 +29,37 @@ class AnswerBaseSchema(BaseModel):
 class AnswerSchema(AnswerBaseSchema):
     id: int = Field(description="Идентификатор ответа")
     question_id: int = Field(description="Идентификатор вопроса")
-    created_at: datetime = Field(description="Время создания ответа")
\ No newline at end of file
+    created_at: datetime = Field(description="Время создания ответа")
+
+class BulkAnswerSchema(AnswerBaseSchema):
+    question_id: int = Field(description="Идентификатор вопроса")
+
+class BulkErrorSchema(BaseModel):
+    index: int = Field(description="Порядковый номер элемента во входных данных")
+    detail: str = Field(description="Причина ошибки")
+
+class BulkAnswersResultSchema(BaseModel):
+    created: int = Field(description="Число созданных ответов", default=0)
+    errors: List[BulkErrorSchema] = Field(description="Ошибки по элементам", default_factory=list)
+
+class BulkQuestionsResultSchema(BaseModel):
+    created: int = Field(description="Число созданных вопросов", default=0)
+    errors: List[BulkErrorSchema] = Field(description="Ошибки по элементам", default_factory=list)
+
+class QuestionSearchResultSchema(BaseModel):
+    id: int = Field(description="Идентификатор вопроса")
+    text: str = Field(description="Текст вопроса")
+    created_at: datetime = Field(description="Время создания вопроса")
+    rank: float = Field(description="Релевантность, чем больше, тем лучше")
+    source: Literal["question", "answer"] = Field(description="Где найдено лучшее совпадение: в вопросе или в ответе")
+    headline: str = Field(description="Фрагмент найденного текста с совпадениями в <b></b>")
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ChangeSchema(BaseModel):
+    entity: Literal["question", "answer"] = Field(description="Тип объекта")
+    action: Literal["created", "deleted"] = Field(description="Изменение; удаление вопроса удаляет и его ответы")
+    entity_id: int = Field(description="Идентификатор вопроса или ответа")
+    question_id: int = Field(description="Идентификатор вопроса, к которому относится изменение")
+    data: Optional[dict] = Field(description="Созданный вопрос (без ответов) или ответ, у удалений - null")
+    created_at: datetime = Field(description="Время изменения")
@@ -0,0 +1,106 @@
+import re
+from sqlalchemy import Float, String, column, func, literal, literal_column, text, union_all
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.models import Answer, Question
+
+# Конфигурация должна совпадать с той, что указана в миграциях колонок search_vector
+SEARCH_CONFIG = "russian"
+HEADLINE_OPTIONS = "StartSel=<b>, StopSel=</b>, MaxWords=35, MinWords=15"
+
+_search_config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+_questions_vector = literal_column("questions.search_vector", TSVECTOR)
+_answers_vector = literal_column("answers.search_vector", TSVECTOR)
+
+_SQLITE_SEARCH = text("""
+    WITH matches AS (
+        SELECT rowid AS question_id, -bm25(questions_fts) AS rank, 'question' AS source,
+               highlight(questions_fts, 0, '<b>', '</b>') AS headline
+        FROM questions_fts WHERE questions_fts MATCH :query
+        UNION ALL
+        SELECT question_id, -bm25(answers_fts), 'answer',
+               highlight(answers_fts, 0, '<b>', '</b>')
+        FROM answers_fts WHERE answers_fts MATCH :query
+    ), best AS (
+        SELECT *, ROW_NUMBER() OVER (PARTITION BY question_id ORDER BY rank DESC) AS rn FROM matches
+    )
+    SELECT q.id, q.text, q.created_at, best.rank, best.source, best.headline
+    FROM best JOIN questions q ON q.id = best.question_id
+    WHERE best.rn = 1 AND q.deleted_at IS NULL
+    ORDER BY best.rank DESC, q.id
+    LIMIT :limit OFFSET :offset
+""").columns(
+    Question.id,
+    Question.text,
+    Question.created_at,
+    column("rank", Float),
+    column("source", String),
+    column("headline", String)
+)
+
+async def search(query: str, db: AsyncSession, limit: int, offset: int) -> list[Row]:
+    """
+    Ищет вопросы по тексту вопроса и ответов через индекс текущей СУБД.
+    Возвращает строки (id, text, created_at, rank, source, headline) по убыванию релевантности.
+    """
+    if db.bind.dialect.name == "sqlite":
+        return await _search_sqlite(query, db, limit, offset)
+    return await _search_postgres(query, db, limit, offset)
+
+async def _search_postgres(query: str, db: AsyncSession, limit: int, offset: int) -> list[Row]:
+    ts_query = func.websearch_to_tsquery(_search_config, query)
+
+    # Ранжируются все совпадения, иначе лучший результат мог бы не попасть в выдачу;
+    # дорогой ts_headline вычисляется только для страницы
+    matches = union_all(
+        select(
+            Question.id.label("question_id"),
+            func.ts_rank_cd(_questions_vector, ts_query).label("rank"),
+            literal("question").label("source"),
+            Question.text.label("document")
+        ).where(_questions_vector.op("@@")(ts_query)),
+        select(
+            Answer.question_id,
+            func.ts_rank_cd(_answers_vector, ts_query),
+            literal("answer"),
+            Answer.text
+        ).where(_answers_vector.op("@@")(ts_query))
+    ).subquery()
+
+    # Лучшее совпадение на вопрос: по самому тексту вопроса или по одному из ответов
+    best = (
+        select(matches)
+        .distinct(matches.c.question_id)
+        .order_by(matches.c.question_id, matches.c.rank.desc())
+        .subquery()
+    )
+
+    # ts_headline вычисляется только для строк текущей страницы
+    result = await db.execute(
+        select(
+            Question.id,
+            Question.text,
+            Question.created_at,
+            best.c.rank,
+            best.c.source,
+            func.ts_headline(_search_config, best.c.document, ts_query, HEADLINE_OPTIONS).label("headline")
+        )
+        .join(best, best.c.question_id == Question.id)
+        .where(Question.deleted_at.is_(None))
+        .order_by(best.c.rank.desc(), Question.id)
+        .limit(limit)
+        .offset(offset)
+    )
+    return result.all()
+
+async def _search_sqlite(query: str, db: AsyncSession, limit: int, offset: int) -> list[Row]:
+    # Каждое слово берется в кавычки, чтобы спецсимволы запроса не трактовались как синтаксис FTS5
+    tokens = re.findall(r"\w+", query)
+    if not tokens:
+        return []
+
+    fts_query = " ".join(f'"{token}"' for token in tokens)
+    result = await db.execute(_SQLITE_SEARCH, {"query": fts_query, "limit": limit, "offset": offset})
+    return result.all()
@@ -0,0 +1,148 @@
+import csv
+import io
+from datetime import datetime
+from typing import Any, Iterable, List, Optional
+from typing_extensions import TypedDict
+from pydantic import TypeAdapter
+
+# Данные из БД уже соответствуют схемам, поэтому ответы собираются из строк результата
+# в словари без валидации и сериализуются в байты напрямую средствами pydantic-core.
+# Поля повторяют AnswerSchema, QuestionSchema и QuestionSummarySchema, которые остаются описанием API.
+
+class AnswerPayload(TypedDict):
+    id: int
+    question_id: int
+    text: str
+    user_id: str
+    created_at: datetime
+
+class QuestionPayload(TypedDict):
+    id: int
+    text: str
+    created_at: datetime
+    answers: List[AnswerPayload]
+
+class QuestionSummaryPayload(TypedDict):
+    id: int
+    text: str
+    created_at: datetime
+    answer_count: int
+    last_answer_at: Optional[datetime]
+
+class QuestionDataPayload(TypedDict):
+    id: int
+    text: str
+    created_at: datetime
+
+class ChangePayload(TypedDict):
+    entity: str
+    action: str
+    entity_id: int
+    question_id: int
+    data: Optional[dict]
+    created_at: datetime
+
+class ExportRowPayload(TypedDict):
+    question_id: int
+    question_text: str
+    question_created_at: datetime
+    answer_id: Optional[int]
+    answer_text: Optional[str]
+    answer_user_id: Optional[str]
+    answer_created_at: Optional[datetime]
+
+EXPORT_FIELDS = tuple(ExportRowPayload.__annotations__)
+
+_question_adapter = TypeAdapter(QuestionPayload)
+_questions_adapter = TypeAdapter(List[QuestionPayload])
+_summaries_adapter = TypeAdapter(List[QuestionSummaryPayload])
+_answers_adapter = TypeAdapter(List[AnswerPayload])
+_answer_adapter = TypeAdapter(AnswerPayload)
+_question_data_adapter = TypeAdapter(QuestionDataPayload)
+_changes_adapter = TypeAdapter(List[ChangePayload])
+_export_row_adapter = TypeAdapter(ExportRowPayload)
+
+def build_question(row: Any, answers: Iterable[Any]) -> QuestionPayload:
+    """
+    Собирает вопрос из строки результата и строк ответов без валидации.
+    """
+    return {
+        "id": row.id,
+        "text": row.text,
+        "created_at": row.created_at,
+        "answers": [answer._asdict() for answer in answers]
+    }
+
+def dump_question(question: QuestionPayload) -> bytes:
+    """
+    Сериализует вопрос в JSON-байты.
+    """
+    return _question_adapter.dump_json(question)
+
+def dump_questions(questions: list[QuestionPayload]) -> bytes:
+    """
+    Сериализует список вопросов в JSON-байты.
+    """
+    return _questions_adapter.dump_json(questions)
+
+def dump_question_summaries(rows: Iterable[Any]) -> bytes:
+    """
+    Сериализует строки кратких представлений вопросов в JSON-байты.
+    """
+    return _summaries_adapter.dump_json([row._asdict() for row in rows])
+
+def dump_answers(rows: Iterable[Any]) -> bytes:
+    """
+    Сериализует строки ответов в JSON-байты.
+    """
+    return _answers_adapter.dump_json([row._asdict() for row in rows])
+
+def dump_answer(answer: AnswerPayload) -> bytes:
+    """
+    Сериализует ответ в JSON-байты.
+    """
+    return _answer_adapter.dump_json(answer)
+
+def dump_answer_data(data: dict) -> bytes:
+    """
+    Сериализует ответ из журнала изменений в JSON-байты так же, как dump_answer.
+    """
+    return _answer_adapter.dump_json(_answer_adapter.validate_python(data))
+
+def question_data(question: QuestionDataPayload) -> dict:
+    """
+    Переводит вопрос без ответов в JSON-совместимый словарь для журнала изменений.
+    """
+    return _question_data_adapter.dump_python(question, mode="json")
+
+def answer_data(answer: AnswerPayload) -> dict:
+    """
+    Переводит ответ в JSON-совместимый словарь для журнала изменений.
+    """
+    return _answer_adapter.dump_python(answer, mode="json")
+
+def dump_changes(rows: Iterable[Any]) -> bytes:
+    """
+    Сериализует строки журнала изменений в JSON-байты.
+    """
+    return _changes_adapter.dump_json([row._asdict() for row in rows])
+
+def dump_export_ndjson(rows: Iterable[Any]) -> bytes:
+    """
+    Сериализует строки выгрузки в NDJSON: по объекту JSON на строку.
+    """
+    return b"".join(_export_row_adapter.dump_json(row._asdict()) + b"\n" for row in rows)
+
+def dump_export_csv(rows: Iterable[Any], header: bool = False) -> bytes:
+    """
+    Сериализует строки выгрузки в CSV, с заголовком - для первой пачки.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows(
+        [value.isoformat() if isinstance(value, datetime) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue().encode()
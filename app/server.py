@@ -0,0 +1,123 @@
+"""
+Запуск приложения в продакшене: несколько процессов uvicorn с uvloop и httptools.
+
+Размер пула соединений каждого воркера вычисляется из лимита соединений Postgres,
+чтобы воркеры вместе не превышали max_connections.
+
+Состояние в памяти процесса не делится между воркерами, поэтому при нескольких воркерах
+брокер событий переключается на postgres, а кэш вопросов отключается (см. multi_worker_overrides).
+Метрики /metrics тоже считаются в каждом воркере отдельно: запрос попадает в один из них,
+и Prometheus должен опрашивать воркеры по отдельности или суммировать ряды за балансировщиком.
+
+Пример запуска:
+    python -m app.server
+    WEB_WORKERS=8 DB_MAX_CONNECTIONS=200 python -m app.server
+"""
+import asyncio
+import logging
+import os
+import uvicorn
+from typing import Any
+from app.settings import settings
+
+logger = logging.getLogger("app.server")
+
+def pool_sizes(max_connections: int, workers: int) -> tuple[int, int]:
+    """
+    Делит доступные соединения между воркерами: pool_size и max_overflow одного воркера
+    не больше настроенных и вместе со служебными соединениями укладываются в лимит.
+    """
+    available = max_connections - settings.DB_RESERVED_CONNECTIONS
+    # Брокер событий на Postgres держит в каждом воркере еще одно соединение вне пула
+    per_worker = available // workers - (1 if settings.ANSWER_STREAM_BACKEND == "postgres" else 0)
+
+    if per_worker < 1:
+        raise RuntimeError(
+            f"Postgres allows {max_connections} connections, not enough for {workers} workers "
+            f"with {settings.DB_RESERVED_CONNECTIONS} reserved"
+        )
+
+    pool_size = min(settings.DB_POOL_SIZE, per_worker)
+    max_overflow = min(settings.DB_MAX_OVERFLOW, per_worker - pool_size)
+    return pool_size, max_overflow
+
+def multi_worker_overrides(workers: int) -> dict[str, Any]:
+    """
+    Настройки, которые нельзя оставить в памяти процесса при нескольких воркерах:
+    событие о новом ответе публикуется только в своем воркере, а удаление из кэша
+    не доходит до остальных и они отдают устаревший вопрос до истечения TTL.
+    """
+    overrides = {}
+    if workers < 2:
+        return overrides
+
+    if settings.ANSWER_STREAM_BACKEND == "memory":
+        logger.warning("ANSWER_STREAM_BACKEND=memory loses events across %s workers, using postgres", workers)
+        overrides["ANSWER_STREAM_BACKEND"] = "postgres"
+    if settings.QUESTION_CACHE_SIZE > 0:
+        logger.warning("In-process question cache cannot be invalidated across %s workers, disabling it", workers)
+        overrides["QUESTION_CACHE_SIZE"] = 0
+
+    return overrides
+
+async def fetch_max_connections() -> int:
+    """
+    Лимит соединений, доступный обычным пользователям Postgres.
+    """
+    import asyncpg
+
+    connection = await asyncpg.connect(
+        user=settings.POSTGRES_USER,
+        password=settings.POSTGRES_PASSWORD,
+        host=settings.POSTGRES_HOST,
+        port=settings.POSTGRES_PORT,
+        database=settings.POSTGRES_DB
+    )
+    try:
+        return await connection.fetchval(
+            "SELECT current_setting('max_connections')::int"
+            " - current_setting('superuser_reserved_connections')::int"
+        )
+    finally:
+        await connection.close()
+
+def main() -> None:
+    logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    workers = settings.WEB_WORKERS or os.cpu_count() or 1
+    for name, value in multi_worker_overrides(workers).items():
+        # Воркеры читают настройки из окружения, а pool_sizes - из текущего процесса
+        setattr(settings, name, value)
+        os.environ[name] = str(value)
+
+    max_connections = settings.DB_MAX_CONNECTIONS or asyncio.run(fetch_max_connections())
+    pool_size, max_overflow = pool_sizes(max_connections, workers)
+
+    # Воркеры запускаются заново и читают настройки из окружения
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+
+    logger.info(
+        "Starting %s workers, pool_size=%s max_overflow=%s per worker (max_connections=%s)",
+        workers, pool_size, max_overflow, max_connections
+    )
+
+    uvicorn.run(
+        "app.main:app",
+        host=settings.WEB_HOST,
+        port=settings.WEB_PORT,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        lifespan="on",
+        proxy_headers=True,
+        forwarded_allow_ips=settings.WEB_FORWARDED_ALLOW_IPS,
+        timeout_keep_alive=settings.WEB_KEEPALIVE_TIMEOUT,
+        timeout_graceful_shutdown=settings.WEB_GRACEFUL_TIMEOUT,
+        # Логи uvicorn уходят в корневой логгер приложения, access-лог пишет RequestContextMiddleware
+        log_config=None,
+        access_log=False
+    )
+
+if __name__ == "__main__":
+    main()
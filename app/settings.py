@@ -8,6 +8,85 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str
     POSTGRES_PORT: int
 
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_ECHO: bool = False
+    # Лимит соединений Postgres для app.server; 0 - узнать у сервера
+    DB_MAX_CONNECTIONS: int = 0
+    # Соединения, оставляемые миграциям, CLI и администраторам
+    DB_RESERVED_CONNECTIONS: int = 10
+
+    # Реплики для чтения через запятую, в формате DB_URL; пусто - все читается из основной БД
+    DB_READ_REPLICA_URLS: str = ""
+    DB_REPLICA_MAX_LAG: float = 10.0
+    DB_REPLICA_CHECK_INTERVAL: float = 5.0
+    # Сколько секунд после записи чтения клиента идут в основную БД
+    DB_READ_YOUR_WRITES_WINDOW: float = 5.0
+
+    # Продакшен-запуск через app.server; WEB_WORKERS = 0 - по числу CPU
+    WEB_HOST: str = "0.0.0.0"
+    WEB_PORT: int = 80
+    WEB_WORKERS: int = 0
+    WEB_KEEPALIVE_TIMEOUT: int = 5
+    WEB_GRACEFUL_TIMEOUT: int = 30
+    WEB_FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_INFO_SAMPLE_RATE: float = 1.0
+
+    QUESTION_CACHE_SIZE: int = 10000
+    QUESTION_CACHE_TTL: float = 60.0
+    # Одновременные одинаковые чтения вопроса и страницы вопросов выполняют один запрос к БД
+    REQUEST_COALESCING: bool = True
+
+    # max-age для GET вопросов; 0 - клиенты и CDN хранят ответ, но перепроверяют через ETag
+    HTTP_CACHE_MAX_AGE: int = 0
+
+    # Сжатие ответов: тела меньше COMPRESSION_MIN_SIZE байт отдаются как есть
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    # memory - в пределах процесса, postgres - между воркерами через LISTEN/NOTIFY
+    ANSWER_STREAM_BACKEND: str = "memory"
+    ANSWER_STREAM_BUFFER: int = 100
+    ANSWER_STREAM_KEEPALIVE: float = 15.0
+
+    # Фоновая очистка удаленных вопросов: ответов за транзакцию, пауза между пакетами и между проверками
+    PURGE_BATCH_SIZE: int = 1000
+    PURGE_BATCH_PAUSE: float = 0.05
+    PURGE_INTERVAL: float = 10.0
+    # Сколько фоновая задача может дописывать текущий пакет при остановке, прежде чем будет отменена
+    BACKGROUND_STOP_TIMEOUT: float = 10.0
+
+    # Отложенная запись ответов: ответ подтверждается сразу, а в БД пишется пакетами
+    # раз в ANSWER_FLUSH_INTERVAL секунд или по накоплении ANSWER_FLUSH_MAX_ROWS строк.
+    # ANSWER_WRITE_DURABILITY: commit - ответ клиенту после фиксации пакета (групповой коммит),
+    # async_commit - то же, но без ожидания сброса WAL на диск (synchronous_commit = off),
+    # buffered - ответ 202 сразу, при падении процесса теряются несброшенные строки,
+    # а после ANSWER_FLUSH_MAX_RETRIES неудачных сбросов подряд ответ отбрасывается
+    ANSWER_WRITE_BEHIND: bool = False
+    ANSWER_WRITE_DURABILITY: str = "commit"
+    ANSWER_FLUSH_INTERVAL: float = 0.02
+    ANSWER_FLUSH_MAX_ROWS: int = 500
+    ANSWER_BUFFER_MAX_PENDING: int = 10000
+    ANSWER_FLUSH_MAX_RETRIES: int = 5
+    ANSWER_ID_BLOCK_SIZE: int = 1000
+
+    # Разрешает миграции, которые перестраивают непустые таблицы под блокировкой; их применяют
+    # вручную при остановленном приложении (см. readme), при старте контейнера они останавливаются
+    MIGRATIONS_ALLOW_OFFLINE: bool = False
+
+    # Секции answers по месяцам: на сколько месяцев вперед создавать и как часто проверять
+    ANSWERS_PARTITIONS_AHEAD: int = 3
+    PARTITION_CHECK_INTERVAL: float = 3600.0
+
     @property
     def DB_URL(self) -> str:
         return (
@@ -16,6 +95,10 @@ class Settings(BaseSettings):
             f"{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
         )
 
+    @property
+    def READ_REPLICA_URLS(self) -> list[str]:
+        return [url.strip() for url in self.DB_READ_REPLICA_URLS.split(",") if url.strip()]
+
     model_config = ConfigDict(env_file=".env")
 
 settings = Settings()
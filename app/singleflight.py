@@ -0,0 +1,57 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, Optional, TypeVar
+from app.metrics import SINGLE_FLIGHT_IN_FLIGHT, SINGLE_FLIGHT_REQUESTS
+from app.settings import settings
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """
+    Объединение одновременных одинаковых чтений: пока выполняется вызов с ключом key,
+    остальные вызовы с тем же ключом не идут в БД, а ждут его результат (или исключение).
+    Результат не сохраняется после завершения - это не кэш. Вызов с ключом None выполняется
+    без объединения.
+    """
+    def __init__(self, name: str, enabled: bool = settings.REQUEST_COALESCING):
+        self.name = name
+        self.enabled = enabled
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Optional[Hashable], fn: Callable[[], Awaitable[T]]) -> T:
+        if not self.enabled or key is None:
+            return await fn()
+
+        while True:
+            call = self._calls.get(key)
+            if call is None:
+                break
+
+            SINGLE_FLIGHT_REQUESTS.inc(flight=self.name, role="follower")
+            try:
+                return await asyncio.shield(call)
+            except asyncio.CancelledError:
+                # Ведущий запрос отменен (клиент отключился) - один из ожидающих выполнит вызов сам
+                if not call.cancelled():
+                    raise
+
+        SINGLE_FLIGHT_REQUESTS.inc(flight=self.name, role="leader")
+        SINGLE_FLIGHT_IN_FLIGHT.inc(flight=self.name)
+        call = asyncio.get_running_loop().create_future()
+        # Исключение без ожидающих не должно попадать в лог как неполученное
+        call.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._calls[key] = call
+
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except BaseException as exc:
+            call.set_exception(exc)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+            SINGLE_FLIGHT_IN_FLIGHT.dec(flight=self.name)
@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.actions.answers_actions import (
+    allocate_answer_ids,
+    check_question_accepts_answers,
+    insert_buffered_answers
+)
+from app.cache import CacheBackend, question_key
+from app.events import ANSWER_CREATED, AnswerBroker, AnswerEvent
+from app.metrics import (
+    ANSWER_BUFFER_DROPPED,
+    ANSWER_BUFFER_FLUSH_ROWS,
+    ANSWER_BUFFER_FLUSH_SECONDS,
+    ANSWER_BUFFER_PENDING
+)
+from app.schemas import AnswerBaseSchema, AnswerSchema
+from app.serialization import dump_answer
+from app.settings import settings
+
+logger = logging.getLogger("app.write_behind")
+
+# Режимы ANSWER_WRITE_DURABILITY
+COMMIT = "commit"
+ASYNC_COMMIT = "async_commit"
+BUFFERED = "buffered"
+DURABILITY_MODES = (COMMIT, ASYNC_COMMIT, BUFFERED)
+
+@dataclass(eq=False)
+class PendingAnswer:
+    """Принятый ответ, ожидающий записи; committed - None в режиме buffered"""
+    row: dict
+    committed: Optional[asyncio.Future] = None
+    attempts: int = 0
+
+class AnswerWriteBuffer:
+    """
+    Отложенная запись ответов: запрос проверяет вопрос, получает id из заранее выделенного блока
+    и ставит ответ в очередь, а фоновая задача пишет очередь одним многострочным INSERT
+    раз в flush_interval секунд или по накоплении flush_max_rows строк.
+    В режимах commit и async_commit запрос ждет фиксации своего пакета (групповой коммит),
+    в режиме buffered получает 202 сразу.
+    """
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        cache: CacheBackend,
+        broker: AnswerBroker,
+        durability: str = settings.ANSWER_WRITE_DURABILITY,
+        flush_interval: float = settings.ANSWER_FLUSH_INTERVAL,
+        flush_max_rows: int = settings.ANSWER_FLUSH_MAX_ROWS,
+        max_pending: int = settings.ANSWER_BUFFER_MAX_PENDING,
+        id_block_size: int = settings.ANSWER_ID_BLOCK_SIZE,
+        max_retries: int = settings.ANSWER_FLUSH_MAX_RETRIES
+    ):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown answer write durability: {durability}")
+
+        self.session_factory = session_factory
+        self.cache = cache
+        self.broker = broker
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self.flush_max_rows = flush_max_rows
+        self.max_pending = max_pending
+        self.id_block_size = id_block_size
+        self.max_retries = max_retries
+        self._pending: list[PendingAnswer] = []
+        self._ids: deque[int] = deque()
+        self._last_id = 0
+        self._id_lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._full = asyncio.Event()
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def _next_id(self, db: AsyncSession) -> int:
+        async with self._id_lock:
+            if not self._ids:
+                ids = await allocate_answer_ids(db, self.id_block_size, after=self._last_id)
+                self._ids.extend(ids)
+                self._last_id = ids[-1]
+            return self._ids.popleft()
+
+    def _check_accepting(self) -> None:
+        if self._closed or len(self._pending) >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Answer write buffer is full.",
+                headers={"Retry-After": "1"}
+            )
+
+    async def submit(
+        self,
+        question_id: int,
+        answer_data: AnswerBaseSchema,
+        db: AsyncSession,
+        request_logger: logging.Logger
+    ) -> tuple[AnswerSchema, bool]:
+        """
+        Принимает ответ в очередь. Возвращает ответ и признак того, что он уже записан в БД.
+        """
+        self._check_accepting()
+        await check_question_accepts_answers(question_id, db, request_logger)
+        row = {
+            "id": await self._next_id(db),
+            "question_id": question_id,
+            "text": answer_data.text,
+            "user_id": answer_data.user_id,
+            "created_at": datetime.now(timezone.utc).replace(tzinfo=None)
+        }
+        # Соединение возвращается в пул до ожидания: иначе ждущие запросы займут весь пул
+        # и фоновой задаче не с чем будет записать пакет
+        await db.close()
+        self._check_accepting()
+
+        pending = PendingAnswer(row)
+        if self.durability != BUFFERED:
+            pending.committed = asyncio.get_running_loop().create_future()
+
+        self._pending.append(pending)
+        ANSWER_BUFFER_PENDING.set(len(self._pending))
+        if len(self._pending) >= self.flush_max_rows:
+            self._full.set()
+
+        if pending.committed is not None:
+            await asyncio.shield(pending.committed)
+
+        return AnswerSchema.model_validate(row), pending.committed is not None
+
+    async def flush(self) -> int:
+        """
+        Записывает накопленные ответы одной транзакцией. Возвращает число записанных.
+        """
+        async with self._flush_lock:
+            batch, self._pending = self._pending, []
+            ANSWER_BUFFER_PENDING.set(0)
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                written, rejected = await self._insert([pending.row for pending in batch])
+            except Exception as exc:
+                if self.durability == BUFFERED:
+                    # Подтвержденные ответы повторяются при следующем сбросе, но не бесконечно:
+                    # иначе недоступная БД копит очередь до отказа в приеме новых ответов
+                    logger.exception("Ошибка записи %s отложенных ответов, повтор при следующем сбросе", len(batch))
+                    retry = []
+                    for pending in batch:
+                        pending.attempts += 1
+                        if pending.attempts < self.max_retries:
+                            retry.append(pending)
+                            continue
+                        ANSWER_BUFFER_DROPPED.inc(reason="retries_exhausted")
+                        logger.error(
+                            "Отложенный ответ id=%s отброшен после %s неудачных сбросов",
+                            pending.row["id"], pending.attempts
+                        )
+                    self._pending[:0] = retry
+                    ANSWER_BUFFER_PENDING.set(len(self._pending))
+                else:
+                    logger.exception("Ошибка записи %s отложенных ответов", len(batch))
+                    for pending in batch:
+                        pending.committed.set_exception(exc)
+                return 0
+
+            ANSWER_BUFFER_FLUSH_SECONDS.observe(time.perf_counter() - started)
+            ANSWER_BUFFER_FLUSH_ROWS.observe(len(written))
+
+            written_ids = {row["id"] for row in written}
+            for pending in batch:
+                if pending.row["id"] in written_ids:
+                    if pending.committed is not None:
+                        pending.committed.set_result(None)
+                    continue
+
+                if pending.row["id"] in rejected:
+                    ANSWER_BUFFER_DROPPED.inc(reason="rejected")
+                    logger.error(
+                        "Отложенный ответ id=%s отброшен: строку отклонила БД (%s)",
+                        pending.row["id"], rejected[pending.row["id"]]
+                    )
+                    if pending.committed is not None:
+                        pending.committed.set_exception(rejected[pending.row["id"]])
+                    continue
+
+                ANSWER_BUFFER_DROPPED.inc(reason="question_deleted")
+                logger.warning(
+                    "Отложенный ответ id=%s отброшен: вопрос id=%s удален",
+                    pending.row["id"], pending.row["question_id"]
+                )
+                if pending.committed is not None:
+                    pending.committed.set_exception(HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Question with id {pending.row['question_id']} does not exist."
+                    ))
+
+            for question_id in {row["question_id"] for row in written}:
+                await self.cache.delete(question_key(question_id))
+            for row in written:
+                await self.broker.publish(AnswerEvent(ANSWER_CREATED, row["question_id"], dump_answer(row), row["id"]))
+
+            return len(written)
+
+    async def _insert(self, rows: list[dict]) -> tuple[list[dict], dict[int, Exception]]:
+        """
+        Записывает ответы одной транзакцией. Если БД отклоняет данные, пакет делится пополам,
+        пока ошибочные строки не останутся по одной: они возвращаются с ошибкой по id,
+        а остальные записываются. Прочие ошибки (например, недоступность БД) пробрасываются.
+        """
+        try:
+            async with self.session_factory() as db:
+                return await insert_buffered_answers(db, rows, synchronous_commit=self.durability == COMMIT), {}
+        except (DataError, IntegrityError) as exc:
+            if len(rows) == 1:
+                return [], {rows[0]["id"]: exc}
+
+        middle = len(rows) // 2
+        written, rejected = await self._insert(rows[:middle])
+        written_tail, rejected_tail = await self._insert(rows[middle:])
+        return written + written_tail, rejected | rejected_tail
+
+    async def _run(self) -> None:
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Ошибка сброса отложенных ответов")
+
+    async def start(self) -> None:
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Останавливает фоновую задачу и записывает все принятые ответы.
+        """
+        self._closed = True
+        self._full.set()
+        if self._task is not None:
+            # Задача не отменяется, чтобы не прервать запись уже изъятого из очереди пакета
+            await self._task
+            self._task = None
+
+        await self.flush()
+        if self._pending:
+            logger.error("При остановке не записано %s отложенных ответов", len(self._pending))
@@ -0,0 +1,105 @@
+"""
+Размер на проводе и затраты CPU для каждой кодировки ответа: gzip, br, zstd
+на нескольких уровнях, а также MessagePack вместо JSON.
+
+Пример запуска:
+    python -m benchmarks.compression --questions 1000 --answers 10
+"""
+import argparse
+import gzip
+import zlib
+from typing import Callable
+from pydantic_core import from_json
+from app.serialization import build_question, dump_questions
+from benchmarks.serialization import make_rows, measure
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+def codecs() -> dict[str, tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+    """
+    Сжатие и распаковка для каждой доступной кодировки и уровня.
+    """
+    result = {
+        f"gzip-{level}": (lambda data, level=level: gzip.compress(data, compresslevel=level, mtime=0), gzip.decompress)
+        for level in (1, 6, 9)
+    }
+    if brotli is not None:
+        result.update({
+            f"br-{quality}": (lambda data, quality=quality: brotli.compress(data, quality=quality), brotli.decompress)
+            for quality in (1, 4, 11)
+        })
+    if zstandard is not None:
+        result.update({
+            f"zstd-{level}": (
+                lambda data, level=level: zstandard.ZstdCompressor(level=level).compress(data),
+                zstandard.ZstdDecompressor().decompress
+            )
+            for level in (1, 3, 9)
+        })
+    return result
+
+def stream_gzip(payload: bytes, chunk_size: int) -> bytes:
+    """
+    Сжатие по кускам со сбросом после каждого, как у потоковых ответов.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    parts = [
+        compressor.compress(payload[offset:offset + chunk_size]) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        for offset in range(0, len(payload), chunk_size)
+    ]
+    return b"".join(parts) + compressor.flush()
+
+def report(name: str, raw: bytes, encoded: bytes, encode_ms: float, decode_ms: float):
+    print(
+        f"  {name:<16}{len(encoded):>12,}{len(encoded) / len(raw):>9.1%}"
+        f"{encode_ms:>11.2f}{len(raw) / 1e6 / (encode_ms / 1000):>10.0f}{decode_ms:>11.2f}"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=1000)
+    parser.add_argument("--answers", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024, help="Размер куска для потокового сжатия")
+    args = parser.parse_args()
+
+    question_rows, answer_rows = make_rows(args.questions, args.answers)
+    payload = dump_questions([build_question(q, answer_rows[q.id]) for q in question_rows])
+
+    print(f"{args.questions} questions x {args.answers} answers, JSON {len(payload):,} bytes, best of {args.repeat}")
+    print(f"  {'encoding':<16}{'bytes':>12}{'ratio':>9}{'encode ms':>11}{'MB/s':>10}{'decode ms':>11}")
+
+    for name, (compress, decompress) in codecs().items():
+        encoded = compress(payload)
+        assert decompress(encoded) == payload
+        report(name, payload, encoded, measure(compress, args.repeat, payload), measure(decompress, args.repeat, encoded))
+
+    streamed = stream_gzip(payload, args.chunk_size)
+    assert gzip.decompress(streamed) == payload
+    report(
+        "gzip-6 stream", payload, streamed,
+        measure(stream_gzip, args.repeat, payload, args.chunk_size),
+        measure(gzip.decompress, args.repeat, streamed)
+    )
+
+    if msgpack is None:
+        print("\nmsgpack не установлен, сравнение с MessagePack пропущено")
+    else:
+        packed = msgpack.packb(from_json(payload))
+        assert msgpack.unpackb(packed) == from_json(payload)
+        convert_ms = measure(lambda data: msgpack.packb(from_json(data)), args.repeat, payload)
+        print(f"\n  msgpack: {len(packed):,} bytes ({len(packed) / len(payload):.1%} of JSON), "
+              f"JSON -> msgpack {convert_ms:.2f} ms, gzip-6 {len(gzip.compress(packed, mtime=0)):,} bytes")
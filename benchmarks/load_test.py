@@ -0,0 +1,309 @@
+"""
+Нагрузочный тест всех эндпоинтов API: пропускная способность и задержки p50/p95/p99.
+
+По умолчанию приложение запускается в процессе (ASGI-транспорт) поверх SQLite-файла.
+Для запущенного сервера (например, docker compose с Postgres) укажите --base-url.
+С --db-url postgresql+asyncpg://... схема пересоздается миграциями alembic, как в продакшене.
+
+Пример запуска:
+    python -m benchmarks.load_test --questions 2000 --answers-per-question pareto:20 --output before.json
+    python -m benchmarks.load_test --output after.json --compare before.json
+    python -m benchmarks.load_test --base-url http://localhost:8001
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+from httpx import ASGITransport, AsyncClient, Response
+
+@dataclass
+class State:
+    """Идентификаторы, созданные при заполнении и в ходе сценариев"""
+    question_ids: list[int] = field(default_factory=list)
+    answer_ids: list[int] = field(default_factory=list)
+    created_question_ids: list[int] = field(default_factory=list)
+    created_answer_ids: list[int] = field(default_factory=list)
+
+Operation = Callable[[AsyncClient, State, random.Random], Awaitable[Response]]
+
+SCENARIOS: dict[str, Operation] = {}
+
+def scenario(name: str):
+    def register(fn: Operation) -> Operation:
+        SCENARIOS[name] = fn
+        return fn
+    return register
+
+@scenario("POST /api/questions/")
+async def create_question(client: AsyncClient, state: State, rnd: random.Random) -> Response:
+    response = await client.post("/api/questions/", json={"text": "Нагрузочный вопрос"})
+    if response.status_code == 201:
+        state.created_question_ids.append(response.json()["id"])
+    return response
+
+@scenario("POST /api/questions/bulk")
+async def create_questions_bulk(client: AsyncClient, state: State, rnd: random.Random) -> Response:
+    return await client.post("/api/questions/bulk", json=[{"text": f"Пакетный вопрос {i}"} for i in range(100)])
+
+@scenario("GET /api/questions/")
+async def get_questions_page(client: AsyncClient, state: State, rnd: random.Random) -> Response:
+    return await client.get("/api/questions/", params={"limit": 100})
+
+@scenario("GET /api/questions/?stream")
+async def stream_questions(client: AsyncClient, state: State, rnd: random.Random) -> Response:
+    return await client.get("/api/questions/", params={"stream": True, "limit": 1000, "answers_limit": 0})
+
+@scenario("GET /api/questions/{id}")
+async def get_question(client: AsyncClient, state: State, rnd: random.Random) -> Response:
+    return await client.get(f"/api/questions/{rnd.choice(state.question_ids)}")
+
+@scenario("GET /api/questions/{id}/answers")
+async def get_question_answers(client: AsyncClient, state: State, rnd: random.Random) -> Response:
+    return await client.get(f"/api/questions/{rnd.choice(state.question_ids)}/answers", params={"limit": 50})
+
+@scenario("GET /api/questions/search")
+async def search_questions(client: AsyncClient, state: State, rnd: random.Random) -> Response:
+    # Частое слово совпадает почти со всеми документами, номер ответа - с немногими
+    query = rnd.choice(["ответ", f"ответ {rnd.randrange(100)}", f"вопрос {rnd.randrange(len(state.question_ids))}"])
+    return await client.get("/api/questions/search", params={"q": query, "limit": 20})
+
+@scenario("POST /api/answers/{question_id}")
+async def create_answer(client: AsyncClient, state: State, rnd: random.Random) -> Response:
+    response = await client.post(
+        f"/api/answers/{rnd.choice(state.question_ids)}",
+        json={"text": "Нагрузочный ответ", "user_id": f"user_{rnd.randrange(1000)}"}
+    )
+    if response.status_code == 201:
+        state.created_answer_ids.append(response.json()["id"])
+    return response
+
+@scenario("POST /api/answers/bulk")
+async def create_answers_bulk(client: AsyncClient, state: State, rnd: random.Random) -> Response:
+    return await client.post("/api/answers/bulk", json=[
+        {"question_id": rnd.choice(state.question_ids), "text": f"Пакетный ответ {i}", "user_id": "user_bulk"}
+        for i in range(100)
+    ])
+
+@scenario("GET /api/answers/{id}")
+async def get_answer(client: AsyncClient, state: State, rnd: random.Random) -> Response:
+    return await client.get(f"/api/answers/{rnd.choice(state.answer_ids)}")
+
+@scenario("GET /api/users/{id}/answers")
+async def get_user_answers(client: AsyncClient, state: State, rnd: random.Random) -> Response:
+    return await client.get(f"/api/users/user_{rnd.randrange(1000)}/answers", params={"limit": 50})
+
+@scenario("DELETE /api/answers/{id}")
+async def delete_answer(client: AsyncClient, state: State, rnd: random.Random) -> Response:
+    return await client.delete(f"/api/answers/{state.created_answer_ids.pop()}")
+
+@scenario("DELETE /api/questions/{id}")
+async def delete_question(client: AsyncClient, state: State, rnd: random.Random) -> Response:
+    return await client.delete(f"/api/questions/{state.created_question_ids.pop()}")
+
+def answers_distribution(spec: str, rnd: random.Random) -> Callable[[], int]:
+    """
+    Распределение числа ответов на вопрос: "fixed:N", "uniform:A-B" или "pareto:MEAN".
+    """
+    kind, _, value = spec.partition(":")
+    if kind == "fixed":
+        return lambda: int(value)
+    if kind == "uniform":
+        low, high = map(int, value.split("-"))
+        return lambda: rnd.randint(low, high)
+    if kind == "pareto":
+        # При alpha = 1.5 среднее распределения Парето равно 3 * xm
+        mean = float(value)
+        return lambda: int(rnd.paretovariate(1.5) * mean / 3)
+    raise ValueError(f"Unknown distribution: {spec}")
+
+async def collect_ids(client: AsyncClient) -> tuple[list[int], list[int]]:
+    """
+    Собирает id вопросов и ответов из потоковой выгрузки: bulk-эндпоинты возвращают только число созданных.
+    """
+    question_ids: dict[int, None] = {}
+    answer_ids = []
+    async with client.stream("GET", "/api/export/") as response:
+        async for line in response.aiter_lines():
+            if line:
+                row = json.loads(line)
+                question_ids[row["question_id"]] = None
+                if row["answer_id"] is not None:
+                    answer_ids.append(row["answer_id"])
+    return list(question_ids), answer_ids
+
+async def seed(client: AsyncClient, state: State, questions: int, answers_per_question: Callable[[], int], rnd: random.Random):
+    """
+    Заполняет базу через bulk-эндпоинты, поэтому работает для любого целевого окружения.
+    """
+    for offset in range(0, questions, 1000):
+        batch = [{"text": f"Вопрос {i}"} for i in range(offset, min(offset + 1000, questions))]
+        await client.post("/api/questions/bulk", json=batch)
+    question_ids, _ = await collect_ids(client)
+
+    answers = [
+        {"question_id": question_id, "text": f"Ответ {i}", "user_id": f"user_{rnd.randrange(1000)}"}
+        for question_id in question_ids
+        for i in range(answers_per_question())
+    ]
+    for offset in range(0, len(answers), 5000):
+        await client.post("/api/answers/bulk", json=answers[offset:offset + 5000])
+    state.question_ids, state.answer_ids = await collect_ids(client)
+
+async def run_scenario(client: AsyncClient, state: State, operation: Operation, requests: int, concurrency: int, seed_value: int) -> dict:
+    """
+    Выполняет requests запросов сценария в concurrency параллельных клиентах.
+    """
+    latencies: list[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker(worker_id: int):
+        nonlocal remaining, errors
+        rnd = random.Random(seed_value + worker_id)
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            response = await operation(client, state, rnd)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50": quantiles[49],
+        "p95": quantiles[94],
+        "p99": quantiles[98],
+    }
+
+def migrate(db_url: str) -> None:
+    """
+    Применяет миграции к БД бенчмарка: секции answers, триггеры и поиск Postgres есть только в них.
+    """
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "-c", "app/alembic.ini", "-x", f"db_url={db_url}", "upgrade", "head"],
+        cwd=Path(__file__).resolve().parent.parent,
+        check=True
+    )
+
+def current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_results(results: dict, baseline: Optional[dict]):
+    print(f"\n{'scenario':<34}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, row in results.items():
+        line = f"{name:<34}{row['rps']:>10.1f}{row['p50']:>10.2f}{row['p95']:>10.2f}{row['p99']:>10.2f}{row['errors']:>8}"
+        if baseline and name in baseline:
+            line += f"   rps {row['rps'] / baseline[name]['rps'] - 1:+.0%}, p95 {row['p95'] / baseline[name]['p95'] - 1:+.0%}"
+        print(line)
+
+async def make_client(args: argparse.Namespace) -> tuple[AsyncClient, Callable[[], Awaitable[None]]]:
+    """
+    Клиент к удаленному серверу или к приложению в процессе поверх отдельной БД.
+    """
+    if args.base_url:
+        client = AsyncClient(base_url=args.base_url, timeout=60)
+        return client, client.aclose
+
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from app.deps import get_db, get_read_db, instrument_engine
+    from app.main import app
+    from app.models import Base
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    engine = create_async_engine(args.db_url, pool_size=args.concurrency, max_overflow=0)
+    instrument_engine(engine.sync_engine)
+    if engine.dialect.name == "postgresql":
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP SCHEMA public CASCADE"))
+            await conn.execute(text("CREATE SCHEMA public"))
+        migrate(args.db_url)
+    else:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def _get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = _get_db
+    app.dependency_overrides[get_read_db] = _get_db
+    client = AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    async def close():
+        await client.aclose()
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+    return client, close
+
+async def main(args: argparse.Namespace):
+    rnd = random.Random(args.seed)
+    state = State()
+    client, close = await make_client(args)
+
+    try:
+        started = time.perf_counter()
+        await seed(client, state, args.questions, answers_distribution(args.answers_per_question, rnd), rnd)
+        print(f"Seeded {len(state.question_ids)} questions / {len(state.answer_ids)} answers in {time.perf_counter() - started:.1f} s")
+
+        selected = [name for name in SCENARIOS if not args.only or any(part in name for part in args.only)]
+        results = {}
+        for name in selected:
+            requests = args.requests
+            if name == "DELETE /api/answers/{id}":
+                requests = min(requests, len(state.created_answer_ids))
+            if name == "DELETE /api/questions/{id}":
+                requests = min(requests, len(state.created_question_ids))
+            if requests == 0:
+                continue
+            results[name] = await run_scenario(client, state, SCENARIOS[name], requests, args.concurrency, args.seed)
+    finally:
+        await close()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"commit": current_commit(), "config": vars(args), "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="URL запущенного сервера; без него приложение запускается в процессе")
+    parser.add_argument("--db-url", default="sqlite+aiosqlite:///./bench.db", help="БД для запуска в процессе")
+    parser.add_argument("--questions", type=int, default=1000)
+    parser.add_argument("--answers-per-question", default="pareto:10", help="fixed:N, uniform:A-B или pareto:MEAN")
+    parser.add_argument("--requests", type=int, default=500, help="Число запросов на сценарий")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="*", help="Запустить только сценарии, содержащие подстроку")
+    parser.add_argument("--output", help="Сохранить результаты в JSON")
+    parser.add_argument("--compare", help="Сравнить с ранее сохраненными результатами")
+    asyncio.run(main(parser.parse_args()))
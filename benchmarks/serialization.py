@@ -0,0 +1,79 @@
+"""
+Микробенчмарк сериализации списка вопросов: прежний путь через model_validate
+и повторную валидацию response_model против сборки словарей из строк и dump_json.
+
+Пример запуска:
+    python -m benchmarks.serialization --questions 10000 --answers 10
+"""
+import argparse
+import json
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from typing import List
+from pydantic import TypeAdapter
+from app.schemas import QuestionSchema
+from app.serialization import build_question, dump_questions
+
+QuestionRow = namedtuple("QuestionRow", "id text created_at")
+AnswerRow = namedtuple("AnswerRow", "id question_id text user_id created_at")
+
+class OrmQuestion:
+    """Заменитель ORM-объекта вопроса с загруженными ответами"""
+    def __init__(self, row: QuestionRow, answers: list[AnswerRow]):
+        self.id, self.text, self.created_at = row
+        self.answers = answers
+
+def make_rows(questions: int, answers: int) -> tuple[list[QuestionRow], dict[int, list[AnswerRow]]]:
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    question_rows = [QuestionRow(i, f"Вопрос {i}", start + timedelta(seconds=i)) for i in range(questions)]
+    answer_rows = {
+        q.id: [
+            AnswerRow(q.id * answers + j, q.id, f"Ответ {j}", f"user_{j}", (start + timedelta(seconds=j)).replace(tzinfo=None))
+            for j in range(answers)
+        ]
+        for q in question_rows
+    }
+    return question_rows, answer_rows
+
+def legacy_path(question_rows, answer_rows) -> bytes:
+    """
+    model_validate каждого ORM-объекта, затем повторная валидация по response_model,
+    преобразование в jsonable-структуру и json.dumps, как делает FastAPI.
+    """
+    adapter = TypeAdapter(List[QuestionSchema])
+    schemas = [QuestionSchema.model_validate(OrmQuestion(q, answer_rows[q.id])) for q in question_rows]
+    validated = adapter.validate_python(schemas, from_attributes=True)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+def fast_path(question_rows, answer_rows) -> bytes:
+    """
+    Сборка словарей из строк без валидации и сериализация в байты pydantic-core.
+    """
+    return dump_questions([build_question(q, answer_rows[q.id]) for q in question_rows])
+
+def measure(fn, repeat: int, *args) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=10_000)
+    parser.add_argument("--answers", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.questions, args.answers)
+    assert json.loads(legacy_path(*rows)) == json.loads(fast_path(*rows))
+
+    legacy_ms = measure(legacy_path, args.repeat, *rows)
+    fast_ms = measure(fast_path, args.repeat, *rows)
+
+    print(f"{args.questions} questions x {args.answers} answers, best of {args.repeat}")
+    print(f"  legacy (validate x2 + json.dumps):   {legacy_ms:8.1f} ms")
+    print(f"  fast   (rows -> dicts + dump_json):  {fast_ms:8.1f} ms  (x{legacy_ms / fast_ms:.1f})")
@@ -3,5 +3,9 @@
 # Применяем миграции
 alembic -c app/alembic.ini upgrade head
 
-# Стартуем сервер
-uvicorn app.main:app --host 0.0.0.0 --port 80 --reload
\ No newline at end of file
+# Стартуем сервер: exec, чтобы SIGTERM от docker доходил до сервера и он завершался корректно
+if [ "$APP_ENV" = "production" ]; then
+    exec python -m app.server
+else
+    exec uvicorn app.main:app --host 0.0.0.0 --port 80 --reload
+fi
\ No newline at end of file
@@ -1,9 +1,12 @@
 import pytest
 from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from app.main import app
 from app.models import Base
-from app.deps import get_db
+from app.deps import get_broker, get_cache, get_db, get_read_db, instrument_engine
+from app.cache import LRUCache
+from app.events import AnswerBroker
 
 @pytest.fixture
 async def get_test_db():
@@ -16,6 +19,13 @@ async def get_test_db():
         future=True
     )
 
+    # SQLite по умолчанию не соблюдает внешние ключи, а ON DELETE CASCADE нужен как в Postgres
+    @event.listens_for(engine.sync_engine, "connect")
+    def _enable_foreign_keys(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    instrument_engine(engine.sync_engine)
+
     async_session = async_sessionmaker(engine, expire_on_commit=False)
 
     # Создание таблиц
@@ -31,14 +41,31 @@ async def get_test_db():
         await conn.run_sync(Base.metadata.drop_all)
 
 @pytest.fixture
-async def override_get_db(get_test_db: AsyncSession):
+def test_cache():
+    """
+    Возвращает пустой кэш вопросов для теста.
+    """
+    return LRUCache(max_size=100, ttl=60)
+
+@pytest.fixture
+def test_broker():
+    """
+    Возвращает брокер событий об ответах без подписчиков.
+    """
+    return AnswerBroker(buffer_size=3)
+
+@pytest.fixture
+async def override_get_db(get_test_db: AsyncSession, test_cache: LRUCache, test_broker: AnswerBroker):
     """
-    Подменяет зависимость get_db на get_test_db.
+    Подменяет зависимости get_db и get_read_db на get_test_db, кэш вопросов на test_cache, брокер на test_broker.
     """
     async def _override():
         yield get_test_db
 
     app.dependency_overrides[get_db] = _override
+    app.dependency_overrides[get_read_db] = _override
+    app.dependency_overrides[get_cache] = lambda: test_cache
+    app.dependency_overrides[get_broker] = lambda: test_broker
     yield
     app.dependency_overrides.clear()
 
@@ -1,6 +1,10 @@
+import functools
 import pytest
 from httpx import AsyncClient
 from dateutil.parser import isoparse
+from sqlalchemy.exc import IntegrityError
+from app import bulk
+from app.actions import answers_actions
 
 @pytest.mark.asyncio
 async def test_create_answer_endpoint(override_get_db, test_client: AsyncClient):
@@ -123,3 +127,74 @@ async def test_delete_answer_endpoint(override_get_db, test_client: AsyncClient)
     error_data = delete_again_resp.json()
     assert error_data["detail"] == f"Answer with id {answer_id} not found."
 
+@pytest.mark.asyncio
+async def test_create_answers_bulk_endpoint(override_get_db, test_client: AsyncClient):
+    """
+    Тест для эндпоинта массового создания ответов.
+    """
+    q_resp = await test_client.post("/api/questions/", json={"text": "Вопрос для импорта"})
+    question_id = q_resp.json()["id"]
+
+    payload = [
+        {"question_id": question_id, "text": "Ответ 1", "user_id": "user_1"},
+        {"question_id": question_id + 1000, "text": "Ответ 2", "user_id": "user_1"},
+        {"question_id": question_id, "text": "Ответ 3"},
+        {"question_id": question_id, "text": "Ответ 4", "user_id": "user_2"},
+    ]
+
+    resp = await test_client.post("/api/answers/bulk", json=payload)
+    assert resp.status_code == 200
+
+    data = resp.json()
+    assert data["created"] == 2
+    assert [e["index"] for e in data["errors"]] == [1, 2]
+    assert data["errors"][0]["detail"] == f"Question with id {question_id + 1000} does not exist."
+    assert "user_id" in data["errors"][1]["detail"]
+
+    ndjson = "\n".join([
+        f'{{"question_id": {question_id}, "text": "Ответ 5", "user_id": "user_3"}}',
+        "{не json}",
+    ])
+    resp = await test_client.post(
+        "/api/answers/bulk",
+        content=ndjson.encode(),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    data = resp.json()
+    assert data["created"] == 1
+    assert data["errors"][0]["index"] == 1
+
+    get_resp = await test_client.get(f"/api/questions/{question_id}")
+    assert [a["text"] for a in get_resp.json()["answers"]] == ["Ответ 1", "Ответ 4", "Ответ 5"]
+
+@pytest.mark.asyncio
+async def test_create_answers_bulk_rejected_chunk(monkeypatch, override_get_db, test_client: AsyncClient):
+    """
+    Тест для массового создания ответов: пачка, отклоненная БД, откатывается и попадает в ошибки
+    поэлементно, а остальные пачки фиксируются.
+    """
+    question_id = (await test_client.post("/api/questions/", json={"text": "Вопрос для импорта"})).json()["id"]
+    record_changes = answers_actions.record_changes
+    calls = 0
+
+    async def failing_record_changes(db, changes):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise IntegrityError("INSERT", {}, Exception("rejected"))
+        await record_changes(db, changes)
+
+    monkeypatch.setattr(answers_actions, "chunked", functools.partial(bulk.chunked, size=2))
+    monkeypatch.setattr(answers_actions, "record_changes", failing_record_changes)
+
+    payload = [{"question_id": question_id, "text": f"Ответ {i}", "user_id": "user_1"} for i in range(5)]
+    resp = await test_client.post("/api/answers/bulk", json=payload)
+    assert resp.status_code == 200
+
+    data = resp.json()
+    assert data["created"] == 3
+    assert [e["index"] for e in data["errors"]] == [2, 3]
+    assert data["errors"][0]["detail"] == "Chunk rejected by database: IntegrityError"
+
+    get_resp = await test_client.get(f"/api/questions/{question_id}")
+    assert [a["text"] for a in get_resp.json()["answers"]] == ["Ответ 0", "Ответ 1", "Ответ 4"]
@@ -0,0 +1,42 @@
+import pytest
+from app.cache import LRUCache
+
+@pytest.mark.asyncio
+async def test_lru_cache_eviction_and_ttl(monkeypatch):
+    """
+    Тест для вытеснения по размеру и истечения времени жизни записей кэша.
+    """
+    now = [0.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: now[0])
+
+    cache = LRUCache(max_size=2, ttl=10)
+    await cache.set("a", b"1")
+    await cache.set("b", b"2")
+    assert await cache.get("a") == b"1"
+
+    await cache.set("c", b"3")
+    assert await cache.get("b") is None
+    assert await cache.get("a") == b"1"
+    assert cache.stats.evictions == 1
+
+    now[0] = 11
+    assert await cache.get("c") is None
+    assert len(cache) == 1
+    assert cache.stats.evictions == 2
+    assert cache.stats.hits == 2
+    assert cache.stats.misses == 2
+
+@pytest.mark.asyncio
+async def test_lru_cache_skips_stale_set():
+    """
+    Тест для поколений ключа: значение, прочитанное до удаления ключа, в кэш не попадает.
+    """
+    cache = LRUCache(max_size=10, ttl=10)
+
+    generation = await cache.generation("a")
+    await cache.delete("a")
+    await cache.set("a", b"old", generation)
+    assert await cache.get("a") is None
+
+    await cache.set("a", b"new", await cache.generation("a"))
+    assert await cache.get("a") == b"new"
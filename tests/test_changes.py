@@ -0,0 +1,46 @@
+import pytest
+from httpx import AsyncClient
+
+@pytest.mark.asyncio
+async def test_change_feed(override_get_db, test_client: AsyncClient):
+    """
+    Тест для ленты изменений: создания и удаления вопросов и ответов отдаются по порядку
+    страницами, курсор пустой страницы позволяет дождаться новых изменений.
+    """
+    question_id = (await test_client.post("/api/questions/", json={"text": "Вопрос"})).json()["id"]
+    answer_id = (await test_client.post(
+        f"/api/answers/{question_id}", json={"text": "Ответ", "user_id": "user_1"}
+    )).json()["id"]
+    await test_client.post("/api/answers/bulk", json=[
+        {"question_id": question_id, "text": "Пакетный", "user_id": "user_2"},
+        {"question_id": question_id + 100, "text": "Ошибочный", "user_id": "user_2"},
+    ])
+    await test_client.delete(f"/api/answers/{answer_id}")
+
+    changes, cursor = [], None
+    while True:
+        resp = await test_client.get("/api/changes/", params={"limit": 2, **({"after": cursor} if cursor else {})})
+        assert resp.status_code == 200
+        cursor = resp.headers["X-Next-Cursor"]
+        if not resp.json():
+            break
+        changes.extend(resp.json())
+
+    assert [(c["entity"], c["action"], c["entity_id"]) for c in changes] == [
+        ("question", "created", question_id),
+        ("answer", "created", answer_id),
+        ("answer", "created", answer_id + 1),
+        ("answer", "deleted", answer_id),
+    ]
+    assert changes[0]["data"]["text"] == "Вопрос"
+    assert changes[2]["data"] | {"created_at": None} == {
+        "id": answer_id + 1, "question_id": question_id, "text": "Пакетный", "user_id": "user_2", "created_at": None
+    }
+    assert changes[3]["data"] is None
+
+    await test_client.delete(f"/api/questions/{question_id}")
+    resp = await test_client.get("/api/changes/", params={"after": cursor})
+    assert [(c["entity"], c["action"], c["question_id"]) for c in resp.json()] == [("question", "deleted", question_id)]
+
+    resp = await test_client.get("/api/changes/", params={"after": "not-a-cursor"})
+    assert resp.status_code == 400
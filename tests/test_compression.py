@@ -0,0 +1,59 @@
+import pytest
+from httpx import AsyncClient
+from app.compression import negotiate_encoding
+from app.representation import MSGPACK_MEDIA_TYPE
+
+def test_negotiate_encoding():
+    """
+    Тест для выбора кодировки по Accept-Encoding с учетом q.
+    """
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip;q=0.5, deflate") == "gzip"
+    assert negotiate_encoding("gzip, *;q=0") == "gzip"
+    assert negotiate_encoding("*;q=0") is None
+
+@pytest.mark.asyncio
+async def test_compressed_and_msgpack_responses(override_get_db, test_client: AsyncClient):
+    """
+    Тест для сжатия крупных ответов, отдачи мелких без сжатия и представления MessagePack.
+    """
+    await test_client.post("/api/questions/bulk", json=[{"text": f"Довольно длинный вопрос номер {i}"} for i in range(50)])
+
+    resp = await test_client.get("/api/questions/", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["vary"]
+    assert int(resp.headers["content-length"]) < len(resp.content)
+    assert len(resp.json()) == 50
+
+    small = await test_client.get("/api/questions/", params={"limit": 1}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+    # Потоковая отдача сжимается по кускам, без Content-Length
+    streamed = await test_client.get(
+        "/api/questions/",
+        params={"stream": True},
+        headers={"Accept-Encoding": "gzip"}
+    )
+    assert streamed.headers["content-encoding"] == "gzip"
+    assert "content-length" not in streamed.headers
+    assert streamed.json() == resp.json()
+
+    raw = await test_client.get("/api/questions/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in raw.headers
+    assert raw.json() == resp.json()
+
+    msgpack = pytest.importorskip("msgpack")
+    packed = await test_client.get(
+        "/api/questions/",
+        headers={"Accept": MSGPACK_MEDIA_TYPE, "Accept-Encoding": "identity"}
+    )
+    assert packed.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    assert msgpack.unpackb(packed.content) == raw.json()
+    assert packed.headers["etag"] != raw.headers["etag"]
+
+    not_modified = await test_client.get(
+        "/api/questions/",
+        headers={"Accept": MSGPACK_MEDIA_TYPE, "If-None-Match": packed.headers["etag"]}
+    )
+    assert not_modified.status_code == 304
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import logging
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timezone
+from app.actions.answers_actions import insert_buffered_answers
+from app.actions.questions_actions import open_answer_stream
+from app.events import AnswerBroker, AnswerEvent
+
+def _parse(chunk: bytes) -> dict:
+    fields = dict(line.split(": ", 1) for line in chunk.decode().strip().split("\n"))
+    fields["data"] = json.loads(fields["data"])
+    return fields
+
+async def _next(events) -> dict:
+    return _parse(await asyncio.wait_for(anext(events), timeout=1))
+
+@pytest.mark.asyncio
+async def test_answer_stream(override_get_db, test_client: AsyncClient, get_test_db: AsyncSession, test_broker: AnswerBroker):
+    """
+    Тест для потока ответов: новые и удаленные ответы, досылка по Last-Event-ID, удаление вопроса.
+    """
+    q_resp = await test_client.post("/api/questions/", json={"text": "Вопрос с потоком"})
+    question_id = q_resp.json()["id"]
+    first = (await test_client.post(f"/api/answers/{question_id}", json={"text": "Ответ 1", "user_id": "user_1"})).json()
+
+    missing = await test_client.get(f"/api/questions/{question_id + 1000}/stream")
+    assert missing.status_code == 404
+
+    logger = logging.getLogger("test")
+    events = await open_answer_stream(question_id, get_test_db, logger, test_broker, last_event_id=0)
+    assert await anext(events) == b": connected\n\n"
+
+    replayed = await _next(events)
+    assert replayed["event"] == "answer_created"
+    assert replayed["id"] == str(first["id"])
+    assert replayed["data"]["text"] == "Ответ 1"
+
+    # Событие об уже досланном ответе отбрасывается как повтор
+    test_broker.dispatch(AnswerEvent("answer_created", question_id, b"{}", first["id"]))
+
+    second = (await test_client.post(f"/api/answers/{question_id}", json={"text": "Ответ 2", "user_id": "user_2"})).json()
+    created = await _next(events)
+    assert created["id"] == str(second["id"])
+    assert created["data"] == second
+
+    await test_client.delete(f"/api/answers/{first['id']}")
+    deleted = await _next(events)
+    assert deleted["event"] == "answer_deleted"
+    assert "id" not in deleted
+    assert deleted["data"] == {"id": first["id"], "question_id": question_id}
+
+    await test_client.delete(f"/api/questions/{question_id}")
+    assert (await _next(events))["event"] == "question_deleted"
+    with pytest.raises(StopAsyncIteration):
+        await anext(events)
+
+@pytest.mark.asyncio
+async def test_answer_stream_replay_and_reset(
+    override_get_db, test_client: AsyncClient, get_test_db: AsyncSession, test_broker: AnswerBroker
+):
+    """
+    Тест для досылки: ответ с меньшим id, зафиксированный после Last-Event-ID (блоки id
+    отложенной записи), досылается, как и пропущенное удаление ответа.
+    """
+    question_id = (await test_client.post("/api/questions/", json={"text": "Вопрос"})).json()["id"]
+    first_id = (await test_client.post(f"/api/answers/{question_id}", json={"text": "Ответ", "user_id": "user_1"})).json()["id"]
+
+    def row(answer_id: int) -> dict:
+        return {
+            "id": answer_id, "question_id": question_id, "text": f"Ответ {answer_id}",
+            "user_id": "user_1", "created_at": datetime.now(timezone.utc)
+        }
+
+    await insert_buffered_answers(get_test_db, [row(first_id + 20)])
+    await insert_buffered_answers(get_test_db, [row(first_id + 10), row(first_id + 15)])
+    await test_client.delete(f"/api/answers/{first_id + 15}")
+
+    events = await open_answer_stream(question_id, get_test_db, logging.getLogger("test"), test_broker, first_id + 20)
+    await anext(events)
+
+    replayed = [await _next(events) for _ in range(3)]
+    assert [(event["event"], event["data"]["id"]) for event in replayed] == [
+        ("answer_created", first_id + 10), ("answer_created", first_id + 15), ("answer_deleted", first_id + 15)
+    ]
+    assert replayed[0]["id"] == str(first_id + 10)
+    assert replayed[0]["data"]["text"] == f"Ответ {first_id + 10}"
+    assert replayed[2]["data"] == {"id": first_id + 15, "question_id": question_id}
+
+    # Повтор уже досланного удаления из брокера отбрасывается, reset отключает поток
+    test_broker.dispatch(AnswerEvent("answer_deleted", question_id, b"{}", first_id + 15))
+    test_broker.reset_all()
+    assert await anext(events) == b"event: reset\ndata: {}\n\n"
+    with pytest.raises(StopAsyncIteration):
+        await anext(events)
+    assert question_id not in test_broker._subscribers
+
+@pytest.mark.asyncio
+async def test_answer_stream_overflow(override_get_db, test_client: AsyncClient, get_test_db: AsyncSession, test_broker: AnswerBroker):
+    """
+    Тест для ограниченного буфера: медленный подписчик отключается событием reset, не блокируя публикацию.
+    """
+    q_resp = await test_client.post("/api/questions/", json={"text": "Популярный вопрос"})
+    question_id = q_resp.json()["id"]
+
+    events = await open_answer_stream(question_id, get_test_db, logging.getLogger("test"), test_broker)
+    await anext(events)
+
+    async with test_broker.subscribe(question_id) as fast:
+        # Буфер тестового брокера - 3 события, публикуется больше
+        for i in range(5):
+            test_broker.dispatch(AnswerEvent("answer_created", question_id, b"{}", i + 1))
+            await fast.get()
+
+        assert not fast.overflowed
+        assert test_broker._subscribers[question_id] == {fast}
+
+    assert await anext(events) == b"event: reset\ndata: {}\n\n"
+    with pytest.raises(StopAsyncIteration):
+        await anext(events)
+    assert question_id not in test_broker._subscribers
@@ -0,0 +1,46 @@
+import csv
+import gzip
+import io
+import json
+import logging
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.actions.export_actions import export_questions
+
+@pytest.mark.asyncio
+async def test_export(override_get_db, get_test_db: AsyncSession, test_client: AsyncClient):
+    """
+    Тест для выгрузки: строка на ответ и одна на вопрос без ответов, NDJSON, CSV и gzip
+    дают одни и те же данные, фильтр по created_at отсекает ранние вопросы.
+    """
+    first = (await test_client.post("/api/questions/", json={"text": "Первый"})).json()
+    deleted = (await test_client.post("/api/questions/", json={"text": "Удаленный"})).json()
+    second = (await test_client.post("/api/questions/", json={"text": "Второй, с запятой"})).json()
+    for text in ("Ответ 1", "Ответ 2"):
+        await test_client.post(f"/api/answers/{first['id']}", json={"text": text, "user_id": "user_1"})
+    await test_client.delete(f"/api/questions/{deleted['id']}")
+
+    resp = await test_client.get("/api/export/")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [(row["question_id"], row["answer_text"]) for row in rows] == [
+        (first["id"], "Ответ 1"), (first["id"], "Ответ 2"), (second["id"], None)
+    ]
+    assert rows[0]["answer_user_id"] == "user_1"
+
+    resp = await test_client.get("/api/export/", params={"format": "csv"})
+    assert resp.headers["content-type"].startswith("text/csv")
+    csv_rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert [(int(row["question_id"]), row["question_text"], row["answer_text"]) for row in csv_rows] == [
+        (first["id"], "Первый", "Ответ 1"), (first["id"], "Первый", "Ответ 2"), (second["id"], "Второй, с запятой", "")
+    ]
+
+    resp = await test_client.get("/api/export/", params={"gzip": True, "created_from": second["created_at"]})
+    assert resp.headers["content-disposition"] == 'attachment; filename="export.ndjson.gz"'
+    rows = [json.loads(line) for line in gzip.decompress(resp.content).splitlines()]
+    assert [row["question_id"] for row in rows] == [second["id"]]
+
+    chunks = [chunk async for chunk in export_questions(get_test_db, logging.getLogger("test"), chunk_size=1)]
+    assert len(chunks) == 3
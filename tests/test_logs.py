@@ -0,0 +1,46 @@
+import json
+import logging
+import pytest
+from httpx import AsyncClient
+from app.logs import JsonFormatter, RequestContextFilter, SamplingFilter, request_id_var
+
+def _record(level: int, msg: str, *args, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("app", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+def test_json_formatter_includes_request_id_and_extra():
+    """
+    Тест для структурированного вывода записи с id запроса и полями из extra.
+    """
+    token = request_id_var.set("req-1")
+    record = _record(logging.INFO, "Получено %s вопросов", 5, duration_ms=1.5)
+    RequestContextFilter().filter(record)
+    request_id_var.reset(token)
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "Получено 5 вопросов"
+    assert entry["level"] == "INFO"
+    assert entry["request_id"] == "req-1"
+    assert entry["duration_ms"] == 1.5
+
+def test_sampling_filter_keeps_warnings():
+    """
+    Тест для сэмплирования записей уровня INFO.
+    """
+    sampler = SamplingFilter(rate=0)
+
+    assert not sampler.filter(_record(logging.INFO, "шум"))
+    assert sampler.filter(_record(logging.WARNING, "важно"))
+
+@pytest.mark.asyncio
+async def test_request_id_header(override_get_db, test_client: AsyncClient):
+    """
+    Тест для передачи id запроса через заголовок X-Request-ID.
+    """
+    response = await test_client.get("/api/questions/", headers={"X-Request-ID": "abc"})
+    assert response.headers["X-Request-ID"] == "abc"
+
+    response = await test_client.get("/api/questions/")
+    assert len(response.headers["X-Request-ID"]) == 32
@@ -0,0 +1,93 @@
+import asyncio
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.deps import InstrumentedPool
+from app.metrics import (
+    DB_POOL_CHECKOUT_SECONDS,
+    DB_POOL_WAITING,
+    DB_QUERY_SECONDS,
+    HTTP_REQUEST_DB_QUERIES,
+    HTTP_REQUEST_SECONDS,
+    HTTP_REQUESTS_IN_FLIGHT
+)
+
+@pytest.mark.asyncio
+async def test_instrumented_pool_records_checkout():
+    """
+    Тест для замера ожидания соединения из пула.
+    """
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=InstrumentedPool, pool_size=1)
+    checkouts_before = DB_POOL_CHECKOUT_SECONDS.count()
+
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        assert engine.pool.checkedout() == 1
+
+    assert DB_POOL_CHECKOUT_SECONDS.count() == checkouts_before + 1
+    assert DB_POOL_WAITING.value() == 0
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_instrumented_pool_counts_only_waiters():
+    """
+    Тест для числа ожидающих: выдача свободного соединения не считается, ожидание при занятом пуле считается.
+    """
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:", poolclass=InstrumentedPool, pool_size=2, max_overflow=0, pool_timeout=5
+    )
+    waiting_before = DB_POOL_WAITING.value()
+
+    async with engine.connect() as first, engine.connect() as second:
+        assert engine.pool.checkedout() == 2
+        assert DB_POOL_WAITING.value() == waiting_before
+
+        async def checkout():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        waiter = asyncio.create_task(checkout())
+        while DB_POOL_WAITING.value() == waiting_before:
+            await asyncio.sleep(0.01)
+        assert DB_POOL_WAITING.value() == waiting_before + 1
+        assert not waiter.done()
+
+    await asyncio.wait_for(waiter, 5)
+    assert DB_POOL_WAITING.value() == waiting_before
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(test_client: AsyncClient):
+    """
+    Тест для эндпоинта метрик.
+    """
+    response = await test_client.get("/metrics")
+    assert response.status_code == 200
+    assert "# TYPE db_pool_checkout_seconds histogram" in response.text
+    assert "db_pool_connections_in_use 0" in response.text
+
+@pytest.mark.asyncio
+async def test_request_metrics_per_route(override_get_db, test_client: AsyncClient):
+    """
+    Тест для метрик времени, числа запросов к БД и сериализации по маршруту.
+    """
+    labels = {"method": "GET", "route": "/api/questions/{question_id}"}
+    requests_before = HTTP_REQUEST_SECONDS.count(status="200", **labels)
+    db_queries_before = HTTP_REQUEST_DB_QUERIES.count(**labels)
+
+    q_resp = await test_client.post("/api/questions/", json={"text": "Вопрос"})
+    question_id = q_resp.json()["id"]
+
+    queries_before = DB_QUERY_SECONDS.count()
+    await test_client.get(f"/api/questions/{question_id}")
+    assert DB_QUERY_SECONDS.count() > queries_before
+
+    assert HTTP_REQUEST_SECONDS.count(status="200", **labels) == requests_before + 1
+    assert HTTP_REQUEST_DB_QUERIES.count(**labels) == db_queries_before + 1
+    assert HTTP_REQUESTS_IN_FLIGHT.value() == 0
+
+    response = await test_client.get("/metrics")
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/questions/{question_id}",status="200"}' in response.text
+    assert "http_request_db_queries_bucket" in response.text
+    assert "http_request_serialization_seconds_sum" in response.text
@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.metrics import PURGE_BACKLOG_ANSWERS, PURGE_BACKLOG_QUESTIONS, PURGE_ROWS
+from app.models import Answer, Question, UserStats
+from app.purge import QuestionPurger
+
+@pytest.mark.asyncio
+async def test_soft_delete_and_purge(override_get_db, get_test_db: AsyncSession, test_client: AsyncClient):
+    """
+    Тест для удаления вопроса: он сразу пропадает из всех чтений, а ответы и строка
+    вопроса удаляются фоновой очисткой пакетами.
+    """
+    q_resp = await test_client.post("/api/questions/", json={"text": "Удаляемый вопрос про кэш"})
+    question_id = q_resp.json()["id"]
+    kept_resp = await test_client.post("/api/questions/", json={"text": "Оставшийся вопрос"})
+    kept_id = kept_resp.json()["id"]
+
+    payload = [{"question_id": question_id, "text": f"Ответ {i}", "user_id": "user_1"} for i in range(5)]
+    payload.append({"question_id": kept_id, "text": "Ответ", "user_id": "user_1"})
+    await test_client.post("/api/answers/bulk", json=payload)
+    answer_id = (await test_client.get(f"/api/questions/{question_id}/answers")).json()[0]["id"]
+
+    resp = await test_client.delete(f"/api/questions/{question_id}")
+    assert resp.status_code == 204
+
+    # Ответы еще в таблице, но не видны ни через один эндпоинт
+    assert await get_test_db.scalar(select(func.count(Answer.id))) == 6
+    assert [q["id"] for q in (await test_client.get("/api/questions/")).json()] == [kept_id]
+    assert (await test_client.get("/api/questions/search", params={"q": "кэш"})).json() == []
+    assert (await test_client.get(f"/api/questions/{question_id}/answers")).status_code == 404
+    assert (await test_client.get(f"/api/answers/{answer_id}")).status_code == 404
+    assert (await test_client.delete(f"/api/answers/{answer_id}")).status_code == 404
+    assert len((await test_client.get("/api/users/user_1/answers")).json()) == 1
+
+    resp = await test_client.post(f"/api/answers/{question_id}", json={"text": "Поздний ответ", "user_id": "user_1"})
+    assert resp.status_code == 400
+
+    purger = QuestionPurger(async_sessionmaker(get_test_db.bind, expire_on_commit=False), batch_size=2, batch_pause=0)
+    assert await purger.update_backlog() == 1
+    assert PURGE_BACKLOG_QUESTIONS.value() == 1
+    assert PURGE_BACKLOG_ANSWERS.value() == 5
+
+    # Три пакета ответов (2 + 2 + 1), в последнем удаляется и строка вопроса
+    assert await purger.purge() == 6
+    assert PURGE_BACKLOG_QUESTIONS.value() == 0
+    assert PURGE_BACKLOG_ANSWERS.value() == 0
+
+    assert await get_test_db.scalar(select(func.count(Answer.id))) == 1
+    assert await get_test_db.scalar(select(Question.id).where(Question.id == question_id)) is None
+    assert await get_test_db.scalar(select(UserStats.answer_count).where(UserStats.user_id == "user_1")) == 1
+    assert await purger.purge() == 0
+
+@pytest.mark.asyncio
+async def test_purger_stops_between_batches(override_get_db, get_test_db: AsyncSession, test_client: AsyncClient):
+    """
+    Тест для остановки очистки: stop дожидается текущего пакета, не ждет паузы между пакетами
+    и не начинает следующий.
+    """
+    question_id = (await test_client.post("/api/questions/", json={"text": "Удаляемый вопрос"})).json()["id"]
+    await test_client.post("/api/answers/bulk", json=[
+        {"question_id": question_id, "text": f"Ответ {i}", "user_id": "user_1"} for i in range(4)
+    ])
+    await test_client.delete(f"/api/questions/{question_id}")
+
+    purger = QuestionPurger(async_sessionmaker(get_test_db.bind, expire_on_commit=False), batch_size=2, batch_pause=60)
+    purged = PURGE_ROWS.value()
+    await purger.start()
+    while PURGE_ROWS.value() == purged:
+        await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(purger.stop(), timeout=1)
+
+    assert PURGE_ROWS.value() == purged + 2
+    assert await get_test_db.scalar(select(func.count(Answer.id))) == 2
@@ -1,6 +1,11 @@
+import logging
 import pytest
 from httpx import AsyncClient
 from dateutil.parser import isoparse
+from datetime import timedelta
+from sqlalchemy import insert, update
+from app.models import Answer, Question
+from app.actions.questions_actions import reconcile_question_counters
 
 @pytest.mark.asyncio
 async def test_create_question_endpoint(override_get_db, test_client: AsyncClient):
@@ -123,6 +128,9 @@ async def test_delete_question_endpoint(override_get_db, test_client: AsyncClien
     created_question = create_resp.json()
     question_id = created_question["id"]
 
+    answer_resp = await test_client.post(f"/api/answers/{question_id}", json={"text": "Ответ", "user_id": "user_1"})
+    answer_id = answer_resp.json()["id"]
+
     delete_resp = await test_client.delete(f"/api/questions/{question_id}")
     assert delete_resp.status_code == 204
     assert delete_resp.content in (b"", None)
@@ -130,8 +138,308 @@ async def test_delete_question_endpoint(override_get_db, test_client: AsyncClien
     get_resp = await test_client.get(f"/api/questions/{question_id}")
     assert get_resp.status_code == 404
 
+    get_answer_resp = await test_client.get(f"/api/answers/{answer_id}")
+    assert get_answer_resp.status_code == 404
+
     delete_again_resp = await test_client.delete(f"/api/questions/{question_id}")
     assert delete_again_resp.status_code == 404
     data = delete_again_resp.json()
     assert data["detail"] == f"Question with id {question_id} not found."
 
+@pytest.mark.asyncio
+async def test_get_questions_list_pagination(override_get_db, test_client: AsyncClient):
+    """
+    Тест для постраничного получения вопросов по курсору.
+    """
+    for i in range(5):
+        resp = await test_client.post("/api/questions/", json={"text": f"Вопрос {i}"})
+        assert resp.status_code == 201
+
+    first_page = await test_client.get("/api/questions/", params={"limit": 3})
+    assert first_page.status_code == 200
+    assert [q["text"] for q in first_page.json()] == ["Вопрос 0", "Вопрос 1", "Вопрос 2"]
+
+    cursor = first_page.headers["X-Next-Cursor"]
+
+    second_page = await test_client.get("/api/questions/", params={"limit": 3, "after": cursor})
+    assert second_page.status_code == 200
+    assert [q["text"] for q in second_page.json()] == ["Вопрос 3", "Вопрос 4"]
+    assert "X-Next-Cursor" not in second_page.headers
+
+    bad_cursor = await test_client.get("/api/questions/", params={"after": "не-курсор"})
+    assert bad_cursor.status_code == 400
+    assert bad_cursor.json()["detail"] == "Invalid cursor."
+
+@pytest.mark.asyncio
+async def test_get_questions_list_answers_limit_and_stream(override_get_db, test_client: AsyncClient):
+    """
+    Тест для ограничения вложенных ответов и потоковой отдачи списка вопросов.
+    """
+    q_resp = await test_client.post("/api/questions/", json={"text": "Вопрос с ответами"})
+    question_id = q_resp.json()["id"]
+    await test_client.post("/api/questions/", json={"text": "Вопрос без ответов"})
+
+    for i in range(3):
+        a_resp = await test_client.post(f"/api/answers/{question_id}", json={"text": f"Ответ {i}", "user_id": "user_1"})
+        assert a_resp.status_code == 201
+
+    capped = await test_client.get("/api/questions/", params={"answers_limit": 2})
+    assert [a["text"] for a in capped.json()[0]["answers"]] == ["Ответ 0", "Ответ 1"]
+
+    omitted = await test_client.get("/api/questions/", params={"answers_limit": 0})
+    assert omitted.json()[0]["answers"] == []
+
+    streamed = await test_client.get("/api/questions/", params={"stream": True})
+    assert streamed.status_code == 200
+    data = streamed.json()
+    assert [q["text"] for q in data] == ["Вопрос с ответами", "Вопрос без ответов"]
+    assert len(data[0]["answers"]) == 3
+    assert data[1]["answers"] == []
+
+@pytest.mark.asyncio
+async def test_get_question_cache_invalidation(override_get_db, test_client: AsyncClient, test_cache):
+    """
+    Тест для кэширования вопроса и сброса кэша при изменении ответов.
+    """
+    q_resp = await test_client.post("/api/questions/", json={"text": "Кэшируемый вопрос"})
+    question_id = q_resp.json()["id"]
+
+    first = await test_client.get(f"/api/questions/{question_id}")
+    second = await test_client.get(f"/api/questions/{question_id}")
+    assert first.json() == second.json()
+    assert test_cache.stats.misses == 1
+    assert test_cache.stats.hits == 1
+
+    a_resp = await test_client.post(f"/api/answers/{question_id}", json={"text": "Новый ответ", "user_id": "user_1"})
+    answer_id = a_resp.json()["id"]
+
+    after_create = await test_client.get(f"/api/questions/{question_id}")
+    assert [a["id"] for a in after_create.json()["answers"]] == [answer_id]
+
+    await test_client.delete(f"/api/answers/{answer_id}")
+    after_delete = await test_client.get(f"/api/questions/{question_id}")
+    assert after_delete.json()["answers"] == []
+
+    await test_client.delete(f"/api/questions/{question_id}")
+    after_question_delete = await test_client.get(f"/api/questions/{question_id}")
+    assert after_question_delete.status_code == 404
+
+@pytest.mark.asyncio
+async def test_get_question_conditional_requests(override_get_db, test_client: AsyncClient, test_cache):
+    """
+    Тест для ETag и Last-Modified: 304 для неизменившихся вопроса и страницы, 200 после изменения ответов.
+    """
+    q_resp = await test_client.post("/api/questions/", json={"text": "Опрашиваемый вопрос"})
+    question_id = q_resp.json()["id"]
+    a_resp = await test_client.post(f"/api/answers/{question_id}", json={"text": "Ответ", "user_id": "user_1"})
+
+    resp = await test_client.get(f"/api/questions/{question_id}")
+    etag = resp.headers["ETag"]
+    last_modified = resp.headers["Last-Modified"]
+    assert resp.headers["Cache-Control"] == "public, no-cache"
+
+    # Из кэша и из БД получаются одинаковые валидаторы
+    for _ in range(2):
+        resp = await test_client.get(f"/api/questions/{question_id}", headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+        assert resp.content == b""
+        assert resp.headers["ETag"] == etag
+        await test_cache.clear()
+
+    resp = await test_client.get(f"/api/questions/{question_id}", headers={"If-Modified-Since": last_modified})
+    assert resp.status_code == 304
+
+    limited = await test_client.get(f"/api/questions/{question_id}", params={"answers_limit": 1})
+    assert limited.headers["ETag"] != etag
+
+    list_resp = await test_client.get("/api/questions/")
+    list_etag = list_resp.headers["ETag"]
+    resp = await test_client.get("/api/questions/", headers={"If-None-Match": list_etag})
+    assert resp.status_code == 304
+
+    await test_client.delete(f"/api/answers/{a_resp.json()['id']}")
+
+    resp = await test_client.get(f"/api/questions/{question_id}", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.json()["answers"] == []
+    assert resp.headers["ETag"] != etag
+
+    resp = await test_client.get("/api/questions/", headers={"If-None-Match": list_etag})
+    assert resp.status_code == 200
+
+@pytest.mark.asyncio
+async def test_create_questions_bulk_endpoint(override_get_db, test_client: AsyncClient):
+    """
+    Тест для эндпоинта массового создания вопросов.
+    """
+    resp = await test_client.post("/api/questions/bulk", json=[{"text": "Первый"}, {}, {"text": "Второй"}])
+    assert resp.status_code == 200
+
+    data = resp.json()
+    assert data["created"] == 2
+    assert [e["index"] for e in data["errors"]] == [1]
+
+    bad_resp = await test_client.post("/api/questions/bulk", json={"text": "Не массив"})
+    assert bad_resp.status_code == 400
+
+    list_resp = await test_client.get("/api/questions/")
+    assert sorted(q["text"] for q in list_resp.json()) == ["Второй", "Первый"]
+
+@pytest.mark.asyncio
+async def test_search_questions_endpoint(override_get_db, test_client: AsyncClient):
+    """
+    Тест для полнотекстового поиска по вопросам и ответам.
+    """
+    q1 = (await test_client.post("/api/questions/", json={"text": "Как приготовить борщ?"})).json()
+    q2 = (await test_client.post("/api/questions/", json={"text": "Что посмотреть вечером?"})).json()
+    await test_client.post("/api/questions/", json={"text": "Какая погода завтра?"})
+    await test_client.post(f"/api/answers/{q2['id']}", json={"text": "Фильм про борщ и кухню", "user_id": "user_1"})
+
+    resp = await test_client.get("/api/questions/search", params={"q": "борщ"})
+    assert resp.status_code == 200
+
+    data = resp.json()
+    assert {item["id"] for item in data} == {q1["id"], q2["id"]}
+
+    by_id = {item["id"]: item for item in data}
+    assert by_id[q1["id"]]["source"] == "question"
+    assert by_id[q1["id"]]["headline"] == "Как приготовить <b>борщ</b>?"
+    assert by_id[q2["id"]]["source"] == "answer"
+    assert "<b>борщ</b>" in by_id[q2["id"]]["headline"]
+    isoparse(by_id[q1["id"]]["created_at"])
+
+    page = await test_client.get("/api/questions/search", params={"q": "борщ", "limit": 1, "offset": 1})
+    assert len(page.json()) == 1
+
+    await test_client.delete(f"/api/questions/{q2['id']}")
+    resp = await test_client.get("/api/questions/search", params={"q": "борщ"})
+    assert [item["id"] for item in resp.json()] == [q1["id"]]
+
+    empty = await test_client.get("/api/questions/search", params={"q": "?!"})
+    assert empty.json() == []
+
+@pytest.mark.asyncio
+async def test_question_answer_counters(override_get_db, test_client: AsyncClient, get_test_db):
+    """
+    Тест для счетчика ответов, времени последнего ответа и их пересчета.
+    """
+    question_id = (await test_client.post("/api/questions/", json={"text": "Вопрос со счетчиком"})).json()["id"]
+
+    first = (await test_client.post(f"/api/answers/{question_id}", json={"text": "Первый", "user_id": "u"})).json()
+    second = (await test_client.post(f"/api/answers/{question_id}", json={"text": "Второй", "user_id": "u"})).json()
+    await test_client.post("/api/answers/bulk", json=[{"question_id": question_id, "text": "Третий", "user_id": "u"}])
+
+    resp = await test_client.get("/api/questions/", params={"summary": True})
+    summary = resp.json()[0]
+    assert "answers" not in summary
+    assert summary["answer_count"] == 3
+    assert isoparse(summary["last_answer_at"]) >= isoparse(second["created_at"])
+
+    await test_client.delete(f"/api/answers/{first['id']}")
+    summary = (await test_client.get("/api/questions/", params={"summary": True})).json()[0]
+    assert summary["answer_count"] == 2
+
+    # Рассинхронизация счетчика исправляется пересчетом
+    await get_test_db.execute(update(Question).values(answer_count=100, last_answer_at=None))
+    await get_test_db.commit()
+
+    fixed = await reconcile_question_counters(db=get_test_db, logger=logging.getLogger("test"), batch_size=1)
+    assert fixed == 1
+
+    summary = (await test_client.get("/api/questions/", params={"summary": True, "stream": True})).json()[0]
+    assert summary["answer_count"] == 2
+    assert summary["last_answer_at"] is not None
+
+@pytest.mark.asyncio
+async def test_get_question_answers_pagination(override_get_db, test_client: AsyncClient):
+    """
+    Тест для постраничного получения ответов на вопрос и первой страницы вместе с вопросом.
+    """
+    question_id = (await test_client.post("/api/questions/", json={"text": "Популярный вопрос"})).json()["id"]
+    await test_client.post("/api/answers/bulk", json=[
+        {"question_id": question_id, "text": f"Ответ {i}", "user_id": "user_1"} for i in range(5)
+    ])
+
+    first = await test_client.get(f"/api/questions/{question_id}", params={"answers_limit": 2})
+    assert first.status_code == 200
+    assert [a["text"] for a in first.json()["answers"]] == ["Ответ 0", "Ответ 1"]
+
+    rest = await test_client.get(
+        f"/api/questions/{question_id}/answers",
+        params={"after": first.headers["X-Next-Cursor"], "limit": 2}
+    )
+    assert [a["text"] for a in rest.json()] == ["Ответ 2", "Ответ 3"]
+
+    last = await test_client.get(
+        f"/api/questions/{question_id}/answers",
+        params={"after": rest.headers["X-Next-Cursor"], "limit": 2}
+    )
+    assert [a["text"] for a in last.json()] == ["Ответ 4"]
+    assert "X-Next-Cursor" not in last.headers
+
+    newest = await test_client.get(f"/api/questions/{question_id}/answers", params={"order": "desc", "limit": 3})
+    assert [a["text"] for a in newest.json()] == ["Ответ 4", "Ответ 3", "Ответ 2"]
+
+    older = await test_client.get(
+        f"/api/questions/{question_id}/answers",
+        params={"order": "desc", "after": newest.headers["X-Next-Cursor"]}
+    )
+    assert [a["text"] for a in older.json()] == ["Ответ 1", "Ответ 0"]
+
+    full = await test_client.get(f"/api/questions/{question_id}")
+    assert len(full.json()["answers"]) == 5
+
+    missing = await test_client.get(f"/api/questions/{question_id + 1000}/answers")
+    assert missing.status_code == 404
+    assert missing.json()["detail"] == f"Question with id {question_id + 1000} not found."
+
+@pytest.mark.asyncio
+async def test_answers_window_tolerates_clock_skew(override_get_db, get_test_db, test_client: AsyncClient):
+    """
+    Тест для окна created_at, по которому отсекаются секции answers: ответ с временем
+    немного раньше вопроса (часы воркеров расходятся) не теряется.
+    """
+    q_resp = await test_client.post("/api/questions/", json={"text": "Вопрос"})
+    question = q_resp.json()
+    created_at = isoparse(question["created_at"]).replace(tzinfo=None)
+
+    await get_test_db.execute(insert(Answer), [
+        {"question_id": question["id"], "text": "Раньше вопроса", "user_id": "user_1", "created_at": created_at - timedelta(minutes=5)},
+        {"question_id": question["id"], "text": "После вопроса", "user_id": "user_1", "created_at": created_at + timedelta(minutes=5)},
+    ])
+    await get_test_db.commit()
+
+    full = await test_client.get(f"/api/questions/{question['id']}")
+    assert [a["text"] for a in full.json()["answers"]] == ["Раньше вопроса", "После вопроса"]
+
+    page = await test_client.get(f"/api/questions/{question['id']}/answers", params={"order": "desc", "limit": 1})
+    assert [a["text"] for a in page.json()] == ["После вопроса"]
+    rest = await test_client.get(
+        f"/api/questions/{question['id']}/answers",
+        params={"order": "desc", "after": page.headers["X-Next-Cursor"]}
+    )
+    assert [a["text"] for a in rest.json()] == ["Раньше вопроса"]
+
+    listed = await test_client.get("/api/questions/")
+    assert len(listed.json()[0]["answers"]) == 2
+
+@pytest.mark.asyncio
+async def test_answers_visible_with_stale_counters(override_get_db, get_test_db, test_client: AsyncClient):
+    """
+    Тест для чтения ответов при разошедшихся счетчиках: пустой last_answer_at
+    (например, до сверки счетчиков) не скрывает ответы.
+    """
+    question_id = (await test_client.post("/api/questions/", json={"text": "Вопрос"})).json()["id"]
+    await test_client.post(f"/api/answers/{question_id}", json={"text": "Ответ", "user_id": "user_1"})
+
+    await get_test_db.execute(update(Question).values(answer_count=0, last_answer_at=None))
+    await get_test_db.commit()
+
+    full = await test_client.get(f"/api/questions/{question_id}")
+    assert [a["text"] for a in full.json()["answers"]] == ["Ответ"]
+
+    page = await test_client.get(f"/api/questions/{question_id}/answers")
+    assert [a["text"] for a in page.json()] == ["Ответ"]
+
+    listed = await test_client.get("/api/questions/")
+    assert [a["text"] for a in listed.json()[0]["answers"]] == ["Ответ"]
@@ -0,0 +1,80 @@
+import time
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.requests import Request
+from app import deps
+from app.main import app
+from app.middleware import ReadYourWritesMiddleware
+from app.replicas import LAST_WRITE_COOKIE, Replica, ReplicaSet
+
+def _request(cookie: str = "") -> Request:
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+@pytest.mark.asyncio
+async def test_replica_selection_and_health():
+    """
+    Тест для выбора реплики: наименее загруженная исправная, по кругу при равной загрузке,
+    недоступная реплика выводится из ротации.
+    """
+    first = Replica("first", create_async_engine("sqlite+aiosqlite:///:memory:"))
+    second = Replica("second", create_async_engine("sqlite+aiosqlite:///:memory:"))
+    broken = Replica("broken", create_async_engine("sqlite+aiosqlite:////nonexistent/dir/replica.db"))
+    replicas = ReplicaSet([first, second, broken])
+
+    await replicas.check_all()
+    assert first.healthy and second.healthy
+    assert not broken.healthy
+
+    # Без нагрузки реплики чередуются
+    assert [replicas.acquire() for _ in range(4)] == [first, second, first, second]
+    assert (first.in_use, second.in_use) == (2, 2)
+
+    replicas.release(first)
+    replicas.release(first)
+    assert replicas.acquire() is first
+    assert replicas.acquire() is first
+
+    second.mark(healthy=False)
+    first.mark(healthy=False)
+    assert replicas.acquire() is None
+
+    await replicas.stop()
+
+@pytest.mark.asyncio
+async def test_read_your_writes(monkeypatch, override_get_db, test_client: AsyncClient):
+    """
+    Тест для read-your-writes: после записи клиент получает cookie, и его чтения
+    в течение окна идут в основную БД, а не в реплику.
+    """
+    replica = Replica("replica-0", create_async_engine("sqlite+aiosqlite:///:memory:"))
+    monkeypatch.setattr(deps, "read_replicas", ReplicaSet([replica]))
+
+    async def read_session_info(request: Request) -> dict:
+        sessions = deps.get_read_db(request)
+        session = await sessions.__anext__()
+        info = dict(session.info)
+        await sessions.aclose()
+        return info
+
+    assert await read_session_info(_request()) == {"replica": "replica-0"}
+    assert replica.in_use == 0
+    assert await read_session_info(_request(f"{LAST_WRITE_COOKIE}={time.time()}")) == {"read_your_writes": True}
+    assert await read_session_info(_request(f"{LAST_WRITE_COOKIE}={time.time() - 60}")) == {"replica": "replica-0"}
+
+    transport = ASGITransport(app=ReadYourWritesMiddleware(app, window=5))
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post("/api/questions/", json={"text": "Вопрос"})
+        assert resp.status_code == 201
+        assert "Max-Age=5" in resp.headers["set-cookie"]
+        assert LAST_WRITE_COOKIE in client.cookies
+
+        resp = await client.get(f"/api/questions/{resp.json()['id']}")
+        assert "set-cookie" not in resp.headers
+
+        resp = await client.post("/api/answers/999999", json={"text": "Ответ", "user_id": "user"})
+        assert resp.status_code == 400
+        assert "set-cookie" not in resp.headers
+
+    await replica.engine.dispose()
@@ -0,0 +1,36 @@
+import pytest
+from app.server import multi_worker_overrides, pool_sizes
+from app.settings import settings
+
+def test_pool_sizes(monkeypatch):
+    """
+    Тест для распределения соединений Postgres между воркерами.
+    """
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 10)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 10)
+    monkeypatch.setattr(settings, "DB_RESERVED_CONNECTIONS", 10)
+    monkeypatch.setattr(settings, "ANSWER_STREAM_BACKEND", "memory")
+
+    assert pool_sizes(max_connections=500, workers=4) == (10, 10)
+    assert pool_sizes(max_connections=97, workers=8) == (10, 0)
+    assert pool_sizes(max_connections=50, workers=8) == (5, 0)
+
+    monkeypatch.setattr(settings, "ANSWER_STREAM_BACKEND", "postgres")
+    assert pool_sizes(max_connections=50, workers=8) == (4, 0)
+
+    with pytest.raises(RuntimeError):
+        pool_sizes(max_connections=20, workers=16)
+
+def test_multi_worker_overrides(monkeypatch):
+    """
+    Тест для запуска нескольких воркеров: брокер в памяти заменяется на postgres, кэш отключается.
+    """
+    monkeypatch.setattr(settings, "ANSWER_STREAM_BACKEND", "memory")
+    monkeypatch.setattr(settings, "QUESTION_CACHE_SIZE", 10000)
+
+    assert multi_worker_overrides(1) == {}
+    assert multi_worker_overrides(4) == {"ANSWER_STREAM_BACKEND": "postgres", "QUESTION_CACHE_SIZE": 0}
+
+    monkeypatch.setattr(settings, "ANSWER_STREAM_BACKEND", "postgres")
+    monkeypatch.setattr(settings, "QUESTION_CACHE_SIZE", 0)
+    assert multi_worker_overrides(4) == {}
@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+from httpx import AsyncClient
+from app.metrics import SINGLE_FLIGHT_REQUESTS
+from app.singleflight import SingleFlight
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_result_and_errors():
+    """
+    Тест для объединения вызовов: одновременные вызовы с одним ключом выполняют функцию один раз,
+    получают ее результат или исключение; после отмены ведущего вызов выполняет ожидающий.
+    """
+    flight = SingleFlight("test", enabled=True)
+    release = asyncio.Event()
+    calls = []
+
+    async def load(value):
+        calls.append(value)
+        await release.wait()
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    tasks = [asyncio.create_task(flight.do("key", lambda i=i: load(i))) for i in range(5)]
+    other = asyncio.create_task(flight.do("other", lambda: load("other")))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*tasks) == [0] * 5
+    assert await other == "other"
+    assert calls == [0, "other"]
+
+    release.clear()
+    error = ValueError("boom")
+    tasks = [asyncio.create_task(flight.do("key", lambda: load(error))) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert results == [error, error]
+
+    release.clear()
+    calls.clear()
+    leader = asyncio.create_task(flight.do("key", lambda: load("leader")))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", lambda: load("follower")))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == "follower"
+    assert leader.cancelled()
+    assert calls == ["leader", "follower"]
+
+@pytest.mark.asyncio
+async def test_concurrent_question_reads_coalesced(override_get_db, test_client: AsyncClient):
+    """
+    Тест для объединения одновременных запросов вопроса: все получают одинаковый ответ,
+    а к БД идет только один из них.
+    """
+    question_id = (await test_client.post("/api/questions/", json={"text": "Популярный вопрос"})).json()["id"]
+    await test_client.post(f"/api/answers/{question_id}", json={"text": "Ответ", "user_id": "user_1"})
+
+    followers = SINGLE_FLIGHT_REQUESTS.value(flight="question", role="follower")
+    responses = await asyncio.gather(*(test_client.get(f"/api/questions/{question_id}") for _ in range(5)))
+
+    assert {resp.status_code for resp in responses} == {200}
+    assert len({resp.content for resp in responses}) == 1
+    assert SINGLE_FLIGHT_REQUESTS.value(flight="question", role="follower") == followers + 4
@@ -0,0 +1,47 @@
+import pytest
+from httpx import AsyncClient
+
+@pytest.mark.asyncio
+async def test_get_user_answers_endpoint(override_get_db, test_client: AsyncClient):
+    """
+    Тест для эндпоинта ленты ответов пользователя: пагинация по курсору и общее число ответов.
+    """
+    q_resp = await test_client.post("/api/questions/", json={"text": "Вопрос для ленты"})
+    question_id = q_resp.json()["id"]
+
+    payload = [
+        {"question_id": question_id, "text": f"Ответ {i}", "user_id": "user_1" if i % 2 == 0 else "user_2"}
+        for i in range(10)
+    ]
+    await test_client.post("/api/answers/bulk", json=payload)
+    resp = await test_client.get(f"/api/questions/{question_id}")
+    created = [a["id"] for a in resp.json()["answers"] if a["user_id"] == "user_1"]
+
+    resp = await test_client.get("/api/users/user_1/answers", params={"limit": 3})
+    assert resp.status_code == 200
+    assert resp.headers["X-Total-Count"] == "5"
+    first_page = resp.json()
+    assert [a["id"] for a in first_page] == created[::-1][:3]
+    assert all(a["user_id"] == "user_1" for a in first_page)
+
+    resp = await test_client.get(
+        "/api/users/user_1/answers",
+        params={"limit": 3, "after": resp.headers["X-Next-Cursor"]}
+    )
+    assert [a["id"] for a in resp.json()] == created[::-1][3:]
+    assert "X-Next-Cursor" not in resp.headers
+
+    resp = await test_client.get("/api/users/user_1/answers", params={"order": "asc"})
+    assert [a["id"] for a in resp.json()] == created
+
+    await test_client.delete(f"/api/answers/{created[0]}")
+    resp = await test_client.get("/api/users/user_1/answers")
+    assert resp.headers["X-Total-Count"] == "4"
+
+    resp = await test_client.get("/api/users/unknown/answers")
+    assert resp.status_code == 200
+    assert resp.json() == []
+    assert resp.headers["X-Total-Count"] == "0"
+
+    resp = await test_client.get("/api/users/user_1/answers", params={"after": "не курсор"})
+    assert resp.status_code == 400
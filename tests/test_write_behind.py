@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.cache import LRUCache
+from app.deps import get_answer_buffer
+from app.events import AnswerBroker
+from app.main import app
+from app.metrics import ANSWER_BUFFER_DROPPED, ANSWER_BUFFER_FLUSH_ROWS
+from app.schemas import AnswerBaseSchema
+from app.write_behind import AnswerWriteBuffer, PendingAnswer
+
+@pytest.mark.asyncio
+async def test_group_commit(
+    override_get_db,
+    get_test_db: AsyncSession,
+    test_cache: LRUCache,
+    test_broker: AnswerBroker,
+    test_client: AsyncClient
+):
+    """
+    Тест для группового коммита: параллельные ответы ждут записи одного общего пакета
+    и получают id из выделенного блока.
+    """
+    question_id = (await test_client.post("/api/questions/", json={"text": "Вопрос"})).json()["id"]
+
+    session_factory = async_sessionmaker(get_test_db.bind, expire_on_commit=False)
+    buffer = AnswerWriteBuffer(
+        session_factory, test_cache, test_broker,
+        durability="commit", flush_interval=60, flush_max_rows=3, id_block_size=2
+    )
+    await buffer.start()
+    flushes = ANSWER_BUFFER_FLUSH_ROWS.count()
+
+    app_logger = logging.getLogger("test")
+
+    async def submit(i: int):
+        async with session_factory() as db:
+            return await buffer.submit(question_id, AnswerBaseSchema(text=f"Ответ {i}", user_id="user_1"), db, app_logger)
+
+    results = await asyncio.gather(*(submit(i) for i in range(3)))
+
+    assert all(committed for _, committed in results)
+    assert sorted(answer.id for answer, _ in results) == [1, 2, 3]
+    assert ANSWER_BUFFER_FLUSH_ROWS.count() == flushes + 1
+
+    resp = await test_client.get(f"/api/questions/{question_id}/answers")
+    assert sorted(a["text"] for a in resp.json()) == ["Ответ 0", "Ответ 1", "Ответ 2"]
+
+    async with session_factory() as db:
+        with pytest.raises(HTTPException) as exc_info:
+            await buffer.submit(999999, AnswerBaseSchema(text="Ответ", user_id="user_1"), db, app_logger)
+    assert exc_info.value.status_code == 400
+
+    await buffer.stop()
+
+@pytest.mark.asyncio
+async def test_buffered_answers_flushed_on_stop(
+    override_get_db,
+    get_test_db: AsyncSession,
+    test_cache: LRUCache,
+    test_broker: AnswerBroker,
+    test_client: AsyncClient
+):
+    """
+    Тест для режима buffered: ответ подтверждается со статусом 202 до записи,
+    а при остановке буфер записывает все принятые ответы.
+    """
+    question_id = (await test_client.post("/api/questions/", json={"text": "Вопрос"})).json()["id"]
+    await test_client.post(f"/api/answers/{question_id}", json={"text": "Первый", "user_id": "user_1"})
+
+    buffer = AnswerWriteBuffer(
+        async_sessionmaker(get_test_db.bind, expire_on_commit=False), test_cache, test_broker,
+        durability="buffered", flush_interval=60
+    )
+    await buffer.start()
+    app.dependency_overrides[get_answer_buffer] = lambda: buffer
+
+    resp = await test_client.post(f"/api/answers/{question_id}", json={"text": "Второй", "user_id": "user_1"})
+    assert resp.status_code == 202
+    assert resp.json()["id"] == 2
+
+    # Ответ еще не записан; страница ответов попадает в кэш
+    resp = await test_client.get(f"/api/questions/{question_id}/answers")
+    assert [a["text"] for a in resp.json()] == ["Первый"]
+
+    await buffer.stop()
+
+    resp = await test_client.post(f"/api/answers/{question_id}", json={"text": "Третий", "user_id": "user_1"})
+    assert resp.status_code == 503
+
+    resp = await test_client.get(f"/api/questions/{question_id}/answers")
+    assert [a["text"] for a in resp.json()] == ["Первый", "Второй"]
+
+@pytest.mark.asyncio
+async def test_buffered_flush_drops_bad_rows(
+    override_get_db,
+    get_test_db: AsyncSession,
+    test_cache: LRUCache,
+    test_broker: AnswerBroker,
+    test_client: AsyncClient
+):
+    """
+    Тест для ошибок сброса в режиме buffered: строка, которую отклонила БД, отбрасывается
+    без остального пакета, а при недоступной БД повторы ограничены.
+    """
+    question_id = (await test_client.post("/api/questions/", json={"text": "Вопрос"})).json()["id"]
+    session_factory = async_sessionmaker(get_test_db.bind, expire_on_commit=False)
+    buffer = AnswerWriteBuffer(session_factory, test_cache, test_broker, durability="buffered", max_retries=2)
+
+    app_logger = logging.getLogger("test")
+    async with session_factory() as db:
+        for i in range(3):
+            await buffer.submit(question_id, AnswerBaseSchema(text=f"Ответ {i}", user_id="user_1"), db, app_logger)
+    buffer._pending[1].row["text"] = None
+
+    rejected = ANSWER_BUFFER_DROPPED.value(reason="rejected")
+    assert await buffer.flush() == 2
+    assert ANSWER_BUFFER_DROPPED.value(reason="rejected") == rejected + 1
+
+    resp = await test_client.get(f"/api/questions/{question_id}/answers")
+    assert [a["text"] for a in resp.json()] == ["Ответ 0", "Ответ 2"]
+
+    def unavailable():
+        raise OSError("database is unavailable")
+
+    buffer.session_factory = unavailable
+    buffer._pending.append(PendingAnswer({"id": 100, "question_id": question_id, "text": "Ответ", "user_id": "user_1"}))
+    exhausted = ANSWER_BUFFER_DROPPED.value(reason="retries_exhausted")
+
+    assert await buffer.flush() == 0
+    assert len(buffer._pending) == 1
+    assert await buffer.flush() == 0
+    assert buffer._pending == []
+    assert ANSWER_BUFFER_DROPPED.value(reason="retries_exhausted") == exhausted + 1